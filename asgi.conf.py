@@ -0,0 +1,48 @@
+"""Gunicorn configuration serving the ASGI application with uvicorn workers.
+
+    gunicorn -c asgi.conf.py library.asgi:application
+
+Each worker runs one event loop; the catalog read views run their queries
+in a thread pool of CATALOG_ASYNC_POOL_SIZE threads (see catalog.async_views),
+so the database sees at most workers x pool size connections.
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'library')
+bind = '0.0.0.0:' + os.environ.get('PORT', '8000')
+
+worker_class = 'library.workers.UvicornWorker'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+
+# Clients waiting for an idle connection slot queue in the listen backlog.
+backlog = 2048
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
+
+accesslog = '-'
+
+# The workers add up their metrics in this directory (see catalog.metrics);
+# a new one for each start of the server.
+if not os.environ.get('CATALOG_METRICS_DIR'):
+    os.environ['CATALOG_METRICS_DIR'] = tempfile.mkdtemp(prefix='catalog-metrics-')
+
+
+def post_worker_init(worker):
+    # The application is loaded in each worker (no preload_app): build the
+    # URL resolver before the first request.
+    from catalog.warmup import warm_up_urls
+
+    warm_up_urls()
+
+
+def worker_exit(server, worker):
+    # Runs in the worker: its last requests count in the visits and metrics.
+    from catalog import metrics, visits
+
+    visits.buffer.flush()
+    metrics.save_snapshot(force=True, exiting=True)
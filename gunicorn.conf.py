@@ -0,0 +1,62 @@
+"""Gunicorn configuration serving the WSGI application (see Procfile).
+
+    gunicorn -c gunicorn.conf.py library.wsgi
+
+The application is loaded once in the master process (``preload_app``) and
+the workers are forked from it, so they start with Django set up, the URL
+resolver built (see catalog.warmup) and, unless CATALOG_WARM_UP_TEMPLATES
+is False, every template compiled. Each worker serves GUNICORN_THREADS
+requests at a time.
+"""
+
+import multiprocessing
+import os
+import tempfile
+
+
+chdir = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'library')
+bind = '0.0.0.0:' + os.environ.get('PORT', '8000')
+
+preload_app = True
+worker_class = 'gthread'
+workers = int(os.environ.get('WEB_CONCURRENCY', multiprocessing.cpu_count()))
+threads = int(os.environ.get('GUNICORN_THREADS', 4))
+
+backlog = 2048
+keepalive = 5
+timeout = 30
+graceful_timeout = 30
+
+accesslog = '-'
+errorlog = '-'
+
+# The workers add up their metrics in this directory (see catalog.metrics);
+# a new one for each start of the server.
+if not os.environ.get('CATALOG_METRICS_DIR'):
+    os.environ['CATALOG_METRICS_DIR'] = tempfile.mkdtemp(prefix='catalog-metrics-')
+
+
+def when_ready(server):
+    # Runs in the master once the application is loaded, before the first
+    # workers are forked.
+    from catalog.warmup import warm_up_templates, warm_up_urls
+
+    warm_up_urls()
+    if os.environ.get('CATALOG_WARM_UP_TEMPLATES', 'True') != 'False':
+        server.log.info("%s gabarits compilés", warm_up_templates())
+
+
+def post_fork(server, worker):
+    # Database connections must not be shared with the master or between
+    # workers: each worker opens its own.
+    from django.db import connections
+
+    connections.close_all()
+
+
+def worker_exit(server, worker):
+    # Runs in the worker: its last requests count in the visits and metrics.
+    from catalog import metrics, visits
+
+    visits.buffer.flush()
+    metrics.save_snapshot(force=True, exiting=True)
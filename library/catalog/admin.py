@@ -1,5 +1,11 @@
+import datetime
+
 from django.contrib import admin
+from django.core.paginator import Paginator
+from django.forms.models import BaseInlineFormSet
+from django.utils.functional import cached_property
 
+from . import circulation, counters
 from .models import Author, Book, BookInstance, Genre, Language
 
 
@@ -7,16 +13,157 @@ admin.AdminSite.site_title = "MDN Library"
 admin.AdminSite.site_header = "Back Office de MDN Library"
 
 
-class BookInstanceInline(admin.TabularInline):
+class EstimatedCountPaginator(Paginator):
+    """Changelist paginator that never counts a whole large table.
 
-    model = BookInstance
+    Unfiltered changelists use ``counters.estimated_count()``; filtered ones
+    count at most ``max_count`` rows, so the last pages of a huge result are
+    only reachable by refining the filters.
+    """
+
+    max_count = 10000
+
+    @cached_property
+    def count(self):
+        queryset = self.object_list
+        if not queryset.query.where:
+            return counters.estimated_count(queryset.model)
+
+        return queryset[:self.max_count].count()
+
+
+class LoanDueFilter(admin.SimpleListFilter):
+    """Due date filter on loaned copies (uses bookinstance_on_loan_idx)."""
+
+    title = "retour"
+    parameter_name = 'due'
+
+    def lookups(self, request, model_admin):
+        return (
+            ('overdue', "En retard"),
+            ('week', "Dans les 7 prochains jours"),
+        )
+
+    def queryset(self, request, queryset):
+        today = datetime.date.today()
+        if self.value() == 'overdue':
+            return queryset.overdue(today)
+        if self.value() == 'week':
+            return queryset.filter(
+                status='o',
+                due_back__gte=today,
+                due_back__lt=today + datetime.timedelta(days=7),
+            )
+
+        return queryset
+
+
+class PaginatedInlineFormSet(BaseInlineFormSet):
+    """Inline formset showing one page of the related objects.
+
+    The page is read from the ``<prefix>-page`` query parameter, which the
+    change form keeps when it is submitted, so saving updates the page that
+    was displayed.
+    """
+
+    per_page = 20
+    request_params = None
+
+    def get_queryset(self):
+        if not hasattr(self, 'page'):
+            queryset = super().get_queryset()
+            self.paginator = Paginator(queryset, self.per_page)
+            self.page = self.paginator.get_page(
+                self.request_params.get(self.page_param),
+            )
+            objects = list(self.page.object_list)
+            # str(obj) and the fk field of each form read the parent object.
+            for obj in objects:
+                self.fk.set_cached_value(obj, self.instance)
+            self._queryset = objects
+
+        return self._queryset
+
+    @property
+    def page_param(self):
+        return f'{self.prefix}-page'
+
+    def page_url(self, number):
+        params = self.request_params.copy()
+        params[self.page_param] = number
+
+        return f'?{params.urlencode()}'
+
+    @property
+    def previous_page_url(self):
+        if self.page.has_previous():
+            return self.page_url(self.page.previous_page_number())
+
+    @property
+    def next_page_url(self):
+        if self.page.has_next():
+            return self.page_url(self.page.next_page_number())
+
+
+class PaginatedInlineMixin:
+    """Paginate an inline and share its select choices between its forms.
+
+    The choices of foreign key selects are computed once per request and
+    reused by every form (and every inline) instead of being queried again
+    for each row.
+    """
+
+    formset = PaginatedInlineFormSet
+    template = 'admin/catalog/edit_inline/paginated_tabular.html'
+    per_page = 20
     extra = 0
 
+    def get_formset(self, request, obj=None, **kwargs):
+        formset = super().get_formset(request, obj, **kwargs)
+        formset.per_page = self.per_page
+        formset.request_params = request.GET
+
+        return formset
 
-class BookInline(admin.StackedInline):
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        formfield = super().formfield_for_foreignkey(db_field, request, **kwargs)
+        if formfield is None or db_field.name in self.raw_id_fields:
+            return formfield
+
+        choices_cache = request.__dict__.setdefault('_catalog_choices', {})
+        key = (db_field.model, db_field.name)
+        if key not in choices_cache:
+            choices_cache[key] = list(formfield.choices)
+        formfield.choices = choices_cache[key]
+
+        return formfield
+
+
+class BookInstanceInline(PaginatedInlineMixin, admin.TabularInline):
+
+    model = BookInstance
+    fields = ('imprint', 'status', 'due_back', 'borrower')
+    # Borrowers are edited from the copy's own page, which has a raw id
+    # widget: an inline select would list every user on every row.
+    readonly_fields = ('borrower',)
+    ordering = ('due_back', 'uuid')
+    show_change_link = True
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related('borrower')
+
+
+class BookInline(PaginatedInlineMixin, admin.TabularInline):
 
     model = Book
-    extra = 0
+    fields = ('title', 'isbn', 'language')
+    ordering = ('title', 'id')
+    show_change_link = True
+
+    def has_add_permission(self, request, obj=None):
+        # A book needs a summary and genres, which are not shown here: books
+        # are added from their own page, linked from each row.
+        return False
 
 
 @admin.register(Author)
@@ -25,6 +172,9 @@ class AuthorAdmin(admin.ModelAdmin):
     list_display = (
         'last_name', 'first_name', 'date_of_birth', 'date_of_death',
     )
+    search_fields = ('last_name', 'first_name')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     fields = [
         'first_name',
         'last_name',
@@ -39,8 +189,17 @@ class BookAdmin(admin.ModelAdmin):
     list_display = (
         'title', 'author', 'display_genre',
     )
+    list_select_related = ('author',)
+    search_fields = ('title', 'isbn')
+    autocomplete_fields = ('author', 'language', 'genre')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
     inlines = [BookInstanceInline]
 
+    def get_queryset(self, request):
+        # display_genre() slices the prefetched genres instead of querying.
+        return super().get_queryset(request).prefetch_related('genre')
+
 
 @admin.register(BookInstance)
 class BookInstanceAdmin(admin.ModelAdmin):
@@ -48,9 +207,19 @@ class BookInstanceAdmin(admin.ModelAdmin):
     list_display = (
         'book', 'imprint', 'status', 'due_back', 'borrower',
     )
+    list_select_related = ('book', 'borrower')
+    # Filters and ordering follow bookinstance_status_due_idx, so a page of
+    # the changelist is read from the index instead of sorting the table.
     list_filter = (
-        'status', 'due_back',
+        'status', LoanDueFilter,
     )
+    ordering = ('status', 'due_back', 'uuid')
+    raw_id_fields = ('book', 'borrower')
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    actions = [
+        'check_in', 'renew', 'mark_available', 'mark_maintenance', 'mark_reserved',
+    ]
     fieldsets = (
         (None, {
             'fields': ('book', 'imprint', 'uuid',),
@@ -61,13 +230,53 @@ class BookInstanceAdmin(admin.ModelAdmin):
     )
 
 
+    @staticmethod
+    def selected_ids(queryset):
+        return queryset.order_by().values('uuid')
+
+    def check_in(self, request, queryset):
+        updated = circulation.check_in(self.selected_ids(queryset))
+        self.message_user(request, f"{updated} exemplaire(s) rendu(s).")
+
+    check_in.short_description = "Enregistrer le retour des exemplaires empruntés"
+
+    def renew(self, request, queryset):
+        due_back = circulation.default_renewal_date()
+        updated = circulation.renew(self.selected_ids(queryset), due_back)
+        self.message_user(
+            request, f"{updated} emprunt(s) prolongé(s) jusqu'au {due_back:%d/%m/%Y}.",
+        )
+
+    renew.short_description = "Prolonger les emprunts de 3 semaines"
+
+    def set_status(self, request, queryset, status):
+        updated = circulation.set_status(self.selected_ids(queryset), status)
+        label = dict(BookInstance.LOAN_STATUS)[status]
+        self.message_user(request, f"{updated} exemplaire(s) passé(s) en « {label} ».")
+
+    def mark_available(self, request, queryset):
+        self.set_status(request, queryset, 'a')
+
+    mark_available.short_description = "Marquer comme disponibles"
+
+    def mark_maintenance(self, request, queryset):
+        self.set_status(request, queryset, 'm')
+
+    mark_maintenance.short_description = "Marquer comme en maintenance"
+
+    def mark_reserved(self, request, queryset):
+        self.set_status(request, queryset, 'r')
+
+    mark_reserved.short_description = "Marquer comme réservés"
+
+
 @admin.register(Genre)
 class GenreAdmin(admin.ModelAdmin):
 
-    pass
+    search_fields = ('name',)
 
 
 @admin.register(Language)
 class LanguageAdmin(admin.ModelAdmin):
 
-    pass
\ No newline at end of file
+    search_fields = ('name',)
\ No newline at end of file
@@ -0,0 +1,224 @@
+"""Read-only JSON API over the catalog.
+
+Every resource supports sparse fieldsets (``?fields=id,title``) and list
+resources are paginated with keyset cursors (``?cursor=...&limit=50``).
+Responses carry a strong ``ETag`` and a ``Last-Modified`` date derived from
+the versions of the data they depend on (see ``catalog.versions``), so a
+conditional request for unchanged data gets a ``304 Not Modified`` without
+any database query. Without a cache shared by every process, versions are
+not kept (see ``catalog.versions``) and responses carry no validators.
+"""
+
+import hashlib
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.http import Http404, JsonResponse
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.utils.http import http_date
+from django.views.decorators.http import require_safe
+
+from . import versions
+from .models import Author, Book, BookInstance
+from .pagination import InvalidCursor, KeysetPaginator
+
+
+DEFAULT_LIMIT = 20
+MAX_LIMIT = 100
+
+RESOURCES = {
+    'books': {
+        'queryset': lambda: Book.objects.all(),
+        'ordering': ('title', 'pk'),
+        'depends_on': ('books',),
+        'fields': {
+            'id': 'pk',
+            'title': 'title',
+            'isbn': 'isbn',
+            'summary': 'summary',
+            'author': 'author_id',
+            'author_first_name': 'author__first_name',
+            'author_last_name': 'author__last_name',
+            'language': 'language__name',
+        },
+    },
+    'authors': {
+        'queryset': lambda: Author.objects.all(),
+        'ordering': ('last_name', 'first_name', 'pk'),
+        'depends_on': ('authors',),
+        'fields': {
+            'id': 'pk',
+            'first_name': 'first_name',
+            'last_name': 'last_name',
+            'date_of_birth': 'date_of_birth',
+            'date_of_death': 'date_of_death',
+        },
+    },
+    'copies': {
+        'queryset': lambda: BookInstance.objects.all(),
+        'ordering': ('due_back', 'uuid'),
+        'depends_on': ('copies',),
+        'filters': {'book': 'book_id', 'status': 'status'},
+        'fields': {
+            'id': 'uuid',
+            'book': 'book_id',
+            'imprint': 'imprint',
+            'status': 'status',
+            'due_back': 'due_back',
+        },
+    },
+}
+
+
+class ApiError(Exception):
+
+    def __init__(self, message, status=400):
+        super().__init__(message)
+        self.status = status
+
+
+def _error(message, status):
+    return JsonResponse({'error': message}, status=status)
+
+
+def _selected_fields(request, resource):
+    available = resource['fields']
+    requested = request.GET.get('fields')
+    if not requested:
+        return available
+
+    names = [name.strip() for name in requested.split(',') if name.strip()]
+    unknown = [name for name in names if name not in available]
+    if unknown:
+        raise ApiError(f"Champs inconnus : {', '.join(unknown)}")
+
+    return {name: available[name] for name in names}
+
+
+def _serialize(row, fields):
+    return {name: row[lookup] for name, lookup in fields.items()}
+
+
+def _etag(request, data_versions):
+    """Strong validator covering the request and the data it reads."""
+    signature = '|'.join([
+        request.path,
+        request.GET.urlencode(),
+        *(f'{name}={version}' for name, version in sorted(data_versions.items())),
+    ])
+
+    return '"%s"' % hashlib.sha1(signature.encode()).hexdigest()
+
+
+def conditional_json(request, depends_on, build_payload):
+    """Answer with ``build_payload()`` as JSON, or 304 if unchanged."""
+    response = etag = None
+    if settings.CATALOG_SHARED_CACHE:
+        data_versions = versions.get_versions(*depends_on)
+        etag = _etag(request, data_versions)
+        last_modified = versions.last_modified(data_versions)
+
+        response = get_conditional_response(
+            request, etag=etag, last_modified=int(last_modified.timestamp()),
+        )
+    if response is None:
+        try:
+            response = JsonResponse(
+                build_payload(), json_dumps_params={'ensure_ascii': False},
+            )
+        except ApiError as error:
+            return _error(str(error), error.status)
+
+    if etag is not None:
+        response['ETag'] = etag
+        response['Last-Modified'] = http_date(last_modified.timestamp())
+    patch_cache_control(response, no_cache=True)
+
+    return response
+
+
+def _get_resource(name):
+    try:
+        return RESOURCES[name]
+    except KeyError:
+        raise Http404("Ressource inconnue.")
+
+
+def _limit(request):
+    try:
+        limit = int(request.GET.get('limit', DEFAULT_LIMIT))
+    except ValueError:
+        raise ApiError("Paramètre limit invalide.")
+
+    return min(max(limit, 1), MAX_LIMIT)
+
+
+@require_safe
+def resource_list(request, resource_name):
+    resource = _get_resource(resource_name)
+
+    def build_payload():
+        fields = _selected_fields(request, resource)
+        ordering = resource['ordering']
+
+        queryset = resource['queryset']()
+        try:
+            for param, lookup in resource.get('filters', {}).items():
+                if param in request.GET:
+                    queryset = queryset.filter(**{lookup: request.GET[param]})
+        except (ValidationError, ValueError):
+            raise ApiError(f"Filtre invalide : {param}")
+        queryset = queryset.values(*set(ordering) | set(fields.values()))
+
+        paginator = KeysetPaginator(queryset, _limit(request), ordering)
+        try:
+            page = paginator.page(request.GET.get('cursor'))
+        except InvalidCursor:
+            raise ApiError("Curseur invalide.")
+
+        return {
+            'results': [_serialize(row, fields) for row in page],
+            'next': page.next_cursor,
+            'previous': page.previous_cursor,
+        }
+
+    return conditional_json(request, resource['depends_on'], build_payload)
+
+
+@require_safe
+def resource_detail(request, resource_name, pk):
+    resource = _get_resource(resource_name)
+
+    def build_payload():
+        fields = _selected_fields(request, resource)
+        try:
+            row = resource['queryset']().filter(pk=pk).values(*fields.values()).first()
+        except (ValidationError, ValueError):
+            row = None
+        if row is None:
+            raise ApiError("Objet introuvable.", status=404)
+
+        return _serialize(row, fields)
+
+    return conditional_json(request, resource['depends_on'], build_payload)
+
+
+@require_safe
+def book_availability(request, pk):
+
+    def build_payload():
+        if not Book.objects.filter(pk=pk).exists():
+            raise ApiError("Livre introuvable.", status=404)
+
+        summary = BookInstance.objects.filter(book_id=pk).summary()
+        by_status = {status: count for status, _, count in summary['by_status']}
+
+        return {
+            'book': pk,
+            'total': summary['total'],
+            'available': by_status.get('a', 0),
+            'by_status': by_status,
+            'next_due_back': summary['next_due_back'],
+        }
+
+    return conditional_json(request, ('books', 'copies'), build_payload)
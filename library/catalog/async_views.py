@@ -0,0 +1,208 @@
+"""Asynchronous variants of the catalog read views, for ASGI servers.
+
+The ORM is synchronous, so every database or cache access runs in a
+bounded thread pool (``CATALOG_ASYNC_POOL_SIZE`` threads, hence at most as
+many database connections per process) while the event loop keeps serving
+other requests. Queries that do not depend on each other are submitted
+together and awaited with ``asyncio.gather``.
+
+These views are routed instead of the synchronous ones when
+``CATALOG_ASYNC_VIEWS`` is enabled, which ``library/asgi.py`` does. The
+exports stream through ``library.handlers``, as Django 3.1 iterates
+ordinary streaming responses in the event loop.
+"""
+
+import asyncio
+import contextvars
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+
+from django.conf import settings
+from django.contrib.auth.decorators import permission_required
+from django.core.paginator import Paginator
+from django.db import close_old_connections
+from django.http import Http404
+from django.shortcuts import get_object_or_404, render
+
+from library.handlers import AsyncStreamingHttpResponse
+
+from . import exports, page_cache, stats, versions, visits, views
+from .models import Author, BookInstance
+
+
+executor = ThreadPoolExecutor(
+    max_workers=settings.CATALOG_ASYNC_POOL_SIZE,
+    thread_name_prefix='catalog-orm',
+)
+
+
+def _call(func, *args, **kwargs):
+    # Pool threads outlive requests: apply CONN_MAX_AGE like a request would.
+    close_old_connections()
+    try:
+        return func(*args, **kwargs)
+    finally:
+        close_old_connections()
+
+
+async def run(func, *args, **kwargs):
+    """Run ``func`` in the ORM thread pool and return its result."""
+    loop = asyncio.get_event_loop()
+    # Keep the request context (e.g. catalog.metrics timings) in the thread.
+    context = contextvars.copy_context()
+
+    return await loop.run_in_executor(
+        executor, partial(context.run, _call, func, *args, **kwargs),
+    )
+
+
+def _render_page(request, template_name, context, data_versions):
+    context.update(page_cache.cache_context(request, data_versions))
+
+    return render(request, template_name, context)
+
+
+def _cached_response(request, view_name, version_names):
+    data_versions = versions.get_versions(*version_names)
+    key = page_cache.page_cache_key(request, view_name, data_versions)
+
+    return key, data_versions, page_cache.get_cached_response(key)
+
+
+def _render_view(view_class, request, **kwargs):
+    response = view_class.as_view()(request, **kwargs)
+    if hasattr(response, 'render'):
+        response.render()
+
+    return response
+
+
+async def index(request):
+    catalog_stats, visits_count = await asyncio.gather(
+        run(stats.get_stats), run(visits.record, request),
+    )
+
+    response = await run(render, request, 'index.html', {
+        **catalog_stats,
+        'visits_count': visits_count,
+    })
+    visits.set_cookie(response, visits_count + 1)
+
+    return response
+
+
+async def book_list(request):
+    # A single keyset query: no need to split the generic view.
+    return await run(_render_view, views.BookListView, request)
+
+
+async def author_list(request):
+    return await run(_render_view, views.AuthorListView, request)
+
+
+async def book_detail(request, pk):
+    key, data_versions, response = await run(
+        _cached_response, request, 'BookDetailView', [f'book:{pk}'],
+    )
+    if response is not None:
+        return response
+
+    copies = BookInstance.objects.filter(book_id=pk).only(
+        'uuid', 'imprint', 'status', 'due_back', 'book_id',
+    ).order_by('due_back', 'uuid')
+    paginator = Paginator(copies, views.BookDetailView.copies_paginate_by)
+
+    book, copies_summary, _ = await asyncio.gather(
+        run(get_object_or_404, views.BookDetailView.queryset, pk=pk),
+        run(copies.summary),
+        run(lambda: paginator.count),
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    copy_list = await run(list, page_obj.object_list)
+
+    response = await run(_render_page, request, 'catalog/book_detail.html', {
+        'book': book,
+        'object': book,
+        'copies_summary': copies_summary,
+        'copy_list': copy_list,
+        'paginator': paginator,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+    }, data_versions)
+    await run(page_cache.store_response, key, response)
+
+    return response
+
+
+async def author_detail(request, pk):
+    key, data_versions, response = await run(
+        _cached_response, request, 'AuthorDetailView', [f'author:{pk}'],
+    )
+    if response is not None:
+        return response
+
+    books = views.AuthorDetailView.annotate_books(
+        Author(pk=pk).book_set.all(),
+    )
+    paginator = Paginator(books, views.AuthorDetailView.books_paginate_by)
+
+    author, _ = await asyncio.gather(
+        run(get_object_or_404, Author, pk=pk),
+        run(lambda: paginator.count),
+    )
+    page_obj = paginator.get_page(request.GET.get('page'))
+    book_list = await run(list, page_obj.object_list)
+
+    response = await run(_render_page, request, 'catalog/author_detail.html', {
+        'author': author,
+        'object': author,
+        'book_list': book_list,
+        'paginator': paginator,
+        'page_obj': page_obj,
+        'is_paginated': page_obj.has_other_pages(),
+    }, data_versions)
+    await run(page_cache.store_response, key, response)
+
+    return response
+
+
+@permission_required('catalog.can_mark_returned')
+def _check_export_permission(request):
+    return None
+
+
+def _next_lines(chunks, encode):
+    chunk = next(chunks, None)
+    if chunk is None:
+        return None
+
+    return ''.join(encode(row) for row in chunk)
+
+
+async def _iter_export(dataset, format):
+    lines, encode = exports.encoder(dataset, format)
+    yield ''.join(lines)
+
+    # Each chunk is its own query: any pool thread can fetch the next one.
+    chunks = exports.iter_row_chunks(dataset)
+    while True:
+        lines = await run(_next_lines, chunks, encode)
+        if lines is None:
+            return
+        yield lines
+
+
+async def export_dataset(request, dataset, format):
+    denied = await run(_check_export_permission, request)
+    if denied is not None:
+        return denied
+    if dataset not in exports.DATASETS or format not in exports.CONTENT_TYPES:
+        raise Http404("Export inconnu.")
+
+    response = AsyncStreamingHttpResponse(
+        _iter_export(dataset, format),
+        content_type=exports.CONTENT_TYPES[format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{format}"'
+
+    return response
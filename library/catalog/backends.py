@@ -0,0 +1,67 @@
+"""Authentication backend caching users and their permissions.
+
+``ModelBackend`` loads the user on every request and its permissions once
+per request, with two queries (user and group permissions) each time.
+``CachedModelBackend`` keeps both in the cache across requests, under keys
+derived from two versions (see ``catalog.versions``):
+
+* ``user:<pk>``, bumped when the user, its groups or its own permissions
+  change;
+* ``auth``, bumped when the permissions of a group change, when a group is
+  deleted or when a permission changes, which can affect any user.
+
+The signal handlers bumping them are in ``catalog.signals``.
+"""
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from . import versions
+
+
+AUTH_CACHE_TIMEOUT = 60 * 60
+USER_KEY_PREFIX = 'catalog:auth:user:'
+PERMISSIONS_KEY_PREFIX = 'catalog:auth:perms:'
+
+
+def user_version(user_id):
+    return f'user:{user_id}'
+
+
+def _key(prefix, user_id, data_versions):
+    return prefix + ':'.join([
+        str(user_id), *(str(version) for _, version in sorted(data_versions.items())),
+    ])
+
+
+class CachedModelBackend(ModelBackend):
+
+    def get_user(self, user_id):
+        data_versions = versions.get_versions(user_version(user_id))
+        key = _key(USER_KEY_PREFIX, user_id, data_versions)
+
+        user = cache.get(key)
+        if user is None:
+            user = super().get_user(user_id)
+            if user is not None:
+                cache.set(key, user, AUTH_CACHE_TIMEOUT)
+
+        return user
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if hasattr(user_obj, '_perm_cache'):
+            return user_obj._perm_cache
+
+        data_versions = versions.get_versions('auth', user_version(user_obj.pk))
+        key = _key(PERMISSIONS_KEY_PREFIX, user_obj.pk, data_versions)
+
+        permissions = cache.get(key)
+        if permissions is None:
+            permissions = super().get_all_permissions(user_obj)
+            cache.set(key, permissions, AUTH_CACHE_TIMEOUT)
+        user_obj._perm_cache = permissions
+
+        return permissions
+
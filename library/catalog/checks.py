@@ -0,0 +1,45 @@
+"""System checks of the settings the catalog relies on."""
+
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+
+CACHED_SESSION_ENGINES = (
+    'django.contrib.sessions.backends.cache',
+    'django.contrib.sessions.backends.cached_db',
+)
+
+SHARED_CACHE_HINT = (
+    "Définissez DJANGO_CACHE_DIR (ou un autre cache partagé par tous les "
+    "processus), ou gardez les sessions et l'authentification en base."
+)
+
+
+@register(Tags.caches)
+def check_per_process_cache(app_configs, **kwargs):
+    """Refuse caching sessions and permissions in a per-process cache.
+
+    Another worker would keep a logged-out session or a revoked permission
+    in its own cache.
+    """
+    if settings.CATALOG_SHARED_CACHE:
+        return []
+
+    errors = []
+    if settings.SESSION_ENGINE in CACHED_SESSION_ENGINES:
+        errors.append(Error(
+            f"{settings.SESSION_ENGINE} garde les sessions dans un cache propre "
+            f"à chaque processus : une déconnexion n'y serait pas vue par les autres.",
+            hint=SHARED_CACHE_HINT,
+            id='catalog.E001',
+        ))
+    if 'catalog.backends.CachedModelBackend' in settings.AUTHENTICATION_BACKENDS:
+        errors.append(Error(
+            "CachedModelBackend garde les utilisateurs et leurs permissions dans "
+            "un cache propre à chaque processus : une permission retirée n'y "
+            "serait pas vue par les autres.",
+            hint=SHARED_CACHE_HINT,
+            id='catalog.E002',
+        ))
+
+    return errors
@@ -0,0 +1,215 @@
+"""Circulation operations on copies: check-out, reservation, returns.
+
+Every operation changes copies with conditional ``UPDATE`` statements that
+only match copies in the expected status, so two librarians can never lend
+the same copy: the second ``UPDATE ... WHERE status = 'a'`` matches no row
+and the operation reports it instead of overwriting the first loan.
+
+Bulk operations (check-in, renewal, status changes) touch every selected
+copy with one ``UPDATE`` inside a transaction, writing only the columns
+that change. ``QuerySet.update()`` does not send ``post_save``, so the
+counters, the cached stats and the page versions are kept in step here,
+in the same transaction.
+"""
+
+import datetime
+import random
+from collections import Counter
+from functools import partial
+
+from django.db import connections, transaction
+
+from library.db.transaction import immediate_atomic
+
+from . import counters, stats
+from .models import BookInstance
+from .signals import bump_copy_versions
+
+
+LOAN_PERIOD = datetime.timedelta(weeks=3)
+HOLD_PERIOD = datetime.timedelta(weeks=1)
+# Available copies tried in turn when another request takes the first one.
+PICK_BATCH = 10
+
+
+def _record_moves(moved, new_status, book_ids):
+    """Adjust counters, stats and versions after copies changed status.
+
+    ``moved`` counts the updated copies per previous status. Must be called
+    inside the transaction of the update.
+    """
+    if new_status is not None:
+        moved = Counter({
+            status: count for status, count in moved.items()
+            if status != new_status
+        })
+        for status, count in moved.items():
+            counters.increment(BookInstance, -count, status=status)
+        counters.increment(BookInstance, sum(moved.values()), status=new_status)
+
+        available = sum(moved.values()) if new_status == 'a' else -moved['a']
+        transaction.on_commit(partial(
+            stats.adjust_stats, available_instances_count=available,
+        ))
+
+    bump_copy_versions(book_ids)
+
+
+def _update(copies, **changes):
+    """Apply ``changes`` to copies in any status; return how many changed."""
+    with immediate_atomic():
+        rows = list(copies.select_for_update().order_by().values_list(
+            'uuid', 'status', 'book_id',
+        ))
+        if not rows:
+            return 0
+
+        # The locked rows cannot change before the update, so the counters
+        # can be adjusted from their statuses.
+        updated = BookInstance.objects.filter(
+            uuid__in=[uuid for uuid, _, _ in rows],
+        ).update(**changes)
+
+        _record_moves(
+            Counter(status for _, status, _ in rows),
+            changes.get('status'),
+            {book_id for _, _, book_id in rows},
+        )
+
+    return updated
+
+
+def _transition(copies, from_status, to_status, **changes):
+    """Move the ``copies`` in ``from_status`` to ``to_status``; return how many.
+
+    This is a compare-and-set: copies in another status are left alone. The
+    ``UPDATE`` is the first statement of the transaction, so it takes the
+    write lock directly and concurrent callers are serialized on it.
+    """
+    with immediate_atomic():
+        updated = copies.filter(status=from_status).update(
+            status=to_status, **changes,
+        )
+        if updated:
+            _record_moves(
+                {from_status: updated}, to_status,
+                set(copies.values_list('book_id', flat=True)),
+            )
+
+    return updated
+
+
+def _claim_any(book_id, from_status, to_status, **changes):
+    """Move any copy of ``book_id`` in ``from_status``; return its UUID.
+
+    Where the database supports ``SKIP LOCKED``, the copy is locked first and
+    concurrent callers each get a different one without waiting. Otherwise
+    a few candidates are tried in random order with compare-and-set updates,
+    so callers racing for the same copy fall back on the next one.
+    """
+    candidates = BookInstance.objects.filter(
+        book_id=book_id, status=from_status,
+    ).order_by().values_list('uuid', flat=True)
+
+    if connections[candidates.db].features.has_select_for_update_skip_locked:
+        with immediate_atomic():
+            copy_id = candidates.select_for_update(skip_locked=True).first()
+            if copy_id is not None:
+                _transition(
+                    BookInstance.objects.filter(uuid=copy_id),
+                    from_status, to_status, **changes,
+                )
+
+            return copy_id
+
+    while True:
+        batch = list(candidates[:PICK_BATCH])
+        if not batch:
+            return None
+
+        random.shuffle(batch)
+        for copy_id in batch:
+            if _transition(
+                BookInstance.objects.filter(uuid=copy_id),
+                from_status, to_status, **changes,
+            ):
+                return copy_id
+
+
+def check_out(copy_id, borrower, due_back=None):
+    """Lend an available copy, or one reserved by ``borrower``.
+
+    Return whether the copy was lent: ``False`` when it is not available.
+    """
+    copy = BookInstance.objects.filter(uuid=copy_id)
+    changes = {
+        'borrower': borrower,
+        'due_back': due_back or default_renewal_date(),
+    }
+
+    return bool(
+        _transition(copy.filter(borrower=borrower), 'r', 'o', **changes)
+        or _transition(copy, 'a', 'o', **changes)
+    )
+
+
+def check_out_any(book_id, borrower, due_back=None):
+    """Lend a copy of ``book_id`` and return its UUID, or ``None``.
+
+    A copy reserved by ``borrower`` is picked first, then any available one.
+    """
+    due_back = due_back or default_renewal_date()
+    reserved = BookInstance.objects.filter(
+        book_id=book_id, status='r', borrower=borrower,
+    ).values_list('uuid', flat=True).first()
+    if reserved is not None and check_out(reserved, borrower, due_back):
+        return reserved
+
+    return _claim_any(book_id, 'a', 'o', borrower=borrower, due_back=due_back)
+
+
+def reserve(copy_id, borrower):
+    """Hold an available copy for ``borrower``; return whether it was free."""
+    return bool(_transition(
+        BookInstance.objects.filter(uuid=copy_id), 'a', 'r',
+        borrower=borrower, due_back=datetime.date.today() + HOLD_PERIOD,
+    ))
+
+
+def reserve_any(book_id, borrower):
+    """Hold any available copy of ``book_id``; return its UUID, or ``None``."""
+    return _claim_any(
+        book_id, 'a', 'r',
+        borrower=borrower, due_back=datetime.date.today() + HOLD_PERIOD,
+    )
+
+
+def check_in(copy_ids):
+    """Mark the given copies on loan as returned and available."""
+    copies = BookInstance.objects.filter(uuid__in=copy_ids)
+
+    return _transition(copies, 'o', 'a', due_back=None, borrower=None)
+
+
+def renew(copy_ids, due_back):
+    """Move the due date of the given copies on loan to ``due_back``."""
+    copies = BookInstance.objects.filter(uuid__in=copy_ids)
+
+    return _transition(copies, 'o', 'o', due_back=due_back)
+
+
+def set_status(copy_ids, status):
+    """Give ``status`` to the given copies; available copies have no loan."""
+    if status == 'o':
+        raise ValueError("Use check-out to lend copies.")
+
+    copies = BookInstance.objects.filter(uuid__in=copy_ids).exclude(status=status)
+    changes = {'status': status}
+    if status == 'a':
+        changes.update(due_back=None, borrower=None)
+
+    return _update(copies, **changes)
+
+
+def default_renewal_date():
+    return datetime.date.today() + LOAN_PERIOD
@@ -0,0 +1,116 @@
+"""Maintenance of the denormalized ``CatalogCounter`` rows.
+
+Counters are adjusted with ``UPDATE ... SET count = count + n`` statements
+issued from the signal handlers, inside the transaction that changed the
+underlying rows, so reading a total never needs to scan the catalog tables.
+"""
+
+from django.db import IntegrityError, connections, router, transaction
+from django.db.models import Count, F, Sum
+
+from library.db.transaction import immediate_atomic
+
+from .models import Author, Book, BookInstance, CatalogCounter, CountedModel
+
+
+COUNTED_MODELS = (Author, Book)
+
+
+def entity_name(model):
+    return model._meta.model_name
+
+
+def increment(model, delta, status=''):
+    if not delta:
+        return
+
+    entity = entity_name(model)
+    counter = CatalogCounter.objects.filter(entity=entity, status=status)
+    if counter.update(count=F('count') + delta):
+        return
+
+    try:
+        # In a savepoint: a concurrent transaction may create the row first.
+        with transaction.atomic():
+            CatalogCounter.objects.create(entity=entity, status=status, count=delta)
+    except IntegrityError:
+        counter.update(count=F('count') + delta)
+
+
+def read_totals():
+    """Return the catalog totals from the counter table in one query."""
+    rows = CatalogCounter.objects.values_list('entity', 'status', 'count')
+
+    copies_by_status = {}
+    totals = {}
+    for entity, status, count in rows:
+        if entity == entity_name(BookInstance):
+            copies_by_status[status] = count
+        else:
+            totals[entity] = count
+
+    return {
+        'authors_count': totals.get(entity_name(Author), 0),
+        'books_count': totals.get(entity_name(Book), 0),
+        'instances_count': sum(copies_by_status.values()),
+        'available_instances_count': copies_by_status.get('a', 0),
+        'instances_count_by_status': copies_by_status,
+    }
+
+
+def estimated_count(model):
+    """Return the number of rows of ``model`` without scanning its table.
+
+    Counted models read their counters; on PostgreSQL other tables use the
+    planner statistics. Otherwise, fall back to an exact ``COUNT(*)``.
+    """
+    if issubclass(model, CountedModel):
+        total = CatalogCounter.objects.filter(
+            entity=entity_name(model),
+        ).aggregate(total=Sum('count'))['total']
+        return total or 0
+
+    connection = connections[router.db_for_read(model)]
+    if connection.vendor == 'postgresql':
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "SELECT reltuples FROM pg_class WHERE oid = %s::regclass",
+                [model._meta.db_table],
+            )
+            row = cursor.fetchone()
+        # reltuples is -1 (or 0) until the table is first analyzed.
+        if row and row[0] > 0:
+            return int(row[0])
+
+    return model._default_manager.count()
+
+
+def count_rows():
+    """Count the catalog tables from scratch (full scans)."""
+    counts = {
+        (entity_name(model), ''): model.objects.count()
+        for model in COUNTED_MODELS
+    }
+    by_status = BookInstance.objects.order_by().values('status').annotate(
+        count=Count('pk'),
+    )
+    for row in by_status:
+        counts[(entity_name(BookInstance), row['status'])] = row['count']
+
+    return counts
+
+
+@immediate_atomic()
+def recount():
+    """Rebuild every counter row from the catalog tables."""
+    # Lock the counters so concurrent increments wait for the rebuild.
+    list(CatalogCounter.objects.select_for_update())
+    counts = count_rows()
+
+    CatalogCounter.objects.update(count=0)
+    for (entity, status), count in counts.items():
+        CatalogCounter.objects.update_or_create(
+            entity=entity, status=status, defaults={'count': count},
+        )
+
+    return counts
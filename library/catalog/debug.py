@@ -0,0 +1,121 @@
+"""Development helpers: detect N+1 queries while browsing.
+
+``RepeatedQueryMiddleware`` (added to ``MIDDLEWARE`` when ``DEBUG`` is on)
+records the SQL run by each request. Statements that differ only in their
+parameters, numbers or ``IN (...)`` lists count as the same query; when one
+runs ``CATALOG_REPEATED_QUERY_THRESHOLD`` times or more in a request, a
+warning is logged on ``catalog.debug`` with the query, the template tag or
+variable that triggered it (file and line) and the project frames of the
+stack.
+
+Recording a stack is expensive, so it is only done on the second run of a
+statement, and the middleware is not meant for production (see
+``catalog.metrics`` and the query budgets of ``tests/test_performance.py``).
+"""
+
+import logging
+import os
+import re
+import sys
+import traceback
+from collections import Counter
+
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+from django.template.base import Node, TokenType
+
+
+logger = logging.getLogger(__name__)
+
+IN_LIST_RE = re.compile(r'\bIN \((?:%s, )*%s\)')
+NUMBER_RE = re.compile(r'\b\d+\b')
+SPACES_RE = re.compile(r'\s+')
+TRANSACTION_RE = re.compile(r'^(SAVEPOINT|RELEASE|ROLLBACK|BEGIN|COMMIT)\b')
+
+
+def normalize(sql):
+    """Shape of ``sql``: the same for the queries of an N+1 loop."""
+    sql = SPACES_RE.sub(' ', sql).strip()
+    sql = IN_LIST_RE.sub('IN (...)', sql)
+
+    return NUMBER_RE.sub('?', sql)
+
+
+def template_location(frame):
+    """Describe the innermost template node being rendered, if any."""
+    while frame is not None:
+        if frame.f_code is Node.render_annotated.__code__:
+            node = frame.f_locals['self']
+            token = getattr(node, 'token', None)
+            origin = getattr(node, 'origin', None)
+            if token is not None and origin is not None:
+                source = (
+                    f'{{{{ {token.contents} }}}}'
+                    if token.token_type == TokenType.VAR
+                    else f'{{% {token.contents} %}}'
+                )
+                return f"{origin.name}, ligne {token.lineno} : {source}"
+        frame = frame.f_back
+
+    return None
+
+
+def project_stack(frame):
+    """Stack lines of the project's own code, innermost last."""
+    return [
+        line for line in traceback.format_stack(frame)
+        if line.lstrip().startswith(f'File "{settings.BASE_DIR}')
+        and f'{os.sep}site-packages{os.sep}' not in line
+        and __file__ not in line
+        and 'manage.py' not in line
+    ]
+
+
+class QueryRecorder:
+
+    def __init__(self):
+        self.counts = Counter()
+        self.locations = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        if not TRANSACTION_RE.match(sql):
+            shape = normalize(sql)
+            self.counts[shape] += 1
+            if self.counts[shape] == 2:
+                frame = sys._getframe(1)
+                self.locations[shape] = (
+                    template_location(frame), project_stack(frame),
+                )
+
+        return execute(sql, params, many, context)
+
+    def repeated(self, threshold):
+        for shape, count in self.counts.most_common():
+            if count < threshold:
+                break
+            yield shape, count, self.locations[shape]
+
+
+class RepeatedQueryMiddleware:
+
+    def __init__(self, get_response):
+        # The test runner turns DEBUG off after the settings are loaded.
+        if not settings.DEBUG:
+            raise MiddlewareNotUsed
+        self.get_response = get_response
+
+    def __call__(self, request):
+        recorder = QueryRecorder()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+
+        threshold = settings.CATALOG_REPEATED_QUERY_THRESHOLD
+        for sql, count, (template, stack) in recorder.repeated(threshold):
+            logger.warning(
+                "%s requêtes similaires pour %s\n  %s\n  %s\n%s",
+                count, request.get_full_path(), sql,
+                template or "hors gabarit", ''.join(stack),
+            )
+
+        return response
@@ -0,0 +1,101 @@
+"""Streaming CSV / JSON Lines exports of the catalog and of current loans.
+
+Rows are read with ``values_list().iterator()`` (a server-side cursor on
+PostgreSQL) and encoded one by one, so no model instance is built and memory
+use stays constant whatever the size of the export. The asynchronous view
+(see ``catalog.async_views``) reads them with ``iter_row_chunks`` instead:
+each chunk is a separate keyset query, which any thread of its pool can run.
+"""
+
+import csv
+import json
+
+from .models import Book, BookInstance
+from .pagination import KeysetPaginator
+
+
+EXPORT_CHUNK_SIZE = 2000
+
+DATASETS = {
+    'books': {
+        'queryset': lambda: Book.objects.all(),
+        'ordering': ('pk',),
+        'columns': (
+            ('id', 'pk'),
+            ('isbn', 'isbn'),
+            ('title', 'title'),
+            ('author_first_name', 'author__first_name'),
+            ('author_last_name', 'author__last_name'),
+            ('language', 'language__name'),
+            ('summary', 'summary'),
+        ),
+    },
+    'loans': {
+        'queryset': lambda: BookInstance.objects.filter(status__exact='o'),
+        'ordering': ('due_back', 'uuid'),
+        'columns': (
+            ('uuid', 'uuid'),
+            ('isbn', 'book__isbn'),
+            ('title', 'book__title'),
+            ('imprint', 'imprint'),
+            ('due_back', 'due_back'),
+            ('borrower', 'borrower__username'),
+            ('borrower_email', 'borrower__email'),
+        ),
+    },
+}
+
+CONTENT_TYPES = {
+    'csv': 'text/csv; charset=utf-8',
+    'jsonl': 'application/x-ndjson; charset=utf-8',
+}
+
+
+class _Echo:
+    """File-like object returning what is written, for ``csv.writer``."""
+
+    def write(self, value):
+        return value
+
+
+def iter_rows(dataset):
+    spec = DATASETS[dataset]
+    lookups = [lookup for _, lookup in spec['columns']]
+
+    return spec['queryset']().order_by(*spec['ordering']).values_list(
+        *lookups,
+    ).iterator(chunk_size=EXPORT_CHUNK_SIZE)
+
+
+def iter_row_chunks(dataset):
+    """Yield the rows of ``dataset`` in lists, one keyset query per list."""
+    spec = DATASETS[dataset]
+    lookups = [lookup for _, lookup in spec['columns']]
+    paginator = KeysetPaginator(
+        spec['queryset']().values(*lookups), EXPORT_CHUNK_SIZE, spec['ordering'],
+    )
+
+    for chunk in paginator.chunks():
+        yield [tuple(row[lookup] for lookup in lookups) for row in chunk]
+
+
+def encoder(dataset, format):
+    """Return the lines starting the export and a function encoding a row."""
+    header = [name for name, _ in DATASETS[dataset]['columns']]
+
+    if format == 'csv':
+        writer = csv.writer(_Echo())
+        return [writer.writerow(header)], writer.writerow
+    if format == 'jsonl':
+        return [], lambda row: json.dumps(dict(zip(header, row)), default=str) + '\n'
+
+    raise ValueError(f"Unknown export format: {format}")
+
+
+def iter_export(dataset, format):
+    """Yield the export of ``dataset`` as encoded lines."""
+    lines, encode = encoder(dataset, format)
+
+    yield from lines
+    for row in iter_rows(dataset):
+        yield encode(row)
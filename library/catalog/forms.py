@@ -1,11 +1,22 @@
 import datetime
+import uuid
 
 from django import forms
+from django.contrib.auth.models import User
 from django.core.exceptions import ValidationError
 
 from .models import BookInstance
 
 
+def validate_renewal_date(value):
+    """Due dates must fall between today and 4 weeks from now."""
+    if value < datetime.date.today():
+        raise ValidationError("Date invalide - date passée")
+
+    if value > datetime.date.today() + datetime.timedelta(weeks=4):
+        raise ValidationError("Date invalide - date dans plus de 4 semaines")
+
+
 class RenewBookForm(forms.Form):
 
     renewal_date = forms.DateField(
@@ -15,14 +26,7 @@ class RenewBookForm(forms.Form):
 
     def clean_renewal_date(self):
         data = self.cleaned_data['renewal_date']
-
-        if data < datetime.date.today():
-            raise ValidationError("Date invalide - date passée")
-
-        if data > datetime.date.today() + datetime.timedelta(weeks=4):
-            raise ValidationError(
-                "Date invalide - date dans plus de 4 semaines",
-            )
+        validate_renewal_date(data)
 
         return data
 
@@ -31,12 +35,7 @@ class RenewBookModelForm(forms.ModelForm):
 
     def clean_due_back(self):
         data = self.cleaned_data['due_back']
-
-        if data < datetime.date.today():
-            raise ValidationError("Date invalide - date passée")
-
-        if data > datetime.date.today() + datetime.timedelta(weeks=4):
-            raise ValidationError("Date invalide - date dans plus de 4 semaines")
+        validate_renewal_date(data)
 
         return data
 
@@ -51,3 +50,85 @@ class RenewBookModelForm(forms.ModelForm):
         help_texts = {
             'due_back': "Entrez une date entre aujourd'hui et dans 4 semaines (3 semaines par défaut)"
         }
+
+
+class UUIDListField(forms.CharField):
+    """UUIDs separated by spaces, commas or new lines (e.g. scanned)."""
+
+    widget = forms.Textarea
+
+    def to_python(self, value):
+        value = super().to_python(value)
+        uuids = []
+        for token in value.replace(',', ' ').split():
+            try:
+                uuids.append(uuid.UUID(token))
+            except ValueError:
+                raise ValidationError(f"Identifiant d'exemplaire invalide : {token}")
+
+        return list(dict.fromkeys(uuids))
+
+
+class BulkCirculationForm(forms.Form):
+
+    ACTIONS = (
+        ('check_in', "Retour des exemplaires empruntés"),
+        ('renew', "Prolongation des emprunts"),
+        ('status', "Changement de statut"),
+    )
+    # Lending goes through the check-out, which records the borrower.
+    STATUSES = tuple(
+        (status, label) for status, label in BookInstance.LOAN_STATUS
+        if status != 'o'
+    )
+
+    action = forms.ChoiceField(
+        label="Opération",
+        choices=ACTIONS,
+    )
+    copies = UUIDListField(
+        label="Exemplaires",
+        help_text="Un identifiant (UUID) d'exemplaire par ligne",
+    )
+    due_back = forms.DateField(
+        label="Nouvelle date de retour",
+        required=False,
+        validators=[validate_renewal_date],
+        help_text="Pour une prolongation : entre aujourd'hui et dans 4 semaines",
+    )
+    status = forms.ChoiceField(
+        label="Nouveau statut",
+        choices=(('', "---------"),) + STATUSES,
+        required=False,
+    )
+
+    def clean(self):
+        cleaned_data = super().clean()
+        action = cleaned_data.get('action')
+
+        if action == 'renew' and not cleaned_data.get('due_back'):
+            self.add_error('due_back', "Indiquez la nouvelle date de retour.")
+        if action == 'status' and not cleaned_data.get('status'):
+            self.add_error('status', "Indiquez le nouveau statut.")
+
+        return cleaned_data
+
+
+class CheckOutForm(forms.Form):
+
+    borrower = forms.CharField(
+        label="Emprunteur",
+        help_text="Nom d'utilisateur du lecteur",
+    )
+    due_back = forms.DateField(
+        label="Date de retour",
+        validators=[validate_renewal_date],
+        help_text="Entrez une date entre aujourd'hui et dans 4 semaines (3 semaines par défaut)",
+    )
+
+    def clean_borrower(self):
+        username = self.cleaned_data['borrower']
+        try:
+            return User.objects.get(username=username)
+        except User.DoesNotExist:
+            raise ValidationError(f"Lecteur inconnu : {username}")
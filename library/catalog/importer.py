@@ -0,0 +1,265 @@
+"""Bulk import of books, authors and copies from CSV or JSON Lines.
+
+Each record describes one copy of a book (or only the book when ``imprint``
+is empty) with the following keys::
+
+    isbn, title, summary, author_first_name, author_last_name,
+    language, genres (separated by ";"), imprint, status, due_back, uuid
+
+Records are read as a stream and written in batches of ``bulk_create``
+inside one transaction per batch. Authors, genres and languages are resolved
+through in-memory lookup caches; books are deduplicated on their ISBN with
+one indexed query per batch, so memory use does not grow with the number of
+books imported. ``bulk_create`` bypasses the model signals, so each batch
+also updates the catalog counters and the search index itself.
+
+Copies without a ``uuid`` get one derived from their ISBN, imprint and
+position in the source, so a batch imported again (after a crash between
+its commit and the checkpoint) finds its copies already there.
+"""
+
+import csv
+import datetime
+import json
+import uuid
+from collections import Counter
+from functools import partial
+from itertools import islice
+
+from django.db import transaction
+
+from library.db.transaction import immediate_atomic
+
+from . import counters, search, stats, versions
+from .models import Author, Book, BookInstance, Genre, Language
+
+
+VALID_STATUSES = {status for status, _ in BookInstance.LOAN_STATUS}
+
+# Namespace of the copy UUIDs derived from the records (never change it).
+COPY_UUID_NAMESPACE = uuid.UUID('4b19f3b1-0a86-43ea-8f13-dc4f33db5f11')
+
+
+class CatalogImportError(Exception):
+
+    pass
+
+
+def read_records(stream, format):
+    """Yield the records of ``stream`` as dictionaries."""
+    if format == 'csv':
+        yield from csv.DictReader(stream)
+    elif format == 'jsonl':
+        for line_number, line in enumerate(stream, start=1):
+            if not line.strip():
+                continue
+            try:
+                yield json.loads(line)
+            except ValueError as error:
+                raise CatalogImportError(f"ligne {line_number} : {error}")
+    else:
+        raise CatalogImportError(f"format inconnu : {format}")
+
+
+def _clean(record, key):
+    value = record.get(key)
+
+    return str(value).strip() if value is not None else ''
+
+
+def _genres(record):
+    genres = record.get('genres') or []
+    if isinstance(genres, str):
+        genres = genres.split(';')
+
+    return [name.strip() for name in genres if name.strip()]
+
+
+class CatalogImporter:
+
+    def __init__(self, batch_size=5000):
+        self.batch_size = batch_size
+        self.authors = {
+            (first_name, last_name): pk
+            for pk, first_name, last_name
+            in Author.objects.values_list('pk', 'first_name', 'last_name').iterator()
+        }
+        self.genres = dict(Genre.objects.values_list('name', 'pk'))
+        self.languages = dict(Language.objects.values_list('name', 'pk'))
+        self.totals = Counter()
+
+    def run(self, records, start=0, on_batch=None):
+        """Import ``records``, skipping the first ``start`` ones.
+
+        ``on_batch(position, totals)`` is called after each committed batch
+        with the number of records processed so far.
+        """
+        records = iter(records)
+        position = start
+        for _ in islice(records, start):
+            pass
+
+        while True:
+            batch = list(islice(records, self.batch_size))
+            if not batch:
+                break
+
+            with immediate_atomic():
+                self.import_batch(batch, position)
+            position += len(batch)
+
+            if on_batch is not None:
+                on_batch(position, self.totals)
+
+        return self.totals
+
+    def _resolve_names(self, cache, model, names):
+        missing = {name for name in names if name and name not in cache}
+        if missing:
+            model.objects.bulk_create(model(name=name) for name in missing)
+            cache.update(
+                model.objects.filter(name__in=missing).values_list('name', 'pk')
+            )
+
+    def _resolve_authors(self, keys):
+        missing = {key for key in keys if key != ('', '') and key not in self.authors}
+        if not missing:
+            return
+
+        Author.objects.bulk_create(
+            Author(first_name=first_name, last_name=last_name)
+            for first_name, last_name in missing
+        )
+        created = Author.objects.filter(
+            last_name__in={last_name for _, last_name in missing},
+        ).values_list('pk', 'first_name', 'last_name')
+        for pk, first_name, last_name in created:
+            self.authors.setdefault((first_name, last_name), pk)
+
+        counters.increment(Author, len(missing))
+        self.totals['authors'] += len(missing)
+
+    def _resolve_books(self, records):
+        isbns = {record['isbn'] for record in records}
+        existing = dict(
+            Book.objects.filter(isbn__in=isbns).values_list('isbn', 'pk')
+        )
+
+        new_books = {}
+        for record in records:
+            isbn = record['isbn']
+            if isbn in existing or isbn in new_books:
+                continue
+            new_books[isbn] = record
+
+        if new_books:
+            Book.objects.bulk_create(
+                Book(
+                    isbn=isbn,
+                    title=record['title'],
+                    summary=record['summary'],
+                    author_id=self.authors.get(record['author']),
+                    language_id=self.languages.get(record['language']),
+                )
+                for isbn, record in new_books.items()
+            )
+            created = dict(
+                Book.objects.filter(isbn__in=new_books).values_list('isbn', 'pk')
+            )
+            existing.update(created)
+
+            Book.genre.through.objects.bulk_create(
+                Book.genre.through(book_id=created[isbn], genre_id=self.genres[name])
+                for isbn, record in new_books.items()
+                for name in record['genres']
+            )
+            counters.increment(Book, len(created))
+            search.index_books(created.values())
+            self.totals['books'] += len(created)
+
+        return existing
+
+    def _parse(self, record, index):
+        isbn = _clean(record, 'isbn')
+        if not isbn:
+            return None
+
+        due_back = _clean(record, 'due_back')
+        copy_uuid = _clean(record, 'uuid')
+        imprint = _clean(record, 'imprint')
+        status = _clean(record, 'status') or 'm'
+        if status not in VALID_STATUSES:
+            raise CatalogImportError(f"statut inconnu pour l'ISBN {isbn} : {status}")
+
+        try:
+            return {
+                'isbn': isbn,
+                'title': _clean(record, 'title'),
+                'summary': _clean(record, 'summary'),
+                'author': (
+                    _clean(record, 'author_first_name'),
+                    _clean(record, 'author_last_name'),
+                ),
+                'language': _clean(record, 'language'),
+                'genres': _genres(record),
+                'imprint': imprint,
+                'status': status,
+                'due_back': datetime.date.fromisoformat(due_back) if due_back else None,
+                'uuid': uuid.UUID(copy_uuid) if copy_uuid else uuid.uuid5(
+                    COPY_UUID_NAMESPACE, f'{isbn}:{imprint}:{index}',
+                ),
+            }
+        except ValueError as error:
+            raise CatalogImportError(f"ISBN {isbn} : {error}")
+
+    def import_batch(self, raw_records, first_index=0):
+        """Import records, the first one at ``first_index`` in the source."""
+        records = []
+        for index, raw_record in enumerate(raw_records, start=first_index):
+            record = self._parse(raw_record, index)
+            if record is None:
+                self.totals['skipped'] += 1
+            else:
+                records.append(record)
+
+        self._resolve_names(self.languages, Language, {r['language'] for r in records})
+        self._resolve_names(
+            self.genres, Genre, {name for r in records for name in r['genres']},
+        )
+        self._resolve_authors({record['author'] for record in records})
+        book_ids = self._resolve_books(records)
+
+        copies = [
+            BookInstance(
+                uuid=record['uuid'],
+                book_id=book_ids[record['isbn']],
+                imprint=record['imprint'],
+                status=record['status'],
+                due_back=record['due_back'],
+            )
+            for record in records if record['imprint']
+        ]
+        # Copies already imported by an interrupted run are left untouched.
+        existing = set(
+            BookInstance.objects.filter(
+                uuid__in=[copy.uuid for copy in copies],
+            ).values_list('uuid', flat=True)
+        )
+        copies = [copy for copy in copies if copy.uuid not in existing]
+        BookInstance.objects.bulk_create(copies)
+
+        for status, count in Counter(copy.status for copy in copies).items():
+            counters.increment(BookInstance, count, status=status)
+        self.totals['copies'] += len(copies)
+
+        touched_books = set(book_ids.values())
+        touched_authors = Book.objects.filter(
+            pk__in=touched_books,
+        ).values_list('author_id', flat=True)
+        transaction.on_commit(partial(
+            versions.bump, 'authors', 'books', 'copies',
+            *versions.for_books(touched_books),
+            *versions.for_authors(touched_authors),
+        ))
+        # Also after a batch of an import that is interrupted later.
+        transaction.on_commit(stats.invalidate_stats)
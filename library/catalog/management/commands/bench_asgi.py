@@ -0,0 +1,160 @@
+import asyncio
+import json
+import os
+import socket
+import statistics
+import subprocess
+import sys
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+SERVERS = {
+    'wsgi': ['library.wsgi:application', '--worker-class', 'sync'],
+    'asgi': [
+        'library.asgi:application',
+        '--worker-class', 'library.workers.UvicornWorker',
+    ],
+}
+
+
+def _wait_for_port(port, timeout):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        try:
+            socket.create_connection(('127.0.0.1', port), timeout=1).close()
+            return True
+        except OSError:
+            time.sleep(0.2)
+
+    return False
+
+
+async def _fetch(port, path):
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    try:
+        writer.write(
+            f'GET {path} HTTP/1.1\r\nHost: localhost\r\n'
+            f'Connection: close\r\n\r\n'.encode()
+        )
+        await writer.drain()
+        response = await reader.read()
+    finally:
+        writer.close()
+
+    return int(response.split(b' ', 2)[1])
+
+
+async def _load(port, paths, concurrency, total):
+    """Send ``total`` requests from ``concurrency`` clients at once."""
+    latencies = []
+    errors = 0
+    remaining = total
+
+    async def client(client_id):
+        nonlocal errors, remaining
+        while remaining > 0:
+            remaining -= 1
+            path = paths[remaining % len(paths)]
+            started = time.perf_counter()
+            try:
+                status = await _fetch(port, path)
+            except (OSError, IndexError, ValueError):
+                status = None
+            if status == 200:
+                latencies.append(time.perf_counter() - started)
+            else:
+                errors += 1
+
+    started = time.perf_counter()
+    await asyncio.gather(*(client(i) for i in range(concurrency)))
+    elapsed = time.perf_counter() - started
+
+    latencies.sort()
+
+    def percentile(rank):
+        if not latencies:
+            return None
+        return round(latencies[int(rank * (len(latencies) - 1))] * 1000, 1)
+
+    return {
+        'requests': total,
+        'errors': errors,
+        'throughput': round(len(latencies) / elapsed, 1),
+        'mean_ms': round(statistics.mean(latencies) * 1000, 1) if latencies else None,
+        'p50_ms': percentile(0.5),
+        'p95_ms': percentile(0.95),
+        'p99_ms': percentile(0.99),
+    }
+
+
+class Command(BaseCommand):
+    help = (
+        "Compare the throughput of the catalog pages served over WSGI "
+        "(gunicorn sync workers) and ASGI (uvicorn workers, async views) "
+        "at several numbers of concurrent clients."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help="Page à charger (répétable ; accueil et listes par défaut).",
+        )
+        parser.add_argument(
+            '--concurrency', type=int, nargs='+', default=[100, 1000],
+        )
+        parser.add_argument('--requests', type=int, default=2000)
+        parser.add_argument('--workers', type=int, default=2)
+        parser.add_argument('--port', type=int, default=8765)
+        parser.add_argument(
+            '--server', choices=sorted(SERVERS), action='append', dest='servers',
+        )
+        parser.add_argument('--json', action='store_true', help="Rapport JSON.")
+
+    def run_server(self, server, options):
+        port = options['port']
+        command = [
+            sys.executable, '-c', 'from gunicorn.app.wsgiapp import run; run()',
+            *SERVERS[server],
+            '--workers', str(options['workers']),
+            '--bind', f'127.0.0.1:{port}',
+            '--backlog', '2048',
+            '--log-level', 'warning',
+        ]
+        env = {**os.environ, 'DJANGO_DEBUG': 'False'}
+        process = subprocess.Popen(command, cwd=settings.BASE_DIR, env=env)
+        if not _wait_for_port(port, timeout=30):
+            process.terminate()
+            raise CommandError(f"Le serveur {server} n'a pas démarré.")
+
+        return process
+
+    def handle(self, *args, **options):
+        paths = options['paths'] or ['/catalog/', '/catalog/books/', '/catalog/authors/']
+        report = {}
+
+        for server in options['servers'] or sorted(SERVERS, reverse=True):
+            process = self.run_server(server, options)
+            try:
+                # Warm the workers (imports, caches, connections).
+                asyncio.run(_load(options['port'], paths, 10, 100))
+                for concurrency in options['concurrency']:
+                    result = asyncio.run(_load(
+                        options['port'], paths, concurrency, options['requests'],
+                    ))
+                    report.setdefault(server, {})[concurrency] = result
+                    if not options['json']:
+                        self.stdout.write(
+                            f"{server} - {concurrency} clients : "
+                            f"{result['throughput']} req/s, "
+                            f"p50 {result['p50_ms']} ms, p95 {result['p95_ms']} ms, "
+                            f"{result['errors']} erreurs"
+                        )
+            finally:
+                process.terminate()
+                process.wait()
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
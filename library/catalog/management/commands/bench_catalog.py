@@ -0,0 +1,251 @@
+import json
+import resource
+import statistics
+import time
+import tracemalloc
+
+from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.test import Client
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog import counters, urls, visits
+from catalog.models import Author, Book, BookInstance
+
+
+def _sample_kwargs():
+    """URL arguments and query string of every catalog route.
+
+    Seeded popularity is skewed towards the first rows, so the first author
+    and book are the busiest ones.
+    """
+    author = Author.objects.order_by('pk').values_list('pk', flat=True).first()
+    book = Book.objects.order_by('pk').values_list('pk', flat=True).first()
+    copy = BookInstance.objects.filter(status='o').values_list('uuid', flat=True).first()
+    if author is None or book is None or copy is None:
+        raise CommandError(
+            "Catalogue vide : lancez d'abord seed_catalog (il faut au moins "
+            "un auteur, un livre et un exemplaire emprunté)."
+        )
+
+    return {
+        'index': ({}, ''),
+        'authors': ({}, ''),
+        'books': ({}, ''),
+        'all_borrowed': ({}, ''),
+        'bulk_circulation': ({}, ''),
+        'search': ({}, '?q=jardin perdu'),
+        'export': ({'dataset': 'books', 'format': 'csv'}, ''),
+        'author_detail': ({'pk': author}, ''),
+        'author_create': ({}, ''),
+        'author_update': ({'pk': author}, ''),
+        'author_delete': ({'pk': author}, ''),
+        'book_detail': ({'pk': book}, ''),
+        'renew_book_librarian': ({'pk': copy}, ''),
+        'check_out_book': ({'pk': book}, ''),
+        'reserve_book': ({'pk': book}, ''),
+        'book_create': ({}, ''),
+        'book_update': ({'pk': book}, ''),
+        'book_delete': ({'pk': book}, ''),
+        'api_book_availability': ({'pk': book}, ''),
+        'api_list': ({'resource_name': 'books'}, ''),
+        'api_detail': ({'resource_name': 'books', 'pk': book}, ''),
+        'my_borrowed': ({}, ''),
+    }
+
+
+def _percentile(values, rank):
+    return round(values[int(rank * (len(values) - 1))] * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Request every route of catalog/urls.py through the test client as "
+        "a librarian and report latency percentiles, SQL queries and peak "
+        "memory per route as JSON. With --baseline, exit with an error when "
+        "a route is slower, makes more queries or uses more memory than in "
+        "a previous report. Run it on a seeded catalog (see seed_catalog)."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--requests', type=int, default=20)
+        parser.add_argument(
+            '--route', action='append', dest='routes',
+            help="Nom d'URL à mesurer (répétable ; toutes par défaut).",
+        )
+        parser.add_argument(
+            '--exclude', action='append', default=[],
+            help="Nom d'URL à ignorer (répétable).",
+        )
+        parser.add_argument(
+            '--cold', action='store_true',
+            help="Vider le cache avant chaque requête.",
+        )
+        parser.add_argument('--save', help="Fichier où enregistrer le rapport.")
+        parser.add_argument('--baseline', help="Rapport de référence à comparer.")
+        parser.add_argument(
+            '--tolerance', type=float, default=0.25,
+            help="Marge de dégradation admise (0.25 : 25 %%).",
+        )
+        parser.add_argument(
+            '--min-delta-ms', type=float, default=5,
+            help="Écart de latence ignoré, quelle que soit la marge.",
+        )
+
+    def routes(self, options):
+        samples = _sample_kwargs()
+        names = [pattern.name for pattern in urls.urlpatterns]
+
+        missing = [name for name in names if name not in samples]
+        if missing:
+            raise CommandError(f"Routes sans exemple : {', '.join(missing)}")
+
+        unknown = set(options['routes'] or []) - set(names)
+        if unknown:
+            raise CommandError(f"Routes inconnues : {', '.join(sorted(unknown))}")
+
+        for name in options['routes'] or names:
+            if name not in options['exclude']:
+                kwargs, query = samples[name]
+                yield name, reverse(name, kwargs=kwargs) + query
+
+    def fetch(self, client, path, cold):
+        if cold:
+            cache.clear()
+
+        # Streamed responses (exports) query the database while consumed.
+        with CaptureQueriesContext(connection) as queries:
+            started = time.perf_counter()
+            response = client.get(path)
+            if response.streaming:
+                for _ in response.streaming_content:
+                    pass
+            elapsed = time.perf_counter() - started
+
+        return response.status_code, elapsed, len(queries)
+
+    def measure(self, client, path, options):
+        # Warm up: imports, template loading, connections and caches.
+        status, _, _ = self.fetch(client, path, options['cold'])
+
+        latencies = []
+        queries = []
+        for _ in range(options['requests']):
+            status, elapsed, count = self.fetch(client, path, options['cold'])
+            latencies.append(elapsed)
+            queries.append(count)
+
+        tracemalloc.start()
+        try:
+            self.fetch(client, path, options['cold'])
+            _, peak = tracemalloc.get_traced_memory()
+        finally:
+            tracemalloc.stop()
+
+        latencies.sort()
+
+        return {
+            'path': path,
+            'status': status,
+            'mean_ms': round(statistics.mean(latencies) * 1000, 1),
+            'p50_ms': _percentile(latencies, 0.5),
+            'p95_ms': _percentile(latencies, 0.95),
+            'p99_ms': _percentile(latencies, 0.99),
+            'queries': max(queries),
+            'peak_memory_kb': peak // 1024,
+        }
+
+    def compare(self, report, baseline, options):
+        """Return the regressions of ``report`` against ``baseline``."""
+        regressions = []
+        tolerance = 1 + options['tolerance']
+
+        for name, result in report['routes'].items():
+            reference = baseline['routes'].get(name)
+            if reference is None:
+                continue
+
+            if (
+                result['p95_ms'] > reference['p95_ms'] * tolerance
+                and result['p95_ms'] - reference['p95_ms'] > options['min_delta_ms']
+            ):
+                regressions.append(
+                    f"{name} : p95 {result['p95_ms']} ms (référence {reference['p95_ms']} ms)"
+                )
+            if result['queries'] > reference['queries']:
+                regressions.append(
+                    f"{name} : {result['queries']} requêtes SQL "
+                    f"(référence {reference['queries']})"
+                )
+            if result['peak_memory_kb'] > reference['peak_memory_kb'] * tolerance:
+                regressions.append(
+                    f"{name} : pic mémoire {result['peak_memory_kb']} Ko "
+                    f"(référence {reference['peak_memory_kb']} Ko)"
+                )
+            if result['status'] != reference['status']:
+                regressions.append(
+                    f"{name} : statut {result['status']} (référence {reference['status']})"
+                )
+
+        return regressions
+
+    def handle(self, *args, **options):
+        if options['requests'] < 1:
+            raise CommandError("--requests doit valoir au moins 1.")
+
+        baseline = None
+        if options['baseline']:
+            with open(options['baseline']) as baseline_file:
+                baseline = json.load(baseline_file)
+            if baseline['cold'] != options['cold']:
+                raise CommandError(
+                    "La référence a été mesurée avec un autre --cold."
+                )
+
+        routes = list(self.routes(options))
+        librarian = User.objects.create_superuser(
+            username=f'bench_catalog_{time.time_ns()}', email='', password=None,
+        )
+        try:
+            client = Client(SERVER_NAME='localhost')
+            client.force_login(librarian)
+
+            report = {
+                'catalog': counters.read_totals(),
+                'requests': options['requests'],
+                'cold': options['cold'],
+                'routes': {},
+            }
+            for name, path in routes:
+                result = self.measure(client, path, options)
+                report['routes'][name] = result
+                if options['verbosity'] > 1:
+                    self.stderr.write(
+                        f"{name} : p95 {result['p95_ms']} ms, "
+                        f"{result['queries']} requêtes"
+                    )
+        finally:
+            # Write the buffered visits of the librarian before deleting it.
+            visits.buffer.flush()
+            librarian.delete()
+
+        # ru_maxrss is in kilobytes on Linux.
+        report['max_rss_kb'] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+        output = json.dumps(report, indent=2)
+        if options['save']:
+            with open(options['save'], 'w') as report_file:
+                report_file.write(output + '\n')
+        self.stdout.write(output)
+
+        if baseline is not None:
+            regressions = self.compare(report, baseline, options)
+            if regressions:
+                raise CommandError(
+                    "Régressions par rapport à la référence :\n"
+                    + "\n".join(regressions)
+                )
+            self.stderr.write(self.style.SUCCESS("Aucune régression."))
@@ -0,0 +1,170 @@
+import json
+import threading
+import time
+
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connection, transaction
+
+from catalog import circulation
+from catalog.models import Book, BookInstance
+
+
+def naive_check_out_any(book_id, borrower, due_back=None):
+    """Read-modify-write check-out, as done with ``save()``: for comparison."""
+    copy = BookInstance.objects.filter(book_id=book_id, status='a').first()
+    if copy is None:
+        return None
+
+    copy.status = 'o'
+    copy.borrower = borrower
+    copy.due_back = due_back or circulation.default_renewal_date()
+    copy.save()
+
+    return copy.uuid
+
+
+STRATEGIES = {
+    'cas': circulation.check_out_any,
+    'naive': naive_check_out_any,
+}
+
+
+class Contention:
+    """Totals shared by the threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.loans = 0
+        self.unavailable = 0
+        self.double_loans = 0
+        self.errors = 0
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def _borrow_and_return(check_out_any, book_id, borrower, operations, state):
+    try:
+        for _ in range(operations):
+            try:
+                copy_id = check_out_any(book_id, borrower)
+            except OperationalError:  # e.g. SQLite "database is locked"
+                state.count('errors')
+                continue
+            if copy_id is None:
+                state.count('unavailable')
+                continue
+
+            state.count('loans')
+            while True:
+                try:
+                    returned = circulation.check_in([copy_id])
+                    break
+                except OperationalError:
+                    state.count('errors')
+            # Only the holder of a loan returns it: if the copy is already
+            # back, another thread was lent the same copy at the same time.
+            if not returned:
+                state.count('double_loans')
+    finally:
+        connection.close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Lend and return the few copies of a scratch book from many threads "
+        "at once, and report the check-out throughput and any copy lent "
+        "twice. The scratch book is deleted afterwards."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--copies', type=int, default=5)
+        parser.add_argument(
+            '--threads', type=int, nargs='+', default=[1, 2, 4, 8, 16],
+        )
+        parser.add_argument(
+            '--operations', type=int, default=200,
+            help="Tentatives d'emprunt par thread.",
+        )
+        parser.add_argument(
+            '--strategy', choices=sorted(STRATEGIES), action='append',
+            dest='strategies',
+        )
+        parser.add_argument('--json', action='store_true', help="Rapport JSON.")
+
+    def setup(self, nb_of_copies):
+        with transaction.atomic():
+            book = Book.objects.create(
+                title="bench_checkout", summary="-", isbn="0000000000000",
+            )
+            for copy_id in range(nb_of_copies):
+                BookInstance.objects.create(
+                    book=book, imprint=f"BENCH{copy_id}", status='a',
+                )
+            borrower, _ = User.objects.get_or_create(username='bench_checkout')
+
+        return book, borrower
+
+    def teardown(self, book, borrower):
+        with transaction.atomic():
+            for copy in BookInstance.objects.filter(book=book):
+                copy.delete()
+            book.delete()
+            borrower.delete()
+
+    def run(self, strategy, book, borrower, nb_of_threads, operations):
+        state = Contention()
+        threads = [
+            threading.Thread(target=_borrow_and_return, args=(
+                STRATEGIES[strategy], book.pk, borrower, operations, state,
+            ))
+            for _ in range(nb_of_threads)
+        ]
+
+        started = time.perf_counter()
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        elapsed = time.perf_counter() - started
+
+        on_loan = BookInstance.objects.filter(book=book).exclude(status='a').count()
+
+        return {
+            'loans': state.loans,
+            'unavailable': state.unavailable,
+            'double_loans': state.double_loans,
+            'errors': state.errors,
+            'left_on_loan': on_loan,
+            'throughput': round(state.loans / elapsed, 1),
+        }
+
+    def handle(self, *args, **options):
+        if options['copies'] < 1:
+            raise CommandError("Il faut au moins un exemplaire.")
+
+        report = {}
+        book, borrower = self.setup(options['copies'])
+        try:
+            for strategy in options['strategies'] or ['cas']:
+                for nb_of_threads in options['threads']:
+                    result = self.run(
+                        strategy, book, borrower, nb_of_threads,
+                        options['operations'],
+                    )
+                    report.setdefault(strategy, {})[nb_of_threads] = result
+                    if not options['json']:
+                        self.stdout.write(
+                            f"{strategy} - {nb_of_threads} threads : "
+                            f"{result['throughput']} emprunts/s, "
+                            f"{result['double_loans']} doubles emprunts, "
+                            f"{result['unavailable']} sans exemplaire, "
+                            f"{result['errors']} erreurs"
+                        )
+        finally:
+            self.teardown(book, borrower)
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
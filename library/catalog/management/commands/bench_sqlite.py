@@ -0,0 +1,153 @@
+import json
+import os
+import random
+import tempfile
+import threading
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import OperationalError, connections
+
+from library.db.transaction import immediate_atomic
+
+
+BACKENDS = {
+    'stock': 'django.db.backends.sqlite3',
+    'tuned': 'library.db.sqlite3',
+}
+
+
+class Throughput:
+    """Totals shared by the threads."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.reads = 0
+        self.writes = 0
+        self.errors = 0
+
+    def count(self, name):
+        with self.lock:
+            setattr(self, name, getattr(self, name) + 1)
+
+
+def _read(alias, row):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(
+            "SELECT id, title, due_back FROM bench WHERE id BETWEEN %s AND %s",
+            [row, row + 20],
+        )
+        cursor.fetchall()
+
+
+def _write(alias, row):
+    # Read then write in one transaction, as a renewal or a session save.
+    with immediate_atomic(using=alias), connections[alias].cursor() as cursor:
+        cursor.execute("SELECT due_back FROM bench WHERE id = %s", [row])
+        due_back, = cursor.fetchone()
+        cursor.execute(
+            "UPDATE bench SET due_back = %s WHERE id = %s", [due_back + 1, row],
+        )
+
+
+def _work(operation, alias, rows, deadline, state):
+    rng = random.Random()
+    try:
+        while time.perf_counter() < deadline:
+            try:
+                operation(alias, rng.randrange(rows))
+            except OperationalError:  # "database is locked"
+                state.count('errors')
+                continue
+            state.count('reads' if operation is _read else 'writes')
+    finally:
+        connections[alias].close()
+
+
+class Command(BaseCommand):
+    help = (
+        "Run reader and writer threads against a scratch SQLite database, "
+        "with Django's SQLite backend and with library.db.sqlite3 (WAL, "
+        "pragmas, BEGIN IMMEDIATE), and report reads and writes per second "
+        "and \"database is locked\" errors for each."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--readers', type=int, default=4)
+        parser.add_argument('--writers', type=int, default=4)
+        parser.add_argument('--seconds', type=float, default=5)
+        parser.add_argument('--rows', type=int, default=10000)
+        parser.add_argument(
+            '--backend', choices=sorted(BACKENDS), action='append',
+            dest='backends',
+        )
+        parser.add_argument('--json', action='store_true', help="Rapport JSON.")
+
+    def setup(self, alias, rows):
+        with connections[alias].cursor() as cursor:
+            cursor.execute(
+                "CREATE TABLE bench "
+                "(id INTEGER PRIMARY KEY, title TEXT NOT NULL, due_back INTEGER NOT NULL)"
+            )
+            cursor.executemany(
+                "INSERT INTO bench (id, title, due_back) VALUES (%s, %s, %s)",
+                [(row, f"Livre {row}", 0) for row in range(rows + 20)],
+            )
+
+    def run(self, backend, directory, options):
+        alias = f'bench_sqlite_{backend}'
+        connections.databases[alias] = {
+            'ENGINE': BACKENDS[backend],
+            'NAME': os.path.join(directory, f'{backend}.sqlite3'),
+        }
+        try:
+            self.setup(alias, options['rows'])
+            connections[alias].close()
+
+            state = Throughput()
+            deadline = time.perf_counter() + options['seconds']
+            threads = [
+                threading.Thread(target=_work, args=(
+                    operation, alias, options['rows'], deadline, state,
+                ))
+                for operation, count in (
+                    (_read, options['readers']), (_write, options['writers']),
+                )
+                for _ in range(count)
+            ]
+            started = time.perf_counter()
+            for thread in threads:
+                thread.start()
+            for thread in threads:
+                thread.join()
+            elapsed = time.perf_counter() - started
+        finally:
+            connections[alias].close()
+            del connections[alias]
+            del connections.databases[alias]
+
+        return {
+            'reads_per_second': round(state.reads / elapsed, 1),
+            'writes_per_second': round(state.writes / elapsed, 1),
+            'errors': state.errors,
+        }
+
+    def handle(self, *args, **options):
+        if options['readers'] < 0 or options['writers'] < 0 or options['rows'] < 1:
+            raise CommandError(
+                "--readers et --writers ne peuvent être négatifs, --rows doit valoir au moins 1."
+            )
+
+        report = {}
+        with tempfile.TemporaryDirectory() as directory:
+            for backend in options['backends'] or ['stock', 'tuned']:
+                result = report[backend] = self.run(backend, directory, options)
+                if not options['json']:
+                    self.stdout.write(
+                        f"{backend} : {result['reads_per_second']} lectures/s, "
+                        f"{result['writes_per_second']} écritures/s, "
+                        f"{result['errors']} erreurs"
+                    )
+
+        if options['json']:
+            self.stdout.write(json.dumps(report, indent=2))
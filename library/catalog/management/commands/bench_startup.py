@@ -0,0 +1,106 @@
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+
+# Run in a fresh interpreter, as a gunicorn worker would: load the WSGI
+# application, optionally build the URL resolver and compile the templates,
+# then request each path twice. Printed as JSON on the last line of the
+# output.
+CHILD = '''
+import json, sys, time
+from wsgiref.util import setup_testing_defaults
+
+started = time.perf_counter()
+from library.wsgi import application
+setup = time.perf_counter() - started
+
+warm_up = 0
+if sys.argv[1] == 'warm':
+    from catalog.warmup import warm_up_templates, warm_up_urls
+    started = time.perf_counter()
+    warm_up_urls()
+    warm_up_templates()
+    warm_up = time.perf_counter() - started
+
+def get(path):
+    environ = {'PATH_INFO': path, 'HTTP_HOST': 'localhost'}
+    setup_testing_defaults(environ)
+    statuses = []
+    response = application(environ, lambda status, headers: statuses.append(status))
+    b''.join(response)
+    response.close()
+    return statuses[0]
+
+requests = {}
+for path in sys.argv[2:]:
+    timings = []
+    for _ in range(2):
+        started = time.perf_counter()
+        status = get(path)
+        timings.append(time.perf_counter() - started)
+    if not status.startswith('200'):
+        sys.exit(f"{path} : statut {status}")
+    requests[path] = timings
+
+print(json.dumps({'setup': setup, 'warm_up': warm_up, 'requests': requests}))
+'''
+
+
+def _median_ms(values):
+    return round(statistics.median(values) * 1000, 1)
+
+
+class Command(BaseCommand):
+    help = (
+        "Start the WSGI application in fresh processes, with DEBUG off, and "
+        "report as JSON the median setup time and the latency of the first "
+        "and second requests to each path, without and with the URL and "
+        "template warm-up that gunicorn.conf.py runs before forking its "
+        "workers."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--runs', type=int, default=5)
+        parser.add_argument(
+            '--path', action='append', dest='paths',
+            help="Chemin à demander (répétable ; /catalog/ et /catalog/books/ par défaut).",
+        )
+
+    def run_child(self, mode, paths):
+        env = dict(os.environ, DJANGO_DEBUG='False')
+        result = subprocess.run(
+            [sys.executable, '-c', CHILD, mode, *paths],
+            cwd=settings.BASE_DIR, env=env, capture_output=True, text=True,
+        )
+        if result.returncode:
+            raise CommandError(result.stderr.strip().splitlines()[-1])
+
+        return json.loads(result.stdout.splitlines()[-1])
+
+    def handle(self, *args, **options):
+        if options['runs'] < 1:
+            raise CommandError("--runs doit valoir au moins 1.")
+        paths = options['paths'] or ['/catalog/', '/catalog/books/']
+
+        report = {'runs': options['runs']}
+        for mode in ('cold', 'warm'):
+            runs = [self.run_child(mode, paths) for _ in range(options['runs'])]
+            report[mode] = {
+                'setup_ms': _median_ms([run['setup'] for run in runs]),
+                'warm_up_ms': _median_ms([run['warm_up'] for run in runs]),
+                'requests': {
+                    path: {
+                        'first_ms': _median_ms([run['requests'][path][0] for run in runs]),
+                        'second_ms': _median_ms([run['requests'][path][1] for run in runs]),
+                    }
+                    for path in paths
+                },
+            }
+
+        self.stdout.write(json.dumps(report, indent=2))
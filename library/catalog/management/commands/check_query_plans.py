@@ -0,0 +1,33 @@
+from django.contrib.auth.models import User
+from django.core.management.base import BaseCommand, CommandError
+from django.test import RequestFactory
+
+from catalog import query_plans
+
+
+def sample_request():
+    """GET request by an unsaved, logged-in user, as the views receive it."""
+    request = RequestFactory().get('/')
+    request.user = User(pk=1)
+
+    return request
+
+
+class Command(BaseCommand):
+    help = (
+        "Run EXPLAIN on the querysets of the catalog views and fail if one "
+        "of them scans a whole table or sorts in a temporary structure."
+    )
+
+    def handle(self, *args, **options):
+        report = query_plans.check_views(sample_request())
+
+        for label, problems in report.items():
+            self.stderr.write(f"{label} :")
+            for line in problems:
+                self.stderr.write(f"    {line}")
+
+        if report:
+            raise CommandError(f"{len(report)} requête(s) sans index adapté.")
+
+        self.stdout.write(self.style.SUCCESS("Toutes les requêtes utilisent un index."))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+
+from catalog import exports
+
+
+class Command(BaseCommand):
+    help = "Export the catalog or the current loans as CSV or JSON Lines."
+
+    def add_arguments(self, parser):
+        parser.add_argument('dataset', choices=sorted(exports.DATASETS))
+        parser.add_argument(
+            '--format', choices=sorted(exports.CONTENT_TYPES), default='csv',
+        )
+        parser.add_argument(
+            '--output', '-o',
+            help="Fichier de sortie (sortie standard par défaut).",
+        )
+
+    def handle(self, *args, **options):
+        lines = exports.iter_export(options['dataset'], options['format'])
+
+        if options['output']:
+            with open(options['output'], 'w', newline='', encoding='utf-8') as output:
+                output.writelines(lines)
+        else:
+            for line in lines:
+                self.stdout.write(line, ending='')
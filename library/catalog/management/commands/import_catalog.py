@@ -0,0 +1,80 @@
+import os
+import sys
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.importer import CatalogImporter, CatalogImportError, read_records
+
+
+class Command(BaseCommand):
+    help = (
+        "Import books, authors and copies from a CSV or JSON Lines file. "
+        "Records are written in batches, one transaction per batch; with "
+        "--checkpoint, an interrupted import can be resumed with --resume."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help="Fichier à importer ('-' pour l'entrée standard).")
+        parser.add_argument(
+            '--format', choices=['csv', 'jsonl'],
+            help="Format du fichier (déduit de l'extension par défaut).",
+        )
+        parser.add_argument('--batch-size', type=int, default=5000)
+        parser.add_argument(
+            '--checkpoint',
+            help="Fichier où enregistrer le nombre d'enregistrements importés.",
+        )
+        parser.add_argument(
+            '--resume', action='store_true',
+            help="Reprendre après le dernier lot enregistré dans --checkpoint.",
+        )
+        parser.add_argument(
+            '--start', type=int, default=0,
+            help="Ignorer les N premiers enregistrements.",
+        )
+
+    def handle(self, *args, **options):
+        path = options['path']
+        format = options['format'] or ('jsonl' if path.endswith('.jsonl') else 'csv')
+        checkpoint = options['checkpoint']
+
+        start = options['start']
+        if options['resume']:
+            if not checkpoint:
+                raise CommandError("--resume nécessite --checkpoint.")
+            if os.path.exists(checkpoint):
+                with open(checkpoint) as checkpoint_file:
+                    start = int(checkpoint_file.read().strip() or 0)
+                self.stdout.write(f"Reprise après {start} enregistrements.")
+
+        started_at = time.monotonic()
+
+        def on_batch(position, totals):
+            if checkpoint:
+                with open(checkpoint, 'w') as checkpoint_file:
+                    checkpoint_file.write(str(position))
+
+            elapsed = time.monotonic() - started_at
+            rate = (position - start) / elapsed if elapsed else 0
+            self.stdout.write(
+                f"{position} enregistrements ({rate:.0f}/s) - "
+                f"{totals['authors']} auteurs, {totals['books']} livres, "
+                f"{totals['copies']} exemplaires créés"
+            )
+
+        importer = CatalogImporter(batch_size=options['batch_size'])
+        stream = sys.stdin if path == '-' else open(path, newline='', encoding='utf-8')
+        try:
+            totals = importer.run(read_records(stream, format), start, on_batch)
+        except CatalogImportError as error:
+            raise CommandError(f"Import interrompu : {error}")
+        finally:
+            if stream is not sys.stdin:
+                stream.close()
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Import terminé : {totals['books']} livres, "
+            f"{totals['copies']} exemplaires, "
+            f"{totals['skipped']} enregistrements ignorés."
+        ))
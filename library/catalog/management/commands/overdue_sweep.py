@@ -0,0 +1,48 @@
+import datetime
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog import overdue
+
+
+class Command(BaseCommand):
+    help = (
+        "Send a reminder to the borrower of every overdue copy. Reminders "
+        "already sent for the current due date are skipped, so the command "
+        "can be run as often as needed."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--chunk-size', type=int, default=500)
+        parser.add_argument(
+            '--date',
+            help="Date de référence (AAAA-MM-JJ, aujourd'hui par défaut).",
+        )
+        parser.add_argument(
+            '--dry-run', action='store_true',
+            help="Compter les relances sans les envoyer.",
+        )
+
+    def handle(self, *args, **options):
+        if options['chunk_size'] < 1:
+            raise CommandError("--chunk-size doit valoir au moins 1.")
+
+        today = None
+        if options['date']:
+            try:
+                today = datetime.date.fromisoformat(options['date'])
+            except ValueError:
+                raise CommandError(f"Date invalide : {options['date']}")
+
+        def on_chunk(sent):
+            if options['verbosity'] > 1:
+                self.stdout.write(f"{sent} relances traitées")
+
+        sent = overdue.sweep(
+            today, options['chunk_size'], options['dry_run'], on_chunk,
+        )
+
+        if options['dry_run']:
+            self.stdout.write(f"{sent} relances à envoyer.")
+        else:
+            self.stdout.write(self.style.SUCCESS(f"{sent} relances envoyées."))
@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from catalog import search
+
+
+class Command(BaseCommand):
+    help = "Rebuild the full-text search index of the catalog."
+
+    def handle(self, *args, **options):
+        with transaction.atomic():
+            search.rebuild_index()
+
+        self.stdout.write(self.style.SUCCESS("Index de recherche reconstruit."))
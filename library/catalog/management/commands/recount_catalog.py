@@ -0,0 +1,17 @@
+from django.core.management.base import BaseCommand
+
+from catalog import counters, stats
+
+
+class Command(BaseCommand):
+    help = "Rebuild the catalog counters from the authors, books and copies tables."
+
+    def handle(self, *args, **options):
+        counts = counters.recount()
+        stats.invalidate_stats()
+
+        for (entity, status), count in sorted(counts.items()):
+            label = f"{entity}[{status}]" if status else entity
+            self.stdout.write(f"{label}: {count}")
+
+        self.stdout.write(self.style.SUCCESS("Compteurs recalculés."))
@@ -0,0 +1,61 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+
+from catalog.seeding import CatalogSeeder
+
+
+class Command(BaseCommand):
+    help = (
+        "Add synthetic authors, books and copies to the catalog, with skewed "
+        "popularity, for load tests (e.g. --authors 100000 --books 1000000 "
+        "--copies 5000000). Rows are inserted in batches with raw "
+        "executemany calls; counters and the search index are rebuilt at "
+        "the end."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument('--authors', type=int, default=1000)
+        parser.add_argument('--books', type=int, default=10000)
+        parser.add_argument('--copies', type=int, default=50000)
+        parser.add_argument(
+            '--readers', type=int, default=100,
+            help="Lecteurs créés pour les emprunts et réservations.",
+        )
+        parser.add_argument('--batch-size', type=int, default=10000)
+        parser.add_argument(
+            '--skew', type=float, default=3,
+            help="Concentration de la popularité (1 : uniforme).",
+        )
+        parser.add_argument(
+            '--seed', type=int,
+            help="Graine aléatoire, pour reproduire le même jeu de données.",
+        )
+
+    def handle(self, *args, **options):
+        if options['batch_size'] < 1 or options['skew'] < 1:
+            raise CommandError("--batch-size et --skew doivent valoir au moins 1.")
+
+        started_at = time.monotonic()
+
+        def on_batch(name, totals):
+            if options['verbosity'] > 1:
+                elapsed = time.monotonic() - started_at
+                self.stdout.write(f"{name} : {totals[name]} ({elapsed:.0f} s)")
+
+        seeder = CatalogSeeder(
+            options['seed'], options['batch_size'], options['skew'], on_batch,
+        )
+        try:
+            totals = seeder.run(
+                options['authors'], options['books'], options['copies'],
+                options['readers'],
+            )
+        except ValueError as error:
+            raise CommandError(str(error))
+
+        elapsed = time.monotonic() - started_at
+        self.stdout.write(self.style.SUCCESS(
+            f"{totals['author']} auteurs, {totals['book']} livres, "
+            f"{totals['bookinstance']} exemplaires créés en {elapsed:.0f} s."
+        ))
@@ -0,0 +1,416 @@
+"""Per-request latency, SQL and template timings.
+
+``MetricsMiddleware`` measures every request: total latency, number and
+duration of SQL queries (through an execute wrapper installed on every
+connection, see ``connection.execute_wrapper()``) and time
+spent rendering templates (through the ``DjangoTemplates`` backend below,
+which times top-level renders only, so included and extended templates
+are not counted twice). The figures are sent back in a ``Server-Timing``
+header, visible in the browser developer tools, and aggregated per view
+in histograms served in the Prometheus text format by ``metrics_view``,
+with the statistics of the connection pools (see ``library.db.pool``).
+
+The histograms live in the memory of each process. With several workers,
+set ``CATALOG_METRICS_DIR`` (the gunicorn configurations do) to a directory
+shared by the workers of one server: each worker writes its figures there,
+at most every ``SNAPSHOT_INTERVAL`` seconds and when it exits, and a scrape
+adds up the files of every worker, so it no longer depends on the worker
+that answers it. Files of exited workers are kept so that the counts never
+go backwards; their pool gauges are zeroed on exit (but not if the worker is
+killed). Recording costs two clock reads per query and a few dictionary
+updates per request.
+"""
+
+import asyncio
+import contextvars
+import hmac
+import json
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left
+
+from django.conf import settings
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+from django.http import HttpResponse, HttpResponseForbidden
+from django.template.backends import django as django_backend
+
+from library.db.pool import all_pools
+
+
+logger = logging.getLogger(__name__)
+
+DURATION_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100, 200)
+
+
+class Histogram:
+    """Prometheus histogram with a ``view`` label."""
+
+    def __init__(self, name, documentation, buckets):
+        self.name = name
+        self.documentation = documentation
+        self.buckets = buckets
+        self.lock = threading.Lock()
+        self.values = {}
+
+    def observe(self, view, value):
+        index = bisect_left(self.buckets, value)
+        with self.lock:
+            counts, total = self.values.get(view) or (
+                [0] * (len(self.buckets) + 1), 0,
+            )
+            counts[index] += 1
+            self.values[view] = (counts, total + value)
+
+    def snapshot(self):
+        """``{view: [bucket counts, total]}``, as stored in the snapshots."""
+        with self.lock:
+            return {
+                view: [list(counts), total]
+                for view, (counts, total) in self.values.items()
+            }
+
+    def expose(self, values=None):
+        """Text format of ``values`` (this process's own by default)."""
+        if values is None:
+            values = self.snapshot()
+        lines = [
+            f'# HELP {self.name} {self.documentation}',
+            f'# TYPE {self.name} histogram',
+        ]
+
+        for view, (counts, total) in sorted(values.items()):
+            label = view.replace('\\', '\\\\').replace('"', '\\"')
+            cumulative = 0
+            for bound, count in zip((*self.buckets, '+Inf'), counts):
+                cumulative += count
+                lines.append(
+                    f'{self.name}_bucket{{view="{label}",le="{bound}"}} {cumulative}'
+                )
+            lines.append(f'{self.name}_sum{{view="{label}"}} {total}')
+            lines.append(f'{self.name}_count{{view="{label}"}} {cumulative}')
+
+        return '\n'.join(lines)
+
+    def clear(self):
+        with self.lock:
+            self.values.clear()
+
+
+REQUEST_SECONDS = Histogram(
+    'catalog_request_duration_seconds', "Total request latency.", DURATION_BUCKETS,
+)
+SQL_SECONDS = Histogram(
+    'catalog_sql_duration_seconds', "SQL time per request.", DURATION_BUCKETS,
+)
+SQL_QUERIES = Histogram(
+    'catalog_sql_queries', "SQL queries per request.", QUERY_COUNT_BUCKETS,
+)
+TEMPLATE_SECONDS = Histogram(
+    'catalog_template_duration_seconds', "Template rendering time per request.",
+    DURATION_BUCKETS,
+)
+HISTOGRAMS = (REQUEST_SECONDS, SQL_SECONDS, SQL_QUERIES, TEMPLATE_SECONDS)
+
+
+class RequestTimings:
+    """Timings of the request being served (possibly over several threads)."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.queries = 0
+        self.sql_time = 0.0
+        self.template_time = 0.0
+
+    def add_query_time(self, elapsed):
+        with self.lock:
+            self.queries += 1
+            self.sql_time += elapsed
+
+    def add_template_time(self, elapsed):
+        with self.lock:
+            self.template_time += elapsed
+
+
+# Context variables follow the request into sync_to_async() threads and
+# into the ORM pool of catalog.async_views, unlike thread-local state.
+current_timings = contextvars.ContextVar('catalog_request_timings', default=None)
+
+
+def time_query(execute, sql, params, many, context):
+    timings = current_timings.get()
+    if timings is None:
+        return execute(sql, params, many, context)
+
+    started = time.perf_counter()
+    try:
+        return execute(sql, params, many, context)
+    finally:
+        timings.add_query_time(time.perf_counter() - started)
+
+
+@receiver(connection_created)
+def install_query_timer(sender, connection, **kwargs):
+    # Every connection times its queries, whichever thread serves the
+    # request. First in the list: connection.execute_wrapper() pops the last.
+    if time_query not in connection.execute_wrappers:
+        connection.execute_wrappers.insert(0, time_query)
+
+
+class Template(django_backend.Template):
+
+    def render(self, context=None, request=None):
+        timings = current_timings.get()
+        if timings is None:
+            return super().render(context, request)
+
+        started = time.perf_counter()
+        try:
+            return super().render(context, request)
+        finally:
+            timings.add_template_time(time.perf_counter() - started)
+
+
+class DjangoTemplates(django_backend.DjangoTemplates):
+    """Django template backend timing renders for ``MetricsMiddleware``."""
+
+    def from_string(self, template_code):
+        return Template(self.engine.from_string(template_code), self)
+
+    def get_template(self, template_name):
+        try:
+            return Template(self.engine.get_template(template_name), self)
+        except django_backend.TemplateDoesNotExist as exc:
+            django_backend.reraise(exc, self)
+
+
+class MetricsMiddleware:
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        if asyncio.iscoroutinefunction(get_response):
+            self._is_coroutine = asyncio.coroutines._is_coroutine
+
+    def __call__(self, request):
+        if asyncio.iscoroutinefunction(self.get_response):
+            return self.__acall__(request)
+
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.record(request, response, timings, time.perf_counter() - started)
+
+    async def __acall__(self, request):
+        timings = RequestTimings()
+        token = current_timings.set(timings)
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            current_timings.reset(token)
+
+        return self.record(request, response, timings, time.perf_counter() - started)
+
+    def record(self, request, response, timings, elapsed):
+        # Label with the URL name: a bounded set, unlike paths.
+        match = request.resolver_match
+        view = match.view_name if match else 'unresolved'
+
+        REQUEST_SECONDS.observe(view, elapsed)
+        SQL_SECONDS.observe(view, timings.sql_time)
+        SQL_QUERIES.observe(view, timings.queries)
+        TEMPLATE_SECONDS.observe(view, timings.template_time)
+        save_snapshot()
+
+        response['Server-Timing'] = ', '.join([
+            f'db;dur={timings.sql_time * 1000:.1f};desc="{timings.queries} SQL"',
+            f'tpl;dur={timings.template_time * 1000:.1f}',
+            f'total;dur={elapsed * 1000:.1f}',
+        ])
+
+        return response
+
+
+# Name, type, documentation and library.db.pool statistic of the pool metrics.
+POOL_METRICS = (
+    ('catalog_db_pool_connections', 'gauge', "Open connections.", 'size'),
+    ('catalog_db_pool_idle_connections', 'gauge', "Idle connections.", 'idle'),
+    ('catalog_db_pool_waiting', 'gauge', "Threads waiting for a connection.", 'waiting'),
+    ('catalog_db_pool_max_connections', 'gauge', "Pool size limit.", 'max_size'),
+    ('catalog_db_pool_checkouts_total', 'counter', "Connections handed out.", 'checkouts'),
+    ('catalog_db_pool_opened_total', 'counter', "Connections opened.", 'opened'),
+    ('catalog_db_pool_closed_total', 'counter', "Connections closed.", 'closed'),
+    (
+        'catalog_db_pool_failed_checks_total', 'counter',
+        "Idle connections found broken on checkout.", 'failed_checks',
+    ),
+    (
+        'catalog_db_pool_timeouts_total', 'counter',
+        "Checkouts given up after the pool timeout.", 'timeouts',
+    ),
+    (
+        'catalog_db_pool_wait_seconds_total', 'counter',
+        "Time spent waiting for connections.", 'wait_seconds',
+    ),
+)
+
+
+POOL_GAUGES = [key for _, metric_type, _, key in POOL_METRICS if metric_type == 'gauge']
+
+SNAPSHOT_INTERVAL = 1
+
+_snapshot_lock = threading.Lock()
+_last_snapshot = 0.0
+
+
+def expose_pools(stats=None):
+    """Text format of ``{alias: pool statistics}`` (this process's by default)."""
+    if stats is None:
+        stats = {pool.name: pool.stats() for pool in all_pools()}
+    if not stats:
+        return ''
+
+    lines = []
+    for name, metric_type, documentation, key in POOL_METRICS:
+        lines.append(f'# HELP {name} {documentation}')
+        lines.append(f'# TYPE {name} {metric_type}')
+        for alias, values in sorted(stats.items()):
+            lines.append(f'{name}{{alias="{alias}"}} {values[key]}')
+
+    return '\n'.join(lines) + '\n'
+
+
+def snapshot():
+    """The histograms and pool statistics of this process."""
+    return {
+        'histograms': {histogram.name: histogram.snapshot() for histogram in HISTOGRAMS},
+        'pools': {pool.name: pool.stats() for pool in all_pools()},
+    }
+
+
+def save_snapshot(force=False, exiting=False):
+    """Write this process's snapshot to ``CATALOG_METRICS_DIR``.
+
+    Unless ``force`` is set, nothing is written if the last snapshot is
+    less than ``SNAPSHOT_INTERVAL`` seconds old. ``exiting`` zeroes the pool
+    gauges: the process no longer holds any connection.
+    """
+    global _last_snapshot
+
+    directory = settings.CATALOG_METRICS_DIR
+    if not directory:
+        return
+
+    with _snapshot_lock:
+        now = time.monotonic()
+        if not force and now - _last_snapshot < SNAPSHOT_INTERVAL:
+            return
+        _last_snapshot = now
+
+        current = snapshot()
+        if exiting:
+            for stats in current['pools'].values():
+                stats.update(dict.fromkeys(POOL_GAUGES, 0))
+
+        path = os.path.join(directory, f'{os.getpid()}.json')
+        try:
+            with open(f'{path}.tmp', 'w') as file:
+                json.dump(current, file)
+            # Readers see either the previous snapshot or this one.
+            os.replace(f'{path}.tmp', path)
+        except OSError:
+            # Metrics must not break the page: retry with the next request.
+            logger.exception("Impossible d'enregistrer les métriques")
+
+
+def load_snapshots(directory):
+    snapshots = []
+    for name in sorted(os.listdir(directory)):
+        if not name.endswith('.json'):
+            continue
+        try:
+            with open(os.path.join(directory, name)) as file:
+                snapshots.append(json.load(file))
+        except (OSError, ValueError):
+            continue
+
+    return snapshots
+
+
+def merge_snapshots(snapshots):
+    """Add up the snapshots of several processes."""
+    histograms = {histogram.name: {} for histogram in HISTOGRAMS}
+    pools = {}
+
+    for current in snapshots:
+        for name, views in current['histograms'].items():
+            merged = histograms.setdefault(name, {})
+            for view, (counts, total) in views.items():
+                if view not in merged:
+                    merged[view] = [list(counts), total]
+                # Other buckets: written before the buckets changed.
+                elif len(merged[view][0]) == len(counts):
+                    merged_counts, merged_total = merged[view]
+                    merged[view] = [
+                        [a + b for a, b in zip(merged_counts, counts)],
+                        merged_total + total,
+                    ]
+        for alias, stats in current['pools'].items():
+            merged = pools.setdefault(alias, {})
+            for key, value in stats.items():
+                merged[key] = merged.get(key, 0) + value
+
+    return {'histograms': histograms, 'pools': pools}
+
+
+def expose():
+    directory = settings.CATALOG_METRICS_DIR
+    if directory:
+        save_snapshot(force=True)
+        current = merge_snapshots(load_snapshots(directory))
+    else:
+        current = snapshot()
+
+    return (
+        '\n'.join(
+            histogram.expose(current['histograms'].get(histogram.name, {}))
+            for histogram in HISTOGRAMS
+        ) + '\n'
+        + expose_pools(current['pools'])
+    )
+
+
+def metrics_view(request):
+    """Histograms in the Prometheus text format, for all the workers.
+
+    When ``CATALOG_METRICS_TOKEN`` is set, scrapers must send it as a
+    bearer token. Otherwise, only staff members may read them, unless
+    ``DEBUG`` is on.
+    """
+    token = settings.CATALOG_METRICS_TOKEN
+    if token:
+        # As bytes: compare_digest() rejects non-ASCII strings.
+        allowed = hmac.compare_digest(
+            request.META.get('HTTP_AUTHORIZATION', '').encode(),
+            f'Bearer {token}'.encode(),
+        )
+    else:
+        user = getattr(request, 'user', None)
+        allowed = settings.DEBUG or (user is not None and user.is_staff)
+    if not allowed:
+        return HttpResponseForbidden()
+
+    return HttpResponse(
+        expose(), content_type='text/plain; version=0.0.4; charset=utf-8',
+    )
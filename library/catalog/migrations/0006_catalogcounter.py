@@ -0,0 +1,53 @@
+# Generated by Django 3.1.8 on 2026-10-18 07:13
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def populate_counters(apps, schema_editor):
+    CatalogCounter = apps.get_model('catalog', 'CatalogCounter')
+
+    counters = []
+    for model_name in ('author', 'book'):
+        model = apps.get_model('catalog', model_name)
+        counters.append(CatalogCounter(
+            entity=model_name, status='', count=model.objects.count(),
+        ))
+
+    BookInstance = apps.get_model('catalog', 'BookInstance')
+    by_status = BookInstance.objects.order_by().values('status').annotate(
+        count=Count('pk'),
+    )
+    for row in by_status:
+        counters.append(CatalogCounter(
+            entity='bookinstance', status=row['status'], count=row['count'],
+        ))
+
+    CatalogCounter.objects.bulk_create(counters)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0005_auto_20200628_1516'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CatalogCounter',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('entity', models.CharField(max_length=50, verbose_name='entité')),
+                ('status', models.CharField(blank=True, default='', max_length=1, verbose_name='statut')),
+                ('count', models.BigIntegerField(default=0, verbose_name='nombre')),
+            ],
+            options={
+                'verbose_name': 'Compteur',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='catalogcounter',
+            constraint=models.UniqueConstraint(fields=('entity', 'status'), name='unique_catalog_counter'),
+        ),
+        migrations.RunPython(populate_counters, migrations.RunPython.noop),
+    ]
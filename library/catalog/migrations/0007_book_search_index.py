@@ -0,0 +1,68 @@
+from django.db import migrations
+
+
+# The SQL is frozen here: later changes to catalog.search must not change
+# what this migration does.
+AUTHOR_NAME = "COALESCE(a.first_name, '') || ' ' || COALESCE(a.last_name, '')"
+
+SOURCE = "FROM catalog_book b LEFT OUTER JOIN catalog_author a ON a.id = b.author_id"
+
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', b.title), 'A') || "
+    "setweight(to_tsvector('simple', b.isbn), 'A') || "
+    f"setweight(to_tsvector('simple', {AUTHOR_NAME}), 'B') || "
+    "setweight(to_tsvector('simple', b.summary), 'C')"
+)
+
+
+def create_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute(
+            "CREATE VIRTUAL TABLE IF NOT EXISTS catalog_book_fts USING fts5("
+            "title, summary, isbn, author, "
+            "tokenize = 'unicode61 remove_diacritics 2')"
+        )
+        schema_editor.execute("DELETE FROM catalog_book_fts")
+        schema_editor.execute(
+            f"INSERT INTO catalog_book_fts (rowid, title, summary, isbn, author) "
+            f"SELECT b.id, b.title, b.summary, b.isbn, {AUTHOR_NAME} {SOURCE}"
+        )
+    elif vendor == 'postgresql':
+        schema_editor.execute(
+            "CREATE TABLE IF NOT EXISTS catalog_book_search ("
+            "book_id integer PRIMARY KEY "
+            "REFERENCES catalog_book (id) ON DELETE CASCADE "
+            "DEFERRABLE INITIALLY DEFERRED, "
+            "document tsvector NOT NULL)"
+        )
+        schema_editor.execute(
+            "CREATE INDEX IF NOT EXISTS catalog_book_search_document_idx "
+            "ON catalog_book_search USING gin (document)"
+        )
+        schema_editor.execute("TRUNCATE catalog_book_search")
+        schema_editor.execute(
+            f"INSERT INTO catalog_book_search (book_id, document) "
+            f"SELECT b.id, {POSTGRES_DOCUMENT} {SOURCE}"
+        )
+
+
+def drop_search_index(apps, schema_editor):
+    vendor = schema_editor.connection.vendor
+
+    if vendor == 'sqlite':
+        schema_editor.execute("DROP TABLE IF EXISTS catalog_book_fts")
+    elif vendor == 'postgresql':
+        schema_editor.execute("DROP TABLE IF EXISTS catalog_book_search")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('catalog', '0006_catalogcounter'),
+    ]
+
+    operations = [
+        migrations.RunPython(create_search_index, drop_search_index),
+    ]
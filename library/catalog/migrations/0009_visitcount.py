@@ -0,0 +1,36 @@
+# Generated by Django 3.1.8 on 2026-10-18 07:26
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('catalog', '0008_catalog_indexes'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='VisitCount',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('path', models.CharField(max_length=200, verbose_name='page')),
+                ('count', models.BigIntegerField(default=0, verbose_name='visites')),
+                ('user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, to=settings.AUTH_USER_MODEL, verbose_name='utilisateur')),
+            ],
+            options={
+                'verbose_name': 'Nombre de visites',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='visitcount',
+            constraint=models.UniqueConstraint(fields=('path', 'user'), name='unique_user_visit_count'),
+        ),
+        migrations.AddConstraint(
+            model_name='visitcount',
+            constraint=models.UniqueConstraint(condition=models.Q(user__isnull=True), fields=('path',), name='unique_anonymous_visit_count'),
+        ),
+    ]
@@ -0,0 +1,33 @@
+# Generated by Django 3.1.8 on 2026-10-18 07:29
+
+from django.conf import settings
+from django.db import migrations, models
+import django.db.models.deletion
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+        ('catalog', '0009_visitcount'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='OverdueNotice',
+            fields=[
+                ('id', models.AutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('due_back', models.DateField(verbose_name='date de retour')),
+                ('sent_at', models.DateTimeField(auto_now_add=True, verbose_name='envoyé le')),
+                ('bookinstance', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, to='catalog.bookinstance', verbose_name='exemplaire')),
+                ('borrower', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, to=settings.AUTH_USER_MODEL, verbose_name='Emprunteur')),
+            ],
+            options={
+                'verbose_name': 'Relance',
+            },
+        ),
+        migrations.AddConstraint(
+            model_name='overduenotice',
+            constraint=models.UniqueConstraint(fields=('bookinstance', 'due_back'), name='unique_overdue_notice'),
+        ),
+    ]
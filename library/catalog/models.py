@@ -2,11 +2,29 @@ from datetime import date
 import uuid
 
 from django.contrib.auth.models import User
-from django.db import models
+from django.db import models, transaction
+from django.db.models import Count, Min, Q
 from django.urls import reverse
 
 
-class Author(models.Model):
+class CountedModel(models.Model):
+    """Base class for models tracked by a ``CatalogCounter``.
+
+    Saving runs in a transaction so the counter update made by the
+    ``post_save`` handler commits (or rolls back) together with the row.
+    """
+
+    class Meta:
+
+        abstract = True
+
+
+    def save(self, *args, **kwargs):
+        with transaction.atomic(using=kwargs.get('using')):
+            super().save(*args, **kwargs)
+
+
+class Author(CountedModel):
     
     first_name = models.CharField(
         max_length=100,
@@ -29,6 +47,12 @@ class Author(models.Model):
 
         verbose_name = "Auteur"
         ordering = ['last_name', 'first_name']
+        indexes = [
+            models.Index(
+                fields=['last_name', 'first_name', 'id'],
+                name='author_name_idx',
+            ),
+        ]
 
 
     def get_absolute_url(self):
@@ -66,7 +90,7 @@ class Language(models.Model):
         return self.name
 
 
-class Book(models.Model):
+class Book(CountedModel):
 
     title = models.CharField(
         max_length=200,
@@ -97,6 +121,13 @@ class Book(models.Model):
     class Meta:
 
         verbose_name = "Livre"
+        indexes = [
+            models.Index(fields=['title', 'id'], name='book_title_idx'),
+            models.Index(fields=['isbn'], name='book_isbn_idx'),
+            models.Index(
+                fields=['author', 'title', 'id'], name='book_author_title_idx',
+            ),
+        ]
 
 
     def __str__(self):
@@ -111,7 +142,31 @@ class Book(models.Model):
     display_genre.short_description = "genre(s)"
 
 
-class BookInstance(models.Model):
+class BookInstanceQuerySet(models.QuerySet):
+
+    def overdue(self, today=None):
+        """Copies on loan past their due date (uses bookinstance_on_loan_idx)."""
+        return self.filter(status='o', due_back__lt=today or date.today())
+
+    def summary(self):
+        """Count copies per status and find the next due date, in one query."""
+        aggregates = {
+            'total': Count('pk'),
+            'next_due_back': Min('due_back', filter=Q(status='o')),
+        }
+        for status, _ in BookInstance.LOAN_STATUS:
+            aggregates[f'status_{status}'] = Count('pk', filter=Q(status=status))
+
+        result = self.order_by().aggregate(**aggregates)
+        result['by_status'] = [
+            (status, label, result.pop(f'status_{status}'))
+            for status, label in BookInstance.LOAN_STATUS
+        ]
+
+        return result
+
+
+class BookInstance(CountedModel):
 
     uuid = models.UUIDField(
         primary_key=True, default=uuid.uuid4,
@@ -145,6 +200,8 @@ class BookInstance(models.Model):
         verbose_name="statut",
     )
 
+    objects = BookInstanceQuerySet.as_manager()
+
     @property
     def is_overdue(self):
         if self.due_back and date.today() > self.due_back:
@@ -156,6 +213,25 @@ class BookInstance(models.Model):
 
         verbose_name = "Exemplaire"
         ordering = ['due_back']
+        indexes = [
+            models.Index(
+                fields=['status', 'due_back', 'uuid'],
+                name='bookinstance_status_due_idx',
+            ),
+            models.Index(
+                fields=['book', 'due_back', 'uuid'],
+                name='bookinstance_book_due_idx',
+            ),
+            models.Index(
+                fields=['borrower', 'status', 'due_back', 'uuid'],
+                name='bookinstance_borrower_idx',
+            ),
+            models.Index(
+                fields=['due_back', 'uuid'],
+                condition=Q(status='o'),
+                name='bookinstance_on_loan_idx',
+            ),
+        ]
         permissions = (
             ('can_mark_returned', 'Indiquer un exemplaire comme rapporté'),
         )
@@ -163,3 +239,113 @@ class BookInstance(models.Model):
 
     def __str__(self):
         return f"{self.imprint} - {self.book.title}"
+
+
+
+class CatalogCounter(models.Model):
+    """Denormalized row count for a catalog model, per status if relevant.
+
+    Author and Book rows use an empty status; BookInstance has one row per
+    loan status. Rows are kept up to date by ``catalog.counters``.
+    """
+
+    entity = models.CharField(
+        max_length=50,
+        verbose_name="entité",
+    )
+    status = models.CharField(
+        max_length=1, blank=True, default='',
+        verbose_name="statut",
+    )
+    count = models.BigIntegerField(
+        default=0,
+        verbose_name="nombre",
+    )
+
+    class Meta:
+
+        verbose_name = "Compteur"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['entity', 'status'], name='unique_catalog_counter',
+            ),
+        ]
+
+
+    def __str__(self):
+        return f"{self.entity}[{self.status}] = {self.count}"
+
+
+class VisitCount(models.Model):
+    """Number of visits of a page, per user (``None`` for anonymous users).
+
+    Rows are written in batches by ``catalog.visits``, never once per hit.
+    """
+
+    path = models.CharField(
+        max_length=200,
+        verbose_name="page",
+    )
+    user = models.ForeignKey(
+        User, on_delete=models.CASCADE,
+        null=True, blank=True,
+        verbose_name="utilisateur",
+    )
+    count = models.BigIntegerField(
+        default=0,
+        verbose_name="visites",
+    )
+
+    class Meta:
+
+        verbose_name = "Nombre de visites"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['path', 'user'], name='unique_user_visit_count',
+            ),
+            # NULLs are distinct in a unique index: anonymous visits need
+            # their own constraint.
+            models.UniqueConstraint(
+                fields=['path'], condition=Q(user__isnull=True),
+                name='unique_anonymous_visit_count',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.path} ({self.user or 'anonyme'}) = {self.count}"
+
+
+class OverdueNotice(models.Model):
+    """Reminder sent to the borrower of an overdue copy.
+
+    There is at most one notice per loan period: renewing a loan changes
+    ``due_back``, so a new reminder can be sent for the new due date.
+    """
+
+    bookinstance = models.ForeignKey(
+        'BookInstance', on_delete=models.CASCADE,
+        verbose_name="exemplaire",
+    )
+    due_back = models.DateField(
+        verbose_name="date de retour",
+    )
+    borrower = models.ForeignKey(
+        User, on_delete=models.SET_NULL, null=True, blank=True,
+        verbose_name="Emprunteur",
+    )
+    sent_at = models.DateTimeField(
+        auto_now_add=True,
+        verbose_name="envoyé le",
+    )
+
+    class Meta:
+
+        verbose_name = "Relance"
+        constraints = [
+            models.UniqueConstraint(
+                fields=['bookinstance', 'due_back'], name='unique_overdue_notice',
+            ),
+        ]
+
+    def __str__(self):
+        return f"{self.bookinstance_id} ({self.due_back})"
@@ -0,0 +1,110 @@
+"""Reminders for overdue loans.
+
+Overdue loans are read with one indexed query per chunk, walking the
+partial index on loaned copies in ``(due_back, uuid)`` order, so a sweep
+never reads copies that are not overdue. Loans already reminded for their
+current due date are excluded by the query itself, using the
+``OverdueNotice`` rows recorded after each batch of mails.
+"""
+
+import datetime
+from contextlib import nullcontext
+
+from django.conf import settings
+from django.core.mail import get_connection, send_mass_mail
+from django.db.models import Exists, OuterRef
+
+from library.db.transaction import immediate_atomic
+
+from .models import BookInstance, OverdueNotice
+from .pagination import KeysetPaginator
+
+
+SUBJECT = "Rappel : exemplaire à rapporter"
+MESSAGE = (
+    "Bonjour {name},\n\n"
+    "L'exemplaire {imprint} de « {title} » devait être rapporté "
+    "le {due_back:%d/%m/%Y}. Merci de le rapporter dès que possible.\n\n"
+    "La Local Library"
+)
+
+
+def pending_loans(today=None):
+    """Overdue loans whose borrower has not been reminded yet."""
+    notices = OverdueNotice.objects.filter(
+        bookinstance=OuterRef('pk'), due_back=OuterRef('due_back'),
+    )
+
+    return BookInstance.objects.overdue(today).filter(
+        borrower__isnull=False,
+    ).exclude(
+        borrower__email='',
+    ).exclude(
+        Exists(notices),
+    ).select_related('book', 'borrower').only(
+        'uuid', 'imprint', 'due_back', 'status',
+        'book__title', 'borrower__username', 'borrower__first_name',
+        'borrower__email',
+    )
+
+
+def build_message(loan):
+    borrower = loan.borrower
+    body = MESSAGE.format(
+        name=borrower.first_name or borrower.username,
+        imprint=loan.imprint,
+        title=loan.book.title if loan.book else "",
+        due_back=loan.due_back,
+    )
+
+    return (SUBJECT, body, settings.DEFAULT_FROM_EMAIL, [borrower.email])
+
+
+def send_notices(loans, connection):
+    """Send one reminder per loan and record them, return the count sent.
+
+    The mails are sent before the write transaction starts, so the SMTP
+    exchange does not hold the database write lock. Notices are recorded
+    only once their batch is sent: a failed batch is retried by the next
+    sweep, and a crash between sending and recording sends it again.
+    """
+    send_mass_mail(
+        [build_message(loan) for loan in loans], connection=connection,
+    )
+
+    with immediate_atomic():
+        OverdueNotice.objects.bulk_create(
+            OverdueNotice(
+                bookinstance=loan, due_back=loan.due_back,
+                borrower_id=loan.borrower_id,
+            )
+            for loan in loans
+        )
+
+    return len(loans)
+
+
+def sweep(today=None, chunk_size=500, dry_run=False, on_chunk=None):
+    """Remind the borrowers of every overdue loan, ``chunk_size`` at a time.
+
+    ``on_chunk(sent)`` is called after each chunk with the total so far.
+    Return the number of reminders sent (or that would be sent).
+    """
+    today = today or datetime.date.today()
+    paginator = KeysetPaginator(
+        pending_loans(today), chunk_size, ('due_back', 'uuid'),
+    )
+
+    sent = 0
+    # One SMTP connection for the whole sweep.
+    connection = get_connection()
+    with nullcontext() if dry_run else connection:
+        for loans in paginator.chunks():
+            if dry_run:
+                sent += len(loans)
+            else:
+                sent += send_notices(loans, connection)
+            if on_chunk is not None:
+                on_chunk(sent)
+
+    return sent
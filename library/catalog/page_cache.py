@@ -0,0 +1,114 @@
+"""Cache of rendered catalog pages, keyed on data versions.
+
+A cached page is stored under a key combining the view, the full path,
+the viewer and the versions of the data displayed (see
+``catalog.versions``). Signal handlers bump exactly the versions affected
+by a change, so stale entries are never read again and simply expire.
+
+Pages mention the logged-in user in the sidebar and show edit buttons to
+users with ``catalog.can_mark_returned``, so the key includes both the user
+and that permission: revoking the permission changes the key even for the
+same user. Anonymous visitors all share the same entries.
+
+A change only invalidates entries in the processes that see its version
+bump: without a cache shared by every process (``CATALOG_SHARED_CACHE`` is
+False), pages are neither stored nor looked up, and fragments go to the
+``dummy`` cache.
+"""
+
+import hashlib
+from functools import partial
+
+from django.conf import settings
+from django.core.cache import cache
+from django.http import HttpResponse
+
+from . import versions
+
+
+PAGE_CACHE_TIMEOUT = 60 * 10
+PAGE_KEY_PREFIX = 'catalog:page:'
+FRAGMENT_CACHE_TIMEOUT = 60 * 60
+
+
+def can_edit(user):
+    return user.has_perm('catalog.can_mark_returned')
+
+
+def page_cache_key(request, view_name, data_versions):
+    user = request.user
+    signature = '|'.join([
+        view_name,
+        request.get_full_path(),
+        str(user.pk) if user.is_authenticated else 'anonymous',
+        'edit' if can_edit(user) else 'read',
+        *(f'{name}={version}' for name, version in sorted(data_versions.items())),
+    ])
+
+    return PAGE_KEY_PREFIX + hashlib.md5(signature.encode()).hexdigest()
+
+
+def cache_context(request, data_versions):
+    """Context used by templates to key their ``{% cache %}`` fragments."""
+    return {
+        'data_version': '-'.join(
+            str(version) for _, version in sorted(data_versions.items())
+        ),
+        'can_edit': can_edit(request.user),
+        'fragment_cache_timeout': FRAGMENT_CACHE_TIMEOUT,
+        'fragment_cache': 'default' if settings.CATALOG_SHARED_CACHE else 'dummy',
+    }
+
+
+def get_cached_response(key):
+    if not settings.CATALOG_SHARED_CACHE:
+        return None
+
+    cached = cache.get(key)
+    if cached is None:
+        return None
+
+    content, content_type = cached
+
+    return HttpResponse(content, content_type=content_type)
+
+
+def store_response(key, response, timeout=PAGE_CACHE_TIMEOUT):
+    if response.status_code == 200 and settings.CATALOG_SHARED_CACHE:
+        cache.set(key, (response.content, response['Content-Type']), timeout)
+
+
+class CachedPageMixin:
+    """Serve GET requests of a view from the page cache.
+
+    Subclasses list the versions their pages depend on in
+    ``get_cache_versions()``. The versions and the ``can_edit`` flag are
+    also added to the context so templates can key ``{% cache %}``
+    fragments on them.
+    """
+
+    page_cache_timeout = PAGE_CACHE_TIMEOUT
+
+    def get_cache_versions(self):
+        raise NotImplementedError
+
+    def get(self, request, *args, **kwargs):
+        self.data_versions = versions.get_versions(*self.get_cache_versions())
+        key = page_cache_key(request, type(self).__name__, self.data_versions)
+
+        cached = get_cached_response(key)
+        if cached is not None:
+            return cached
+
+        response = super().get(request, *args, **kwargs)
+        response.add_post_render_callback(
+            partial(store_response, key, timeout=self.page_cache_timeout),
+        )
+
+        return response
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context.update(cache_context(self.request, self.data_versions))
+
+        return context
@@ -0,0 +1,223 @@
+"""Keyset (a.k.a. cursor or seek) pagination.
+
+Instead of ``OFFSET n``, each page is fetched with a ``WHERE`` clause that
+seeks past the ordering values of the last row already shown, and no total
+count is computed: a deep page costs the same as the first one as long as an
+index matches the ordering.
+
+Cursors are opaque URL-safe tokens encoding the seek direction and values.
+"""
+
+import base64
+import datetime
+import json
+import uuid
+
+from django.core.exceptions import ValidationError
+from django.db import connections
+from django.db.models import Q
+from django.http import Http404
+
+
+class InvalidCursor(Exception):
+
+    pass
+
+
+def _to_json(value):
+    if isinstance(value, (datetime.date, datetime.datetime)):
+        return value.isoformat()
+    if isinstance(value, uuid.UUID):
+        return str(value)
+
+    return value
+
+
+def encode_cursor(direction, values):
+    payload = json.dumps([direction, [_to_json(value) for value in values]])
+
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip('=')
+
+
+def decode_cursor(token):
+    try:
+        padded = token + '=' * (-len(token) % 4)
+        direction, values = json.loads(base64.urlsafe_b64decode(padded))
+    except (TypeError, ValueError):
+        raise InvalidCursor(token)
+
+    if direction not in ('n', 'p') or not isinstance(values, list):
+        raise InvalidCursor(token)
+
+    return direction, values
+
+
+class KeysetPage:
+
+    is_keyset = True
+
+    def __init__(self, object_list, next_cursor, previous_cursor):
+        self.object_list = object_list
+        self.next_cursor = next_cursor
+        self.previous_cursor = previous_cursor
+
+    def __iter__(self):
+        return iter(self.object_list)
+
+    def __len__(self):
+        return len(self.object_list)
+
+    def has_next(self):
+        return self.next_cursor is not None
+
+    def has_previous(self):
+        return self.previous_cursor is not None
+
+    def has_other_pages(self):
+        return self.has_next() or self.has_previous()
+
+
+class KeysetPaginator:
+    """Paginate ``queryset`` on the unique ``ordering`` columns.
+
+    ``ordering`` must end with a unique column (usually the primary key) so
+    that every row has a distinct position. Nullable columns are supported;
+    NULLs are placed where the database sorts them by default.
+    """
+
+    def __init__(self, queryset, per_page, ordering):
+        self.queryset = queryset
+        self.per_page = int(per_page)
+        self.ordering = tuple(ordering)
+
+        opts = queryset.model._meta
+        self._fields = [
+            opts.pk if name == 'pk' else opts.get_field(name)
+            for name in self.ordering
+        ]
+        self._nulls_largest = connections[queryset.db].features.nulls_order_largest
+
+    def _keys(self, obj):
+        if isinstance(obj, dict):
+            return [obj[name] for name in self.ordering]
+
+        return [getattr(obj, name) for name in self.ordering]
+
+    def _seek(self, values, lookup):
+        """Return a Q selecting rows strictly after ``values`` for ``lookup``.
+
+        ``lookup`` is ``'gt'`` to move forward and ``'lt'`` to move backward.
+        """
+        if len(values) != len(self.ordering):
+            raise InvalidCursor(values)
+
+        condition = None
+        for name, field, value in reversed(list(zip(self.ordering, self._fields, values))):
+            nulls_beyond = self._nulls_largest == (lookup == 'gt')
+
+            if value is None:
+                if not field.null:
+                    raise InvalidCursor(values)
+                beyond = None if nulls_beyond else Q(**{f'{name}__isnull': False})
+                equal = Q(**{f'{name}__isnull': True})
+            else:
+                beyond = Q(**{f'{name}__{lookup}': value})
+                if field.null and nulls_beyond:
+                    beyond |= Q(**{f'{name}__isnull': True})
+                equal = Q(**{name: value})
+
+            if condition is not None:
+                tie = equal & condition
+                condition = tie if beyond is None else beyond | tie
+            elif beyond is not None:
+                condition = beyond
+            else:
+                # Nothing sorts after NULL on the last column.
+                condition = Q(pk__in=[])
+
+        # A redundant range bound on the leading column lets the database
+        # seek into the index instead of evaluating the OR-ed conditions.
+        name, field, value = self.ordering[0], self._fields[0], values[0]
+        nulls_beyond = self._nulls_largest == (lookup == 'gt')
+        if value is not None and not (field.null and nulls_beyond):
+            condition = Q(**{f'{name}__{lookup}e': value}) & condition
+
+        return condition
+
+    def page_queryset(self, direction='n', values=None):
+        """Return the queryset fetching one page (plus one look-ahead row)."""
+        if direction == 'n':
+            ordering, lookup = self.ordering, 'gt'
+        else:
+            ordering, lookup = [f'-{name}' for name in self.ordering], 'lt'
+
+        queryset = self.queryset.order_by(*ordering)
+        if values is not None:
+            try:
+                queryset = queryset.filter(self._seek(values, lookup))
+            except (ValidationError, ValueError, TypeError):
+                raise InvalidCursor(values)
+
+        return queryset[:self.per_page + 1]
+
+    def page(self, cursor=None):
+        direction, values = decode_cursor(cursor) if cursor else ('n', None)
+
+        rows = list(self.page_queryset(direction, values))
+        has_more = len(rows) > self.per_page
+        rows = rows[:self.per_page]
+
+        if direction == 'n':
+            has_next, has_previous = has_more, values is not None
+        else:
+            rows.reverse()
+            has_next, has_previous = True, has_more
+
+        next_cursor = previous_cursor = None
+        if rows and has_next:
+            next_cursor = encode_cursor('n', self._keys(rows[-1]))
+        if rows and has_previous:
+            previous_cursor = encode_cursor('p', self._keys(rows[0]))
+
+        return KeysetPage(rows, next_cursor, previous_cursor)
+
+    def chunks(self):
+        """Yield every row of the queryset in lists of ``per_page`` rows.
+
+        Each chunk is one indexed query starting after the previous chunk, so
+        walking a large table never uses an OFFSET.
+        """
+        if self.per_page < 1:
+            raise ValueError("per_page doit valoir au moins 1.")
+
+        values = None
+        while True:
+            rows = list(self.page_queryset('n', values))
+            chunk = rows[:self.per_page]
+            if chunk:
+                yield chunk
+            if len(rows) <= self.per_page:
+                return
+            values = self._keys(chunk[-1])
+
+
+class KeysetPaginationMixin:
+    """Use keyset pagination in a ``ListView`` unless ``?page=`` is given.
+
+    Offset pagination is kept for existing ``?page=n`` links.
+    """
+
+    keyset_ordering = None
+    cursor_kwarg = 'cursor'
+
+    def paginate_queryset(self, queryset, page_size):
+        if self.page_kwarg in self.kwargs or self.page_kwarg in self.request.GET:
+            return super().paginate_queryset(queryset, page_size)
+
+        paginator = KeysetPaginator(queryset, page_size, self.keyset_ordering)
+        try:
+            page = paginator.page(self.request.GET.get(self.cursor_kwarg))
+        except InvalidCursor:
+            raise Http404("Curseur de pagination invalide.")
+
+        return (paginator, page, page.object_list, page.has_other_pages())
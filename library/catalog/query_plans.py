@@ -0,0 +1,132 @@
+"""EXPLAIN-based checks of the querysets run by the catalog views.
+
+Each check runs ``QuerySet.explain()`` and reports plans that read a whole
+table or sort rows in a temporary structure instead of walking an index.
+On PostgreSQL, sequential scans and sorts are disabled for the duration of
+the check so that a tiny development table does not hide a missing index.
+
+The views build their querysets from a request, which the caller provides
+(see the ``check_query_plans`` command).
+"""
+
+import datetime
+import uuid
+
+from django.contrib import admin
+from django.db import connection, transaction
+
+from . import overdue, views
+from .models import Author, Book, BookInstance
+from .pagination import KeysetPaginator
+
+
+SQLITE_PROBLEMS = ('USE TEMP B-TREE',)
+POSTGRES_PROBLEMS = ('Seq Scan', 'Sort')
+
+
+SAMPLE_SEEK_VALUES = {
+    Author: ['Doe', 'John', 1],
+    Book: ['Title', 1],
+    BookInstance: [datetime.date.today(), uuid.uuid4()],
+}
+
+
+def _list_view_querysets(request):
+    list_views = (
+        views.BookListView,
+        views.AuthorListView,
+        views.LoanedBooksListView,
+        views.LoanedBooksByUserListView,
+    )
+    for view_class in list_views:
+        view = view_class()
+        view.setup(request)
+        paginator = KeysetPaginator(
+            view.get_queryset(), view.paginate_by, view.keyset_ordering,
+        )
+        name = view_class.__name__
+        values = SAMPLE_SEEK_VALUES[view.model]
+
+        yield f"{name} (première page)", paginator.page_queryset()
+        yield f"{name} (page suivante)", paginator.page_queryset('n', values)
+        yield f"{name} (page précédente)", paginator.page_queryset('p', values)
+
+
+def view_querysets(request):
+    """Yield ``(label, queryset)`` for the main query of each catalog view.
+
+    ``request`` is a GET request by a logged-in user.
+    """
+    yield from _list_view_querysets(request)
+
+    book = Book(pk=1)
+    yield "BookDetailView", views.BookDetailView.queryset.filter(pk=1)
+    yield "BookDetailView (exemplaires)", (
+        book.bookinstance_set.order_by('due_back', 'uuid')[:10]
+    )
+    # Rows read by BookInstanceQuerySet.summary(), which aggregates them.
+    yield "BookDetailView (résumé)", (
+        book.bookinstance_set.order_by().values('status', 'due_back')
+    )
+
+    author = Author(pk=1)
+    yield "AuthorDetailView", Author.objects.filter(pk=1)
+    yield "AuthorDetailView (oeuvres)", (
+        views.AuthorDetailView.annotate_books(author.book_set.all())[:10]
+    )
+    yield "Recherche par ISBN", Book.objects.filter(isbn='9780441478125')
+
+    instance_admin = admin.site._registry[BookInstance]
+    changelist = instance_admin.get_queryset(request)
+    yield "Admin des exemplaires", changelist.select_related(
+        *instance_admin.list_select_related,
+    )[:100]
+    yield "Relances (overdue_sweep)", KeysetPaginator(
+        overdue.pending_loans(), 500, ('due_back', 'uuid'),
+    ).page_queryset('n', SAMPLE_SEEK_VALUES[BookInstance])
+
+
+def _problem_markers(vendor):
+    if vendor == 'postgresql':
+        return POSTGRES_PROBLEMS
+
+    return SQLITE_PROBLEMS
+
+
+def _is_full_scan(line, vendor):
+    if vendor == 'sqlite':
+        # "SCAN table" without "USING ... INDEX" reads the whole table.
+        detail = line.split(' ', 3)[-1]
+        return detail.startswith('SCAN ') and 'INDEX' not in detail
+
+    return False
+
+
+def find_problems(queryset):
+    """Return the lines of the plan of ``queryset`` that look expensive."""
+    vendor = connection.vendor
+
+    with transaction.atomic():
+        if vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SET LOCAL enable_seqscan = off")
+                cursor.execute("SET LOCAL enable_sort = off")
+        plan = queryset.explain()
+
+    markers = _problem_markers(vendor)
+
+    return [
+        line for line in plan.splitlines()
+        if any(marker in line for marker in markers) or _is_full_scan(line, vendor)
+    ]
+
+
+def check_views(request):
+    """Return ``{label: problems}`` for every view queryset with problems."""
+    report = {}
+    for label, queryset in view_querysets(request):
+        problems = find_problems(queryset)
+        if problems:
+            report[label] = problems
+
+    return report
@@ -0,0 +1,181 @@
+"""Full-text search over books, including their author's name.
+
+The index lives outside the ``catalog_book`` table and depends on the
+database in use:
+
+* SQLite: an FTS5 virtual table whose rowid is the book id, ranked by bm25.
+* PostgreSQL: a ``tsvector`` column in ``catalog_book_search`` with a GIN
+  index, ranked by ``ts_rank_cd``.
+
+Other databases fall back to ``icontains`` lookups. The index is kept in sync
+by the signal handlers in ``catalog.signals``; ``rebuild_index()`` repopulates
+it from scratch.
+"""
+
+import re
+
+from django.db import connection
+from django.db.models import Q
+
+from .models import Book
+
+
+SQLITE_TABLE = 'catalog_book_fts'
+POSTGRES_TABLE = 'catalog_book_search'
+INDEX_BATCH_SIZE = 1000
+
+TOKEN_RE = re.compile(r'\w+', re.UNICODE)
+
+INDEXED_COLUMNS = (
+    'pk', 'title', 'summary', 'isbn', 'author__first_name', 'author__last_name',
+)
+
+POSTGRES_DOCUMENT = (
+    "setweight(to_tsvector('simple', %s), 'A') || "
+    "setweight(to_tsvector('simple', %s), 'A') || "
+    "setweight(to_tsvector('simple', %s), 'B') || "
+    "setweight(to_tsvector('simple', %s), 'C')"
+)
+
+
+def tokenize(query):
+    return TOKEN_RE.findall(query.lower())[:16]
+
+
+def _documents(book_ids):
+    rows = Book.objects.filter(pk__in=book_ids).values_list(*INDEXED_COLUMNS)
+
+    for pk, title, summary, isbn, first_name, last_name in rows:
+        author = f"{first_name or ''} {last_name or ''}".strip()
+        yield pk, title, summary, isbn, author
+
+
+def index_books(book_ids):
+    """(Re)index the given books."""
+    book_ids = list(book_ids)
+
+    for start in range(0, len(book_ids), INDEX_BATCH_SIZE):
+        batch = book_ids[start:start + INDEX_BATCH_SIZE]
+        documents = list(_documents(batch))
+
+        with connection.cursor() as cursor:
+            if connection.vendor == 'sqlite':
+                # FTS5 has no upsert: delete, then insert.
+                cursor.executemany(
+                    f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s",
+                    [(pk,) for pk in batch],
+                )
+                cursor.executemany(
+                    f"INSERT INTO {SQLITE_TABLE} "
+                    f"(rowid, title, summary, isbn, author) "
+                    f"VALUES (%s, %s, %s, %s, %s)",
+                    documents,
+                )
+            elif connection.vendor == 'postgresql':
+                cursor.executemany(
+                    f"INSERT INTO {POSTGRES_TABLE} (book_id, document) "
+                    f"VALUES (%s, {POSTGRES_DOCUMENT}) "
+                    f"ON CONFLICT (book_id) "
+                    f"DO UPDATE SET document = EXCLUDED.document",
+                    [
+                        (pk, title, isbn, author, summary)
+                        for pk, title, summary, isbn, author in documents
+                    ],
+                )
+
+
+def remove_books(book_ids):
+    book_ids = [(pk,) for pk in book_ids]
+
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            cursor.executemany(
+                f"DELETE FROM {SQLITE_TABLE} WHERE rowid = %s", book_ids,
+            )
+        elif connection.vendor == 'postgresql':
+            cursor.executemany(
+                f"DELETE FROM {POSTGRES_TABLE} WHERE book_id = %s", book_ids,
+            )
+
+
+def rebuild_index(using=None):
+    """Repopulate the whole index with one ``INSERT ... SELECT``."""
+    using = using or connection
+    author_name = (
+        "COALESCE(a.first_name, '') || ' ' || COALESCE(a.last_name, '')"
+    )
+    source = (
+        "FROM catalog_book b "
+        "LEFT OUTER JOIN catalog_author a ON a.id = b.author_id"
+    )
+
+    with using.cursor() as cursor:
+        if using.vendor == 'sqlite':
+            cursor.execute(f"DELETE FROM {SQLITE_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {SQLITE_TABLE} "
+                f"(rowid, title, summary, isbn, author) "
+                f"SELECT b.id, b.title, b.summary, b.isbn, {author_name} "
+                f"{source}"
+            )
+        elif using.vendor == 'postgresql':
+            document = POSTGRES_DOCUMENT % (
+                'b.title', 'b.isbn', author_name, 'b.summary',
+            )
+            cursor.execute(f"TRUNCATE {POSTGRES_TABLE}")
+            cursor.execute(
+                f"INSERT INTO {POSTGRES_TABLE} (book_id, document) "
+                f"SELECT b.id, {document} {source}"
+            )
+
+
+def _ranked_ids(tokens, limit, offset):
+    with connection.cursor() as cursor:
+        if connection.vendor == 'sqlite':
+            match = ' '.join(f'"{token}"*' for token in tokens)
+            cursor.execute(
+                f"SELECT rowid FROM {SQLITE_TABLE} "
+                f"WHERE {SQLITE_TABLE} MATCH %s "
+                f"ORDER BY bm25({SQLITE_TABLE}, 10.0, 1.0, 10.0, 5.0), rowid "
+                f"LIMIT %s OFFSET %s",
+                [match, limit, offset],
+            )
+        else:
+            tsquery = ' & '.join(f'{token}:*' for token in tokens)
+            cursor.execute(
+                f"SELECT book_id FROM {POSTGRES_TABLE}, "
+                f"to_tsquery('simple', %s) query "
+                f"WHERE document @@ query "
+                f"ORDER BY ts_rank_cd(document, query) DESC, book_id "
+                f"LIMIT %s OFFSET %s",
+                [tsquery, limit, offset],
+            )
+
+        return [row[0] for row in cursor.fetchall()]
+
+
+def search_books(query, limit=10, offset=0):
+    """Return the books matching ``query``, best match first."""
+    tokens = tokenize(query)
+    if not tokens:
+        return []
+
+    if connection.vendor not in ('sqlite', 'postgresql'):
+        condition = Q()
+        for token in tokens:
+            condition &= (
+                Q(title__icontains=token)
+                | Q(summary__icontains=token)
+                | Q(isbn__icontains=token)
+                | Q(author__first_name__icontains=token)
+                | Q(author__last_name__icontains=token)
+            )
+        return list(
+            Book.objects.filter(condition).select_related('author')
+            .order_by('title', 'pk')[offset:offset + limit]
+        )
+
+    book_ids = _ranked_ids(tokens, limit, offset)
+    books = Book.objects.select_related('author').in_bulk(book_ids)
+
+    return [books[pk] for pk in book_ids if pk in books]
@@ -0,0 +1,266 @@
+"""Synthetic catalog data for load tests and benchmarks.
+
+Popularity is skewed: a few authors write many books and a few books have
+many copies, as in a real library, so pages and queries meet both tiny and
+large groups. The same ``seed`` value always produces the same catalog;
+only the unique identifiers (reader usernames, copy UUIDs) are new on each
+run, so that a seed can be run again on the same database.
+
+Rows are inserted with one ``executemany`` per batch (``insert_rows``),
+without building model instances, and their primary keys are read back
+into compact arrays (8 bytes per row), so millions of books can be
+referenced without keeping model instances around. The raw inserts bypass
+the model signals: counters, search index, stats and versions are rebuilt
+at the end.
+"""
+
+import datetime
+import random
+import uuid
+from array import array
+from collections import Counter
+
+from django.contrib.auth.hashers import make_password
+from django.contrib.auth.models import User
+from django.db import transaction
+from django.db.models import Max
+
+from . import counters, search, stats, versions
+from .models import Author, Book, BookInstance, Genre, Language
+
+
+FIRST_NAMES = (
+    "Alice", "Antoine", "Camille", "Charles", "Claire", "Denis", "Élise",
+    "Émile", "Françoise", "Georges", "Hélène", "Henri", "Isabelle", "Jacques",
+    "Jeanne", "Jules", "Louise", "Marc", "Marguerite", "Marie", "Michel",
+    "Nathalie", "Paul", "Pierre", "Simone", "Sophie", "Thomas", "Victor",
+    "Yvonne", "Zoé",
+)
+LAST_NAMES = (
+    "Bernard", "Blanc", "Bonnet", "Chevalier", "David", "Dubois", "Dupont",
+    "Durand", "Fontaine", "Fournier", "Gauthier", "Girard", "Lambert",
+    "Laurent", "Lefèvre", "Leroy", "Martin", "Mercier", "Moreau", "Morel",
+    "Perrin", "Petit", "Richard", "Robert", "Roux", "Simon", "Thomas",
+    "Vincent",
+)
+TITLE_NOUNS = (
+    "jardin", "voyage", "silence", "royaume", "secret", "miroir", "chemin",
+    "hiver", "rivage", "labyrinthe", "phare", "orage", "empire", "songe",
+)
+TITLE_ADJECTIVES = (
+    "perdu", "oublié", "immobile", "lointain", "invisible", "dernier",
+    "éternel", "sauvage", "endormi", "brûlant", "secret", "infini",
+)
+GENRES = (
+    "Roman", "Policier", "Science-Fiction", "Fantasy", "Poésie", "Théâtre",
+    "Histoire", "Biographie", "Jeunesse", "Essai", "Bande dessinée",
+    "Philosophie",
+)
+PUBLISHERS = ("Gallimard", "Seuil", "Flammarion", "Actes Sud", "Minuit")
+LANGUAGES = ("français", "anglais", "espagnol", "allemand", "italien")
+# Status of the copies: mostly available, a quarter on loan.
+STATUS_WEIGHTS = (('a', 60), ('o', 25), ('r', 10), ('m', 5))
+
+
+def skewed_index(rng, size, skew):
+    """Pick an index below ``size``, small indexes ``skew`` times likelier.
+
+    With ``skew=3``, the first 1% of the indexes get about a fifth of the
+    picks; ``skew=1`` is uniform.
+    """
+    return min(int(size * rng.random() ** skew), size - 1)
+
+
+def insert_rows(model, field_names, rows):
+    """Insert ``rows`` (tuples of values for ``field_names``) into ``model``."""
+    # The wrapper itself, not the thread-local proxy: it is used per value.
+    db = transaction.get_connection()
+    fields = [model._meta.get_field(name) for name in field_names]
+    quote_name = db.ops.quote_name
+    sql = (
+        f"INSERT INTO {quote_name(model._meta.db_table)} "
+        f"({', '.join(quote_name(field.column) for field in fields)}) "
+        f"VALUES ({', '.join(['%s'] * len(fields))})"
+    )
+    params = [
+        [field.get_db_prep_save(value, db) for field, value in zip(fields, row)]
+        for row in rows
+    ]
+
+    with db.cursor() as cursor:
+        cursor.executemany(sql, params)
+
+
+def _new_ids(model, after):
+    rows = model.objects.filter(pk__gt=after).order_by('pk')
+
+    return array('q', rows.values_list('pk', flat=True).iterator())
+
+
+def _max_pk(model):
+    return model.objects.aggregate(Max('pk'))['pk__max'] or 0
+
+
+class CatalogSeeder:
+
+    AUTHOR_FIELDS = ('first_name', 'last_name', 'date_of_birth', 'date_of_death')
+    BOOK_FIELDS = ('title', 'summary', 'isbn', 'author', 'language')
+    COPY_FIELDS = ('uuid', 'book', 'imprint', 'status', 'borrower', 'due_back')
+
+    def __init__(self, seed=None, batch_size=10000, skew=3, on_batch=None):
+        self.rng = random.Random(seed)
+        self.batch_size = batch_size
+        self.skew = skew
+        self.on_batch = on_batch
+        self.totals = Counter()
+        self.today = datetime.date.today()
+
+    def pick(self, ids):
+        return ids[skewed_index(self.rng, len(ids), self.skew)]
+
+    def _batches(self, total):
+        while total > 0:
+            size = min(self.batch_size, total)
+            yield size
+            total -= size
+
+    def _progress(self, name, count):
+        self.totals[name] += count
+        if self.on_batch is not None:
+            self.on_batch(name, self.totals)
+
+    def _names(self, model, names):
+        for name in names:
+            model.objects.get_or_create(name=name)
+
+        return array(
+            'q', model.objects.filter(name__in=names).values_list('pk', flat=True),
+        )
+
+    def readers(self, total):
+        password = make_password(None)
+        names = [f"lecteur_{uuid.uuid4().hex}" for _ in range(total)]
+        User.objects.bulk_create(
+            User(username=name, password=password) for name in names
+        )
+
+        return array(
+            'q', User.objects.filter(username__in=names).values_list('pk', flat=True),
+        )
+
+    def author(self):
+        born = self.rng.randint(1800, 1990)
+        died = born + self.rng.randint(40, 90) if born < 1930 else None
+
+        return (
+            self.rng.choice(FIRST_NAMES),
+            self.rng.choice(LAST_NAMES),
+            datetime.date(born, self.rng.randint(1, 12), self.rng.randint(1, 28)),
+            datetime.date(died, 1, 1) if died else None,
+        )
+
+    def authors(self, total):
+        ids = array('q')
+        for size in self._batches(total):
+            last_pk = _max_pk(Author)
+            with transaction.atomic():
+                insert_rows(
+                    Author, self.AUTHOR_FIELDS,
+                    [self.author() for _ in range(size)],
+                )
+                ids.extend(_new_ids(Author, last_pk))
+            self._progress('author', size)
+
+        return ids
+
+    def book(self, author_ids, language_ids, isbn):
+        noun = self.rng.choice(TITLE_NOUNS)
+        adjective = self.rng.choice(TITLE_ADJECTIVES)
+        pages = self.rng.randint(100, 900)
+
+        return (
+            f"Le {noun} {adjective}",
+            f"Un {noun} {adjective}, raconté en {pages} pages.",
+            f"978{isbn:010d}",
+            self.pick(author_ids),
+            self.pick(language_ids),
+        )
+
+    def books(self, total, author_ids, language_ids, genre_ids):
+        ids = array('q')
+        first_isbn = Book.objects.count()
+        for size in self._batches(total):
+            last_pk = _max_pk(Book)
+            with transaction.atomic():
+                insert_rows(Book, self.BOOK_FIELDS, [
+                    self.book(author_ids, language_ids, first_isbn + len(ids) + n)
+                    for n in range(size)
+                ])
+                new_ids = _new_ids(Book, last_pk)
+                insert_rows(Book.genre.through, ('book', 'genre'), [
+                    (book_id, genre_id)
+                    for book_id in new_ids
+                    for genre_id in {self.pick(genre_ids), self.pick(genre_ids)}
+                ])
+            ids.extend(new_ids)
+            self._progress('book', size)
+
+        return ids
+
+    def copy(self, book_ids, reader_ids):
+        status = self.rng.choices(
+            [status for status, _ in STATUS_WEIGHTS],
+            [weight for _, weight in STATUS_WEIGHTS],
+        )[0]
+        borrower = due_back = None
+        if status in ('o', 'r') and reader_ids:
+            # Some loans are overdue.
+            days = self.rng.randint(-30, 21) if status == 'o' else self.rng.randint(0, 7)
+            borrower = self.rng.choice(reader_ids)
+            due_back = self.today + datetime.timedelta(days=days)
+
+        return (
+            uuid.uuid4(),
+            self.pick(book_ids),
+            f"{self.rng.choice(PUBLISHERS)}, {self.rng.randint(1950, 2020)}",
+            status,
+            borrower,
+            due_back,
+        )
+
+    def copies(self, total, book_ids, reader_ids):
+        for size in self._batches(total):
+            with transaction.atomic():
+                insert_rows(
+                    BookInstance, self.COPY_FIELDS,
+                    [self.copy(book_ids, reader_ids) for _ in range(size)],
+                )
+            self._progress('bookinstance', size)
+
+    def run(self, authors, books, copies, readers=100):
+        db = transaction.get_connection()
+        if db.vendor == 'sqlite':
+            with db.cursor() as cursor:
+                cursor.execute("PRAGMA cache_size = -262144")
+        language_ids = self._names(Language, LANGUAGES)
+        genre_ids = self._names(Genre, GENRES)
+        reader_ids = self.readers(readers)
+        # New books and copies go to the rows just created, or to the whole
+        # catalog when none are created (e.g. to add copies only).
+        author_ids = self.authors(authors) or _new_ids(Author, 0)
+        if books and not author_ids:
+            raise ValueError("Books need authors.")
+        book_ids = (
+            self.books(books, author_ids, language_ids, genre_ids)
+            or _new_ids(Book, 0)
+        )
+        if copies and not book_ids:
+            raise ValueError("Copies need books.")
+        self.copies(copies, book_ids, reader_ids)
+
+        counters.recount()
+        search.rebuild_index()
+        stats.invalidate_stats()
+        versions.bump('authors', 'books', 'copies')
+
+        return self.totals
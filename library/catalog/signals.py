@@ -0,0 +1,225 @@
+from functools import partial
+
+from django.contrib.auth.models import Group, Permission, User
+from django.db import transaction
+from django.db.models.signals import (
+    m2m_changed,
+    post_delete,
+    post_init,
+    post_save,
+    pre_delete,
+    pre_save,
+)
+from django.dispatch import receiver
+
+from . import counters, search, stats, versions
+from .backends import user_version
+from .models import Author, Book, BookInstance, Genre, Language
+
+
+def _adjust_stats_on_commit(**deltas):
+    transaction.on_commit(partial(stats.adjust_stats, **deltas))
+
+
+def _bump_versions(*names):
+    # Bump right away so the transaction itself never reads stale pages, and
+    # again after commit so that a page cached by a concurrent request
+    # before the commit is not served afterwards.
+    versions.bump(*names)
+    transaction.on_commit(partial(versions.bump, *names))
+
+
+@receiver(post_init, sender=Book)
+def remember_initial_author(sender, instance, **kwargs):
+    instance._initial_author_id = instance.__dict__.get('author_id')
+
+
+@receiver(post_init, sender=BookInstance)
+def remember_initial_book_and_status(sender, instance, **kwargs):
+    instance._initial_book_id = instance.__dict__.get('book_id')
+    # Reading a deferred status would cost a query per instance: it is only
+    # read if the copy is saved or deleted (see read_deferred_status).
+    if 'status' in instance.__dict__:
+        instance._initial_status = instance.status
+
+
+@receiver(pre_save, sender=BookInstance)
+@receiver(pre_delete, sender=BookInstance)
+def read_deferred_status(sender, instance, **kwargs):
+    if not hasattr(instance, '_initial_status'):
+        instance._initial_status = sender.objects.filter(
+            pk=instance.pk,
+        ).values_list('status', flat=True).first()
+
+
+@receiver(post_save, sender=Author)
+def author_saved(sender, instance, created, **kwargs):
+    book_ids = []
+    if created:
+        counters.increment(Author, 1)
+        _adjust_stats_on_commit(authors_count=1)
+    else:
+        book_ids = list(instance.book_set.values_list('pk', flat=True))
+        search.index_books(book_ids)
+
+    # Book pages and lists show the author's name.
+    _bump_versions(
+        'authors', 'books', *versions.for_authors([instance.pk]),
+        *versions.for_books(book_ids),
+    )
+
+
+@receiver(pre_delete, sender=Author)
+def remember_author_books(sender, instance, **kwargs):
+    instance._book_ids = list(instance.book_set.values_list('pk', flat=True))
+
+
+@receiver(post_delete, sender=Author)
+def author_deleted(sender, instance, **kwargs):
+    counters.increment(Author, -1)
+    _adjust_stats_on_commit(authors_count=-1)
+    search.index_books(instance._book_ids)
+    _bump_versions(
+        'authors', 'books', *versions.for_authors([instance.pk]),
+        *versions.for_books(instance._book_ids),
+    )
+
+
+@receiver(post_save, sender=Book)
+def book_saved(sender, instance, created, **kwargs):
+    if created:
+        counters.increment(Book, 1)
+        _adjust_stats_on_commit(books_count=1)
+    search.index_books([instance.pk])
+
+    _bump_versions(
+        'books', *versions.for_books([instance.pk]),
+        *versions.for_authors([instance.author_id, instance._initial_author_id]),
+    )
+    instance._initial_author_id = instance.author_id
+
+
+@receiver(post_delete, sender=Book)
+def book_deleted(sender, instance, **kwargs):
+    counters.increment(Book, -1)
+    _adjust_stats_on_commit(books_count=-1)
+    search.remove_books([instance.pk])
+    _bump_versions(
+        'books', *versions.for_books([instance.pk]),
+        *versions.for_authors([instance._initial_author_id]),
+    )
+
+
+@receiver(m2m_changed, sender=Book.genre.through)
+def book_genres_changed(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        book_ids = [instance.pk]
+    elif pk_set is not None:
+        book_ids = pk_set
+    else:
+        # genre.book_set.clear(): the affected books are no longer known.
+        book_ids = []
+
+    _bump_versions('books', *versions.for_books(book_ids))
+
+
+@receiver(pre_delete, sender=Genre)
+@receiver(pre_delete, sender=Language)
+def remember_related_books(sender, instance, **kwargs):
+    instance._book_ids = list(instance.book_set.values_list('pk', flat=True))
+
+
+@receiver(post_save, sender=Genre)
+@receiver(post_save, sender=Language)
+def genre_or_language_saved(sender, instance, created, **kwargs):
+    book_ids = [] if created else instance.book_set.values_list('pk', flat=True)
+
+    _bump_versions('books', *versions.for_books(book_ids))
+
+
+@receiver(post_delete, sender=Genre)
+@receiver(post_delete, sender=Language)
+def genre_or_language_deleted(sender, instance, **kwargs):
+    _bump_versions('books', *versions.for_books(instance._book_ids))
+
+
+def bump_copy_versions(book_ids):
+    book_ids = {pk for pk in book_ids if pk is not None}
+    # Author pages show the number of copies of each book.
+    author_ids = Book.objects.filter(pk__in=book_ids).values_list(
+        'author_id', flat=True,
+    )
+
+    _bump_versions(
+        'copies', *versions.for_books(book_ids),
+        *versions.for_authors(author_ids),
+    )
+
+
+@receiver(post_save, sender=BookInstance)
+def book_instance_saved(sender, instance, created, **kwargs):
+    was_available = not created and instance._initial_status == 'a'
+    is_available = instance.status == 'a'
+
+    if created:
+        counters.increment(BookInstance, 1, status=instance.status)
+    elif instance.status != instance._initial_status:
+        counters.increment(BookInstance, -1, status=instance._initial_status)
+        counters.increment(BookInstance, 1, status=instance.status)
+
+    _adjust_stats_on_commit(
+        instances_count=1 if created else 0,
+        available_instances_count=is_available - was_available,
+    )
+    bump_copy_versions([instance.book_id, instance._initial_book_id])
+
+    instance._initial_status = instance.status
+    instance._initial_book_id = instance.book_id
+
+
+@receiver(post_delete, sender=BookInstance)
+def book_instance_deleted(sender, instance, **kwargs):
+    counters.increment(BookInstance, -1, status=instance._initial_status)
+    _adjust_stats_on_commit(
+        instances_count=-1,
+        available_instances_count=-(instance._initial_status == 'a'),
+    )
+    bump_copy_versions([instance._initial_book_id])
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def user_changed(sender, instance, **kwargs):
+    _bump_versions(user_version(instance.pk))
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def user_groups_or_permissions_changed(sender, instance, action, reverse,
+                                       pk_set, **kwargs):
+    if not action.startswith('post_'):
+        return
+
+    if not reverse:
+        _bump_versions(user_version(instance.pk))
+    elif pk_set is not None:
+        _bump_versions(*(user_version(pk) for pk in pk_set))
+    else:
+        # group.user_set.clear(): the affected users are no longer known.
+        _bump_versions('auth')
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def group_permissions_changed(sender, action, **kwargs):
+    if action.startswith('post_'):
+        _bump_versions('auth')
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_save, sender=Permission)
+@receiver(post_delete, sender=Permission)
+def group_or_permission_changed(sender, **kwargs):
+    _bump_versions('auth')
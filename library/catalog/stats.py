@@ -0,0 +1,90 @@
+"""Catalog statistics displayed on the home page.
+
+Counts are read from the ``CatalogCounter`` table in a single query and kept
+in the cache, one key per counter so that signal handlers can adjust them
+atomically with ``cache.incr()`` / ``cache.decr()``.
+
+Adjustments and invalidations only reach the cache of the process making
+them: without a cache shared by every process (``CATALOG_SHARED_CACHE`` is
+False), the counts are read from the counter table on each call instead.
+"""
+
+from django.conf import settings
+from django.core.cache import cache
+
+from . import counters
+
+
+# Bump when the meaning of a counter changes so stale entries are ignored.
+STATS_CACHE_VERSION = 1
+STATS_CACHE_TIMEOUT = 60 * 60
+STATS_KEY_PREFIX = 'catalog:stats:'
+
+STATS_NAMES = (
+    'authors_count',
+    'books_count',
+    'instances_count',
+    'available_instances_count',
+)
+
+
+def _cache_key(name):
+    return STATS_KEY_PREFIX + name
+
+
+def compute_stats():
+    """Read authors, books, copies and available copies in one query."""
+    totals = counters.read_totals()
+
+    return {name: totals[name] for name in STATS_NAMES}
+
+
+def get_stats():
+    """Return the catalog counters, from the cache when it is warm."""
+    if not settings.CATALOG_SHARED_CACHE:
+        return compute_stats()
+
+    keys = {name: _cache_key(name) for name in STATS_NAMES}
+    cached = cache.get_many(keys.values(), version=STATS_CACHE_VERSION)
+
+    if len(cached) == len(keys):
+        return {name: cached[key] for name, key in keys.items()}
+
+    stats = compute_stats()
+    cache.set_many(
+        {keys[name]: value for name, value in stats.items()},
+        timeout=STATS_CACHE_TIMEOUT,
+        version=STATS_CACHE_VERSION,
+    )
+
+    return stats
+
+
+def adjust_stats(**deltas):
+    """Apply ``name=delta`` adjustments to the cached counters.
+
+    A counter missing from the cache is left alone: the next read recomputes
+    everything. If a counter cannot be adjusted, the whole set is dropped
+    so the cache never mixes fresh and stale values.
+    """
+    if not settings.CATALOG_SHARED_CACHE:
+        return
+
+    for name, delta in deltas.items():
+        if not delta:
+            continue
+        try:
+            cache.incr(_cache_key(name), delta, version=STATS_CACHE_VERSION)
+        except ValueError:
+            invalidate_stats()
+            return
+
+
+def invalidate_stats():
+    if not settings.CATALOG_SHARED_CACHE:
+        return
+
+    cache.delete_many(
+        [_cache_key(name) for name in STATS_NAMES],
+        version=STATS_CACHE_VERSION,
+    )
@@ -0,0 +1,218 @@
+import datetime
+
+from django.contrib.auth.models import User
+from django.db import connection
+from django.test import TestCase
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.admin import EstimatedCountPaginator
+from catalog.models import Author, Book, BookInstance, Genre, Language
+
+
+class CatalogAdminTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='1X<ISRUkw+tuK',
+        )
+        cls.author = Author.objects.create(first_name="John", last_name="Doe")
+        cls.genres = [Genre.objects.create(name=f"Genre {i}") for i in range(4)]
+
+    def setUp(self):
+        self.client.login(username='admin', password='1X<ISRUkw+tuK')
+
+    def create_books(self, nb_of_books):
+        for book_id in range(nb_of_books):
+            book = Book.objects.create(
+                title=f"Book {book_id}", summary="", isbn="1234567891234",
+                author=self.author,
+            )
+            book.genre.set(self.genres)
+            BookInstance.objects.create(
+                book=book, imprint=f"B{book_id}", status='o',
+                due_back=datetime.date.today() - datetime.timedelta(days=book_id),
+            )
+
+    def count_queries(self, url, **params):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url, params)
+        self.assertEqual(response.status_code, 200)
+
+        return queries
+
+    def test_book_changelist_query_count_does_not_depend_on_rows(self):
+        url = reverse('admin:catalog_book_changelist')
+        self.create_books(2)
+        self.count_queries(url)
+        expected = len(self.count_queries(url))
+
+        self.create_books(20)
+
+        self.assertEqual(len(self.count_queries(url)), expected)
+        self.assertContains(self.client.get(url), "Genre 0, Genre 1, Genre 2")
+
+    def test_copies_changelist_never_counts_the_table(self):
+        self.create_books(5)
+        url = reverse('admin:catalog_bookinstance_changelist')
+
+        for params in ({}, {'status__exact': 'o'}, {'due': 'overdue'}):
+            queries = self.count_queries(url, **params)
+            counts = [
+                query['sql'] for query in queries
+                if 'COUNT(' in query['sql'] and 'catalog_bookinstance' in query['sql']
+            ]
+            for sql in counts:
+                self.assertIn("LIMIT", sql)
+
+    def test_overdue_filter(self):
+        self.create_books(3)
+
+        response = self.client.get(
+            reverse('admin:catalog_bookinstance_changelist'), {'due': 'overdue'},
+        )
+
+        self.assertEqual(response.context['cl'].result_count, 2)
+
+    def test_estimated_count_paginator(self):
+        self.create_books(3)
+
+        paginator = EstimatedCountPaginator(BookInstance.objects.all(), 100)
+        with self.assertNumQueries(1):
+            self.assertEqual(paginator.count, 3)
+
+        paginator = EstimatedCountPaginator(BookInstance.objects.filter(status='o'), 1)
+        paginator.max_count = 2
+        self.assertEqual(paginator.count, 2)
+
+
+class PaginatedInlineTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='1X<ISRUkw+tuK',
+        )
+        cls.language = Language.objects.create(name="English")
+        cls.author = Author.objects.create(first_name="John", last_name="Doe")
+
+    def setUp(self):
+        self.client.login(username='admin', password='1X<ISRUkw+tuK')
+
+    def create_books(self, nb_of_books):
+        for book_id in range(nb_of_books):
+            Book.objects.create(
+                title=f"Book {book_id:03}", summary="", isbn="1234567891234",
+                author=self.author, language=self.language,
+            )
+
+    def get_author_page(self, **params):
+        return self.client.get(
+            reverse('admin:catalog_author_change', args=[self.author.pk]), params,
+        )
+
+    def test_query_count_does_not_depend_on_books(self):
+        self.create_books(3)
+        self.get_author_page()
+        with CaptureQueriesContext(connection) as queries:
+            self.get_author_page()
+        expected = len(queries)
+
+        self.create_books(60)
+
+        with self.assertNumQueries(expected):
+            response = self.get_author_page()
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(len(formset.forms), 20)
+        self.assertContains(response, "1-20 sur 63")
+
+    def test_inline_pages(self):
+        self.create_books(25)
+
+        response = self.get_author_page(**{'book_set-page': 2})
+
+        formset = response.context['inline_admin_formsets'][0].formset
+        self.assertEqual(
+            [form.instance.title for form in formset.forms][:2],
+            ["Book 020", "Book 021"],
+        )
+        self.assertIsNotNone(formset.previous_page_url)
+        self.assertIsNone(formset.next_page_url)
+
+    def test_saving_a_page(self):
+        self.create_books(25)
+        url = reverse('admin:catalog_author_change', args=[self.author.pk])
+        response = self.get_author_page(**{'book_set-page': 2})
+        formset = response.context['inline_admin_formsets'][0].formset
+
+        data = {
+            'first_name': "John", 'last_name': "Doe",
+            'book_set-TOTAL_FORMS': len(formset.forms),
+            'book_set-INITIAL_FORMS': len(formset.forms),
+            'book_set-MIN_NUM_FORMS': 0,
+            'book_set-MAX_NUM_FORMS': 1000,
+        }
+        for index, form in enumerate(formset.forms):
+            data.update({
+                f'book_set-{index}-id': form.instance.pk,
+                f'book_set-{index}-author': self.author.pk,
+                f'book_set-{index}-title': form.instance.title.upper(),
+                f'book_set-{index}-isbn': form.instance.isbn,
+                f'book_set-{index}-language': self.language.pk,
+            })
+
+        response = self.client.post(f'{url}?book_set-page=2', data)
+
+        self.assertEqual(response.status_code, 302)
+        self.assertTrue(Book.objects.filter(title="BOOK 024").exists())
+        self.assertTrue(Book.objects.filter(title="Book 019").exists())
+
+    def test_books_cannot_be_added_inline(self):
+        self.create_books(1)
+        book = Book.objects.get()
+        url = reverse('admin:catalog_author_change', args=[self.author.pk])
+
+        response = self.get_author_page()
+        self.assertFalse(response.context['inline_admin_formsets'][0].has_add_permission)
+        self.assertContains(response, reverse('admin:catalog_book_change', args=[book.pk]))
+
+        response = self.client.post(url, {
+            'first_name': "John", 'last_name': "Doe",
+            'book_set-TOTAL_FORMS': 2,
+            'book_set-INITIAL_FORMS': 1,
+            'book_set-MIN_NUM_FORMS': 0,
+            'book_set-MAX_NUM_FORMS': 1000,
+            'book_set-0-id': book.pk,
+            'book_set-0-author': self.author.pk,
+            'book_set-0-title': book.title,
+            'book_set-0-isbn': book.isbn,
+            'book_set-0-language': self.language.pk,
+            'book_set-1-author': self.author.pk,
+            'book_set-1-title': "Without summary nor genre",
+            'book_set-1-isbn': "1234567891235",
+        })
+
+        self.assertEqual(response.status_code, 302)
+        self.assertEqual(Book.objects.count(), 1)
+
+    def test_book_copies_query_count_does_not_depend_on_copies(self):
+        self.create_books(1)
+        book = Book.objects.get()
+        borrower = User.objects.get(username='admin')
+        url = reverse('admin:catalog_book_change', args=[book.pk])
+
+        def create_copies(nb_of_copies):
+            for copy_id in range(nb_of_copies):
+                BookInstance.objects.create(
+                    book=book, imprint=f"B{copy_id}", status='o', borrower=borrower,
+                )
+
+        create_copies(2)
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(url)
+
+        create_copies(40)
+        with self.assertNumQueries(len(queries)):
+            self.client.get(url)
@@ -0,0 +1,122 @@
+import datetime
+
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+from catalog import versions
+from catalog.models import Author, Book, BookInstance
+
+
+class CatalogApiTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.author = Author.objects.create(first_name="John", last_name="Doe")
+        for book_id in range(5):
+            book = Book.objects.create(
+                title=f"Book {book_id}",
+                summary="A story by John Doe",
+                isbn=f"978000000000{book_id}",
+                author=cls.author,
+            )
+        cls.book = book
+        BookInstance.objects.create(book=book, imprint="B1", status='a')
+        BookInstance.objects.create(
+            book=book, imprint="B2", status='o',
+            due_back=datetime.date(2030, 1, 1),
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_list_with_sparse_fields_and_cursor(self):
+        url = reverse('api_list', kwargs={'resource_name': 'books'})
+
+        response = self.client.get(url, {'fields': 'id,title', 'limit': 3})
+
+        self.assertEqual(response.status_code, 200)
+        data = response.json()
+        self.assertEqual(data['results'][0], {'id': Book.objects.get(title="Book 0").pk, 'title': "Book 0"})
+        self.assertEqual(len(data['results']), 3)
+
+        response = self.client.get(url, {'fields': 'title', 'cursor': data['next']})
+        titles = [book['title'] for book in response.json()['results']]
+        self.assertEqual(titles, ["Book 3", "Book 4"])
+        self.assertIsNone(response.json()['next'])
+
+    def test_unknown_field_is_rejected(self):
+        response = self.client.get(
+            reverse('api_list', kwargs={'resource_name': 'authors'}),
+            {'fields': 'password'},
+        )
+
+        self.assertEqual(response.status_code, 400)
+
+    def test_detail_and_missing_object(self):
+        response = self.client.get(reverse(
+            'api_detail', kwargs={'resource_name': 'authors', 'pk': self.author.pk},
+        ))
+        self.assertEqual(response.json()['last_name'], "Doe")
+
+        response = self.client.get(reverse(
+            'api_detail', kwargs={'resource_name': 'copies', 'pk': 'not-a-uuid'},
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_copies_filtered_by_book(self):
+        response = self.client.get(
+            reverse('api_list', kwargs={'resource_name': 'copies'}),
+            {'book': self.book.pk, 'status': 'o'},
+        )
+
+        self.assertEqual([copy['imprint'] for copy in response.json()['results']], ["B2"])
+
+    def test_availability(self):
+        response = self.client.get(reverse(
+            'api_book_availability', kwargs={'pk': self.book.pk},
+        ))
+
+        data = response.json()
+        self.assertEqual(data['total'], 2)
+        self.assertEqual(data['available'], 1)
+        self.assertEqual(data['next_due_back'], '2030-01-01')
+
+    # The test runs in a single process, whose local memory cache is shared.
+    @override_settings(CATALOG_SHARED_CACHE=True)
+    def test_conditional_get_returns_304_without_queries(self):
+        url = reverse('api_list', kwargs={'resource_name': 'books'})
+        response = self.client.get(url)
+        etag = response['ETag']
+        self.assertTrue(response.has_header('Last-Modified'))
+
+        with self.assertNumQueries(0):
+            response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 304)
+
+        versions.bump('books')
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response['ETag'], etag)
+
+    @override_settings(CATALOG_SHARED_CACHE=False)
+    def test_no_validators_without_a_shared_cache(self):
+        # Another process may have changed the data without bumping our versions.
+        url = reverse('api_list', kwargs={'resource_name': 'books'})
+        response = self.client.get(url)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertFalse(response.has_header('ETag'))
+        self.assertFalse(response.has_header('Last-Modified'))
+        self.assertEqual(
+            self.client.get(url, HTTP_IF_MODIFIED_SINCE='Tue, 1 Jan 2030 00:00:00 GMT').status_code,
+            200,
+        )
+
+    @override_settings(CATALOG_SHARED_CACHE=False)
+    def test_versions_are_not_stored_without_a_shared_cache(self):
+        versions.bump('books')
+        first = versions.get_versions('books')['books']
+
+        self.assertIsNone(cache.get(versions._key('books')))
+        self.assertGreaterEqual(versions.get_versions('books')['books'], first)
@@ -0,0 +1,207 @@
+import asyncio
+import csv
+import datetime
+import io
+import os
+import runpy
+import time
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.handlers.asgi import ASGIHandler
+from django.http import HttpResponse
+from django.test import SimpleTestCase, TransactionTestCase, override_settings
+from django.urls import path
+from django.utils.module_loading import import_string
+
+import library.settings
+from catalog import async_views, exports
+from catalog.models import Author, Book, BookInstance
+from library import handlers
+from library.static import StaticFilesApplication
+
+
+async def slow_view(request):
+    await asyncio.sleep(0.3)
+
+    return HttpResponse("lent")
+
+
+urlpatterns = [
+    path('slow/', slow_view),
+    path('export/<slug:dataset>.<slug:format>', async_views.export_dataset),
+]
+
+
+def asgi_settings():
+    """The settings module as library/asgi.py loads it."""
+    with mock.patch.dict(os.environ, {'CATALOG_ASYNC_VIEWS': 'True'}):
+        return runpy.run_path(library.settings.__file__)
+
+
+async def call(application, path, method='GET', headers=()):
+    """Run one HTTP request through ``application``; return its messages."""
+    scope = {
+        'type': 'http', 'asgi': {'version': '3.0'}, 'http_version': '1.1',
+        'method': method, 'scheme': 'http', 'path': path, 'root_path': '',
+        'query_string': b'', 'headers': [(b'host', b'localhost'), *headers],
+        'client': ('127.0.0.1', 50000), 'server': ('localhost', 80),
+    }
+    messages = []
+
+    async def receive():
+        return {'type': 'http.request', 'body': b''}
+
+    async def send(message):
+        messages.append(message)
+
+    await application(scope, receive, send)
+
+    return messages
+
+
+def response_of(messages):
+    start, *bodies = messages
+    headers = {name.decode(): value.decode() for name, value in start['headers']}
+
+    return start['status'], headers, b''.join(body.get('body', b'') for body in bodies)
+
+
+class ASGIMiddlewareTest(SimpleTestCase):
+
+    def test_middleware_is_async_capable(self):
+        # A single sync-only middleware would run every request in one thread.
+        for middleware in asgi_settings()['MIDDLEWARE']:
+            with self.subTest(middleware=middleware):
+                self.assertTrue(import_string(middleware).async_capable)
+
+    def test_requests_run_concurrently(self):
+        with override_settings(ROOT_URLCONF=__name__, MIDDLEWARE=asgi_settings()['MIDDLEWARE']):
+            application = ASGIHandler()
+
+        async def four_requests():
+            return await asyncio.gather(*(call(application, '/slow/') for _ in range(4)))
+
+        with override_settings(ROOT_URLCONF=__name__):
+            started = time.perf_counter()
+            responses = async_to_sync(four_requests)()
+            elapsed = time.perf_counter() - started
+
+        self.assertEqual([response_of(messages)[0] for messages in responses], [200] * 4)
+        self.assertLess(elapsed, 0.9)
+
+
+# The ORM runs in the pool threads of catalog.async_views, with their own
+# connections: the data must be committed.
+class ASGIExportTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.librarian = User.objects.create_user(
+            username='librarian', password='2HJ1vRV0Z&3iD',
+        )
+        self.librarian.user_permissions.add(Permission.objects.get(
+            codename='can_mark_returned',
+        ))
+        author = Author.objects.create(first_name="John", last_name="Doe")
+        for number in range(5):
+            book = Book.objects.create(
+                title=f"Book {number}, with a comma",
+                summary="A story by John Doe",
+                isbn=f"123456789123{number}",
+                author=author,
+            )
+            BookInstance.objects.create(
+                book=book, imprint=f"SBJD{number}", status='o',
+                borrower=self.librarian,
+                due_back=None if number == 2 else datetime.date(2030, 1, 1 + number % 2),
+            )
+
+        with override_settings(ROOT_URLCONF=__name__, MIDDLEWARE=asgi_settings()['MIDDLEWARE']):
+            self.application = handlers.ASGIHandler()
+
+    def export(self, path, user=None):
+        headers = []
+        if user is not None:
+            self.client.force_login(user)
+            session = self.client.cookies['sessionid'].value
+            headers.append((b'cookie', f'sessionid={session}'.encode()))
+
+        with override_settings(ROOT_URLCONF=__name__):
+            return response_of(async_to_sync(call)(self.application, path, headers=headers))
+
+    def test_books_csv(self):
+        # Several chunks, each fetched by its own query.
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 2):
+            status, headers, body = self.export('/export/books.csv', self.librarian)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['Content-Type'], 'text/csv; charset=utf-8')
+        self.assertEqual(headers['Content-Disposition'], 'attachment; filename="books.csv"')
+        self.assertEqual(body.decode(), ''.join(exports.iter_export('books', 'csv')))
+        rows = list(csv.reader(io.StringIO(body.decode())))
+        self.assertEqual(len(rows), 6)
+        self.assertEqual(rows[1][2], "Book 0, with a comma")
+
+    def test_loans_jsonl(self):
+        # The keyset on (due_back, uuid) keeps the order of iter_export, NULLs included.
+        with mock.patch.object(exports, 'EXPORT_CHUNK_SIZE', 2):
+            status, _, body = self.export('/export/loans.jsonl', self.librarian)
+
+        self.assertEqual(status, 200)
+        self.assertEqual(body.decode(), ''.join(exports.iter_export('loans', 'jsonl')))
+        self.assertEqual(len(body.splitlines()), 5)
+
+    def test_requires_permission(self):
+        status, headers, _ = self.export('/export/books.csv')
+
+        self.assertEqual(status, 302)
+        self.assertIn('/accounts/login/', headers['Location'])
+
+    def test_unknown_dataset(self):
+        status, _, _ = self.export('/export/members.csv', self.librarian)
+
+        self.assertEqual(status, 404)
+
+
+@override_settings(DEBUG=True)
+class StaticFilesApplicationTest(SimpleTestCase):
+
+    def setUp(self):
+        self.passed_through = []
+
+        async def application(scope, receive, send):
+            self.passed_through.append(scope['path'])
+            await send({'type': 'http.response.start', 'status': 204, 'headers': []})
+            await send({'type': 'http.response.body', 'body': b''})
+
+        self.application = StaticFilesApplication(application)
+
+    def test_serves_static_files(self):
+        status, headers, body = response_of(
+            async_to_sync(call)(self.application, '/static/css/style.css')
+        )
+
+        self.assertEqual(status, 200)
+        self.assertEqual(headers['content-type'], 'text/css; charset="utf-8"')
+        self.assertEqual(int(headers['content-length']), len(body))
+        self.assertEqual(self.passed_through, [])
+
+    def test_not_modified(self):
+        _, headers, _ = response_of(
+            async_to_sync(call)(self.application, '/static/css/style.css')
+        )
+        status, _, body = response_of(async_to_sync(call)(
+            self.application, '/static/css/style.css',
+            headers=[(b'if-none-match', headers['etag'].encode())],
+        ))
+
+        self.assertEqual((status, body), (304, b''))
+
+    def test_other_requests_go_to_django(self):
+        status, _, _ = response_of(async_to_sync(call)(self.application, '/catalog/'))
+
+        self.assertEqual(status, 204)
+        self.assertEqual(self.passed_through, ['/catalog/'])
@@ -0,0 +1,68 @@
+import datetime
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser
+from django.core.cache import cache
+from django.http import Http404
+from django.test import RequestFactory, TransactionTestCase
+
+from catalog import async_views
+from catalog.models import Author, Book, BookInstance
+
+
+# The ORM runs in pool threads with their own connections: the data must be
+# committed to be visible, hence TransactionTestCase.
+class AsyncViewsTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(first_name="John", last_name="Doe")
+        self.book = Book.objects.create(
+            title="Some book of John Doe",
+            summary="A story by John Doe",
+            isbn="1234567891234",
+            author=self.author,
+        )
+        for copy_id in range(12):
+            BookInstance.objects.create(
+                book=self.book, imprint=f"SBJD{copy_id}",
+                status='o' if copy_id % 2 else 'a',
+                due_back=datetime.date(2030, 1, 1) + datetime.timedelta(days=copy_id),
+            )
+
+    def get(self, view, path='/', **kwargs):
+        request = RequestFactory().get(path)
+        request.user = AnonymousUser()
+
+        return async_to_sync(view)(request, **kwargs)
+
+    def test_index(self):
+        response = self.get(async_views.index)
+
+        self.assertEqual(response.status_code, 200)
+        self.assertIn(b"<strong>12</strong> exemplaires", response.content)
+        self.assertIn(async_views.visits.VISITS_COOKIE, response.cookies)
+
+    def test_list_views(self):
+        self.assertContains(self.get(async_views.book_list), "Some book of John Doe")
+        self.assertContains(self.get(async_views.author_list), "Doe")
+
+    def test_book_detail(self):
+        response = self.get(async_views.book_detail, pk=self.book.pk)
+
+        self.assertContains(response, "<strong>12</strong> exemplaire(s)")
+        self.assertContains(response, "SBJD9")
+        self.assertNotContains(response, "SBJD10")
+
+        cached = self.get(async_views.book_detail, pk=self.book.pk)
+        self.assertEqual(cached.content, response.content)
+
+    def test_author_detail(self):
+        response = self.get(async_views.author_detail, pk=self.author.pk)
+
+        self.assertContains(response, "<strong>12</strong> exemplaire(s)")
+        self.assertContains(response, "<strong>6</strong> disponible(s)")
+
+    def test_missing_object(self):
+        with self.assertRaises(Http404):
+            self.get(async_views.book_detail, pk=self.book.pk + 1)
@@ -0,0 +1,101 @@
+from django.contrib.auth.models import Group, Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.test import SimpleTestCase, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog import checks
+
+
+AUTH_TABLES = ('FROM "auth_', 'FROM "django_session')
+
+
+# As configured when the cache is shared by every process.
+@override_settings(
+    CATALOG_SHARED_CACHE=True,
+    SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+    AUTHENTICATION_BACKENDS=['catalog.backends.CachedModelBackend'],
+)
+class CachedModelBackendTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.permission = Permission.objects.get(codename='can_mark_returned')
+        self.librarian = User.objects.create_user(
+            username='librarian', password='1X<ISRUkw+tuK',
+        )
+        self.librarian.user_permissions.add(self.permission)
+        self.group = Group.objects.create(name="Bibliothécaires")
+        self.client.login(username='librarian', password='1X<ISRUkw+tuK')
+
+    def get_loans(self):
+        return self.client.get(reverse('all_borrowed'))
+
+    def test_warm_page_view_runs_no_auth_query(self):
+        self.get_loans()
+
+        with CaptureQueriesContext(connection) as queries:
+            response = self.get_loans()
+
+        self.assertEqual(response.status_code, 200)
+        auth_queries = [
+            query['sql'] for query in queries
+            if any(table in query['sql'] for table in AUTH_TABLES)
+        ]
+        self.assertEqual(auth_queries, [])
+
+    def test_removed_user_permission_is_not_cached(self):
+        self.assertEqual(self.get_loans().status_code, 200)
+
+        self.librarian.user_permissions.remove(self.permission)
+
+        self.assertEqual(self.get_loans().status_code, 403)
+
+    def test_group_permission_changes_are_not_cached(self):
+        self.librarian.user_permissions.clear()
+        self.group.user_set.add(self.librarian)
+        self.assertEqual(self.get_loans().status_code, 403)
+
+        self.group.permissions.add(self.permission)
+        self.assertEqual(self.get_loans().status_code, 200)
+
+        self.group.permissions.clear()
+        self.assertEqual(self.get_loans().status_code, 403)
+
+    def test_inactive_user_is_logged_out(self):
+        self.assertEqual(self.get_loans().status_code, 200)
+
+        self.librarian.is_active = False
+        self.librarian.save()
+
+        self.assertEqual(self.get_loans().status_code, 302)
+
+
+class PerProcessCacheCheckTest(SimpleTestCase):
+
+    @override_settings(
+        CATALOG_SHARED_CACHE=False,
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        AUTHENTICATION_BACKENDS=['catalog.backends.CachedModelBackend'],
+    )
+    def test_cached_sessions_and_permissions_are_refused(self):
+        errors = checks.check_per_process_cache(None)
+
+        self.assertEqual([error.id for error in errors], ['catalog.E001', 'catalog.E002'])
+
+    @override_settings(
+        CATALOG_SHARED_CACHE=True,
+        SESSION_ENGINE='django.contrib.sessions.backends.cached_db',
+        AUTHENTICATION_BACKENDS=['catalog.backends.CachedModelBackend'],
+    )
+    def test_shared_cache(self):
+        self.assertEqual(checks.check_per_process_cache(None), [])
+
+    @override_settings(
+        CATALOG_SHARED_CACHE=False,
+        SESSION_ENGINE='django.contrib.sessions.backends.db',
+        AUTHENTICATION_BACKENDS=['django.contrib.auth.backends.ModelBackend'],
+    )
+    def test_database_sessions_and_permissions(self):
+        self.assertEqual(checks.check_per_process_cache(None), [])
@@ -0,0 +1,212 @@
+import datetime
+import json
+from io import StringIO
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
+from django.urls import reverse
+
+from catalog import circulation, counters, stats
+from catalog.forms import BulkCirculationForm
+from catalog.models import Book, BookInstance
+
+
+class CirculationTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(
+            title="Some book", summary="A story", isbn="1234567891234",
+        )
+        self.reader = User.objects.create_user(username='reader')
+
+    def create_copies(self, nb_of_copies, status='o'):
+        copies = [
+            BookInstance(
+                book=self.book, imprint=f"SB{copy_id}", status=status,
+                borrower=self.reader if status == 'o' else None,
+                due_back=datetime.date.today() if status == 'o' else None,
+            )
+            for copy_id in range(nb_of_copies)
+        ]
+        BookInstance.objects.bulk_create(copies)
+        counters.recount()
+
+        return [copy.uuid for copy in copies]
+
+    def assertCountersExact(self):
+        self.assertEqual(
+            {key: count for key, count in counters.count_rows().items() if count},
+            {
+                (entity, status): count
+                for entity, status, count in counters.CatalogCounter.objects.filter(
+                    count__gt=0,
+                ).values_list('entity', 'status', 'count')
+            },
+        )
+
+    def test_check_in_a_return_cart_in_a_few_queries(self):
+        on_loan = self.create_copies(500)
+        available = self.create_copies(10, status='a')
+        stats.get_stats()
+
+        with self.assertNumQueries(7):
+            updated = circulation.check_in(on_loan + available)
+
+        self.assertEqual(updated, 500)
+        self.assertFalse(BookInstance.objects.filter(status='o').exists())
+        self.assertFalse(BookInstance.objects.exclude(borrower=None).exists())
+        self.assertCountersExact()
+
+    def test_renew_only_touches_loans(self):
+        on_loan = self.create_copies(3)
+        in_maintenance = self.create_copies(2, status='m')
+        due_back = datetime.date.today() + datetime.timedelta(weeks=2)
+
+        updated = circulation.renew(on_loan + in_maintenance, due_back)
+
+        self.assertEqual(updated, 3)
+        self.assertEqual(BookInstance.objects.filter(due_back=due_back).count(), 3)
+        self.assertCountersExact()
+
+    def test_set_status(self):
+        on_loan = self.create_copies(3)
+        available = self.create_copies(2, status='a')
+
+        updated = circulation.set_status(on_loan + available, 'm')
+
+        self.assertEqual(updated, 5)
+        self.assertEqual(BookInstance.objects.filter(status='m').count(), 5)
+        self.assertCountersExact()
+        with self.assertRaises(ValueError):
+            circulation.set_status(on_loan, 'o')
+
+    def test_check_out_a_copy_once(self):
+        available = self.create_copies(1, status='a')
+        other_reader = User.objects.create_user(username='other_reader')
+
+        self.assertTrue(circulation.check_out(available[0], self.reader))
+        self.assertFalse(circulation.check_out(available[0], other_reader))
+
+        copy = BookInstance.objects.get()
+        self.assertEqual(copy.status, 'o')
+        self.assertEqual(copy.borrower, self.reader)
+        self.assertEqual(copy.due_back, circulation.default_renewal_date())
+        self.assertCountersExact()
+
+    def test_check_out_any_prefers_own_reservation(self):
+        available = self.create_copies(2, status='a')
+        circulation.reserve(available[1], self.reader)
+
+        self.assertEqual(circulation.check_out_any(self.book.pk, self.reader), available[1])
+        self.assertEqual(circulation.check_out_any(self.book.pk, self.reader), available[0])
+        self.assertIsNone(circulation.check_out_any(self.book.pk, self.reader))
+        self.assertCountersExact()
+
+    def test_reserve_any(self):
+        available = self.create_copies(1, status='a')
+        other_reader = User.objects.create_user(username='other_reader')
+
+        self.assertEqual(circulation.reserve_any(self.book.pk, self.reader), available[0])
+        self.assertIsNone(circulation.reserve_any(self.book.pk, other_reader))
+        self.assertFalse(circulation.check_out(available[0], other_reader))
+        self.assertEqual(BookInstance.objects.get().status, 'r')
+        self.assertCountersExact()
+
+    def test_form_validates_renewal_date(self):
+        form = BulkCirculationForm(data={
+            'action': 'renew',
+            'copies': "not-a-uuid",
+            'due_back': datetime.date.today() + datetime.timedelta(weeks=5),
+        })
+
+        self.assertFalse(form.is_valid())
+        self.assertEqual(set(form.errors), {'copies', 'due_back'})
+
+    def test_librarian_view(self):
+        on_loan = self.create_copies(4)
+        librarian = User.objects.create_user(username='librarian', password='1X<ISRUkw+tuK')
+        url = reverse('bulk_circulation')
+
+        self.client.login(username='librarian', password='1X<ISRUkw+tuK')
+        self.assertEqual(self.client.get(url).status_code, 302)
+
+        librarian.user_permissions.add(
+            Permission.objects.get(codename='can_mark_returned'),
+        )
+        response = self.client.post(url, {
+            'action': 'check_in',
+            'copies': "\n".join(str(uuid) for uuid in on_loan[:3]),
+        })
+
+        self.assertEqual(response.context['result'], {'updated': 3, 'ignored': 0})
+        self.assertEqual(BookInstance.objects.filter(status='o').count(), 1)
+
+    def test_check_out_view(self):
+        self.create_copies(1, status='a')
+        librarian = User.objects.create_user(username='librarian', password='1X<ISRUkw+tuK')
+        librarian.user_permissions.add(
+            Permission.objects.get(codename='can_mark_returned'),
+        )
+        self.client.login(username='librarian', password='1X<ISRUkw+tuK')
+        url = reverse('check_out_book', args=[self.book.pk])
+        data = {
+            'borrower': 'reader',
+            'due_back': datetime.date.today() + datetime.timedelta(weeks=2),
+        }
+
+        response = self.client.post(url, data)
+        self.assertRedirects(response, reverse('all_borrowed'))
+        self.assertEqual(BookInstance.objects.get().borrower, self.reader)
+
+        response = self.client.post(url, data)
+        self.assertEqual(
+            response.context['form'].non_field_errors(),
+            ["Aucun exemplaire de ce livre n'est disponible."],
+        )
+
+    def test_reserve_view(self):
+        self.create_copies(1, status='a')
+        self.reader.set_password('1X<ISRUkw+tuK')
+        self.reader.save()
+        self.client.login(username='reader', password='1X<ISRUkw+tuK')
+        url = reverse('reserve_book', args=[self.book.pk])
+
+        self.assertContains(self.client.post(url), "vous est réservé")
+        self.assertContains(self.client.post(url), "Aucun exemplaire")
+        self.assertEqual(BookInstance.objects.get().borrower, self.reader)
+
+    def test_admin_action(self):
+        on_loan = self.create_copies(3)
+        User.objects.create_superuser(
+            username='admin', email='admin@example.com', password='1X<ISRUkw+tuK',
+        )
+        self.client.login(username='admin', password='1X<ISRUkw+tuK')
+
+        self.client.post(reverse('admin:catalog_bookinstance_changelist'), {
+            'action': 'check_in',
+            '_selected_action': [str(uuid) for uuid in on_loan[:2]],
+        })
+
+        self.assertEqual(BookInstance.objects.filter(status='a').count(), 2)
+        self.assertCountersExact()
+
+
+# The benchmark threads use their own connections: the copies must be
+# committed to be visible, hence TransactionTestCase.
+class CheckOutContentionTest(TransactionTestCase):
+
+    def test_no_copy_is_lent_twice(self):
+        out = StringIO()
+        call_command(
+            'bench_checkout', copies=2, threads=[4], operations=20,
+            json=True, stdout=out,
+        )
+
+        result = json.loads(out.getvalue())['cas']['4']
+        self.assertEqual(result['double_loans'], 0)
+        self.assertEqual(result['left_on_loan'], 0)
+        self.assertGreater(result['loans'], 0)
+        self.assertFalse(Book.objects.exists())
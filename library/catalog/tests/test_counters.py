@@ -0,0 +1,110 @@
+from io import StringIO
+from unittest import mock
+
+from django.core.management import call_command
+from django.db import transaction
+from django.db.models import QuerySet
+from django.test import TestCase
+
+from catalog import counters
+from catalog.models import Author, Book, BookInstance, CatalogCounter
+
+
+class CatalogCounterTest(TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(first_name="John", last_name="Doe")
+        self.book = Book.objects.create(
+            title="Some book of John Doe",
+            summary="A story by John Doe",
+            isbn="1234567891234",
+            author=self.author,
+        )
+
+    def test_counters_follow_creations_and_deletions(self):
+        copy = BookInstance.objects.create(
+            book=self.book, imprint="SBJD1", status='a',
+        )
+        totals = counters.read_totals()
+        self.assertEqual(totals['authors_count'], 1)
+        self.assertEqual(totals['books_count'], 1)
+        self.assertEqual(totals['available_instances_count'], 1)
+
+        copy.delete()
+        self.author.delete()
+        totals = counters.read_totals()
+        self.assertEqual(totals['authors_count'], 0)
+        self.assertEqual(totals['instances_count'], 0)
+
+    def test_counters_follow_status_changes(self):
+        copy = BookInstance.objects.create(
+            book=self.book, imprint="SBJD1", status='a',
+        )
+        copy.status = 'o'
+        copy.save()
+
+        totals = counters.read_totals()
+        self.assertEqual(totals['instances_count'], 1)
+        self.assertEqual(totals['available_instances_count'], 0)
+        self.assertEqual(totals['instances_count_by_status']['o'], 1)
+
+    def test_deferred_status(self):
+        for imprint in ("SBJD1", "SBJD2"):
+            BookInstance.objects.create(book=self.book, imprint=imprint, status='a')
+
+        with self.assertNumQueries(1):
+            first, second = BookInstance.objects.only('imprint').order_by('imprint')
+
+        first.status = 'o'
+        first.save()
+        second.delete()
+
+        totals = counters.read_totals()
+        self.assertEqual(totals['instances_count_by_status'], {'a': 0, 'o': 1})
+
+    def test_row_created_concurrently(self):
+        CatalogCounter.objects.filter(entity='bookinstance').delete()
+        update = QuerySet.update
+        missed = []
+
+        def update_after_concurrent_create(queryset, **kwargs):
+            if not missed:
+                # Another transaction creates the row after our UPDATE.
+                missed.append(update(queryset, **kwargs))
+                CatalogCounter.objects.create(entity='bookinstance', status='a', count=5)
+                return 0
+            return update(queryset, **kwargs)
+
+        with mock.patch.object(QuerySet, 'update', update_after_concurrent_create):
+            counters.increment(BookInstance, 2, status='a')
+
+        self.assertEqual(missed, [0])
+        self.assertEqual(
+            CatalogCounter.objects.get(entity='bookinstance', status='a').count, 7,
+        )
+
+    def test_read_totals_runs_a_single_query(self):
+        with self.assertNumQueries(1):
+            counters.read_totals()
+
+    def test_counters_roll_back_with_the_row(self):
+        try:
+            with transaction.atomic():
+                BookInstance.objects.create(book=self.book, imprint="SBJD1")
+                raise RuntimeError
+        except RuntimeError:
+            pass
+
+        self.assertEqual(counters.read_totals()['instances_count'], 0)
+
+    def test_recount_catalog_command_repairs_counters(self):
+        BookInstance.objects.create(book=self.book, imprint="SBJD1", status='a')
+        CatalogCounter.objects.update(count=42)
+
+        call_command('recount_catalog', stdout=StringIO())
+
+        totals = counters.read_totals()
+        self.assertEqual(totals['authors_count'], 1)
+        self.assertEqual(totals['books_count'], 1)
+        self.assertEqual(totals['instances_count'], 1)
+        self.assertEqual(totals['available_instances_count'], 1)
@@ -0,0 +1,77 @@
+import csv
+import datetime
+import io
+import json
+
+from django.contrib.auth.models import Permission, User
+from django.core.management import call_command
+from django.test import TestCase
+from django.urls import reverse
+
+from catalog import exports
+from catalog.models import Author, Book, BookInstance
+
+
+class ExportTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.librarian = User.objects.create_user(
+            username='librarian', password='2HJ1vRV0Z&3iD', email='lib@example.com',
+        )
+        cls.librarian.user_permissions.add(Permission.objects.get(
+            codename='can_mark_returned',
+        ))
+        author = Author.objects.create(first_name="John", last_name="Doe")
+        book = Book.objects.create(
+            title="Some book, with a comma",
+            summary="A story by John Doe",
+            isbn="1234567891234",
+            author=author,
+        )
+        BookInstance.objects.create(
+            book=book, imprint="SBJD1", status='o', borrower=cls.librarian,
+            due_back=datetime.date(2030, 1, 1),
+        )
+        BookInstance.objects.create(book=book, imprint="SBJD2", status='a')
+
+    def test_books_csv(self):
+        rows = list(csv.reader(exports.iter_export('books', 'csv')))
+
+        self.assertEqual(rows[0][:3], ['id', 'isbn', 'title'])
+        self.assertEqual(rows[1][2], "Some book, with a comma")
+        self.assertEqual(len(rows), 2)
+
+    def test_loans_jsonl_only_lists_copies_on_loan(self):
+        lines = list(exports.iter_export('loans', 'jsonl'))
+
+        self.assertEqual(len(lines), 1)
+        loan = json.loads(lines[0])
+        self.assertEqual(loan['imprint'], "SBJD1")
+        self.assertEqual(loan['due_back'], '2030-01-01')
+        self.assertEqual(loan['borrower'], 'librarian')
+
+    def test_export_view_streams_for_librarians(self):
+        url = reverse('export', kwargs={'dataset': 'loans', 'format': 'csv'})
+
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 302)
+
+        self.client.login(username='librarian', password='2HJ1vRV0Z&3iD')
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.streaming)
+        content = b''.join(response.streaming_content).decode()
+        self.assertIn("SBJD1", content)
+
+        response = self.client.get(reverse(
+            'export', kwargs={'dataset': 'users', 'format': 'csv'},
+        ))
+        self.assertEqual(response.status_code, 404)
+
+    def test_export_catalog_command(self):
+        out = io.StringIO()
+
+        call_command('export_catalog', 'books', '--format', 'jsonl', stdout=out)
+
+        self.assertEqual(json.loads(out.getvalue())['isbn'], "1234567891234")
@@ -0,0 +1,127 @@
+import io
+import json
+import os
+import tempfile
+
+from django.core.management import call_command
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+
+from catalog import counters, search, stats
+from catalog.importer import CatalogImporter, read_records
+from catalog.models import Author, Book, BookInstance, Genre
+
+
+CSV_DATA = """isbn,title,summary,author_first_name,author_last_name,language,genres,imprint,status,due_back
+9780441478125,The Left Hand of Darkness,Gethen,Ursula,Le Guin,English,SF;Fantasy,LHD1,a,
+9780441478125,The Left Hand of Darkness,Gethen,Ursula,Le Guin,English,SF;Fantasy,LHD2,o,2030-01-01
+9780547928227,The Hobbit,Bilbo,J.R.R.,Tolkien,English,Fantasy,HOB1,a,
+9780000000000,No copies,Nothing,Ursula,Le Guin,,,,,
+,Missing ISBN,Skipped,,,,,,,
+"""
+
+
+class CatalogImporterTest(TestCase):
+
+    def test_import_csv(self):
+        records = read_records(io.StringIO(CSV_DATA), 'csv')
+
+        totals = CatalogImporter(batch_size=2).run(records)
+
+        self.assertEqual(totals['authors'], 2)
+        self.assertEqual(totals['books'], 3)
+        self.assertEqual(totals['copies'], 3)
+        self.assertEqual(totals['skipped'], 1)
+        self.assertEqual(Book.objects.count(), 3)
+        self.assertEqual(Author.objects.count(), 2)
+        self.assertEqual(Genre.objects.count(), 2)
+
+        book = Book.objects.get(isbn='9780441478125')
+        self.assertEqual(book.author.last_name, "Le Guin")
+        self.assertEqual(book.language.name, "English")
+        self.assertEqual(book.bookinstance_set.count(), 2)
+        self.assertEqual(sorted(str(genre) for genre in book.genre.all()), ["Fantasy", "SF"])
+
+    def test_import_updates_counters_and_search_index(self):
+        CatalogImporter().run(read_records(io.StringIO(CSV_DATA), 'csv'))
+
+        totals = counters.read_totals()
+        self.assertEqual(totals['books_count'], 3)
+        self.assertEqual(totals['instances_count'], 3)
+        self.assertEqual(totals['available_instances_count'], 2)
+        self.assertEqual(len(search.search_books("hobbit")), 1)
+
+    def test_import_dedupes_on_isbn_and_copy_uuid(self):
+        record = {
+            'isbn': '9780547928227', 'title': "The Hobbit", 'summary': "Bilbo",
+            'imprint': "HOB1", 'uuid': '2b3c9f1e-7c43-4b5e-9d6a-0a4a0c9e7f10',
+        }
+        CatalogImporter().run([record])
+        CatalogImporter().run([record])
+
+        self.assertEqual(Book.objects.count(), 1)
+        self.assertEqual(BookInstance.objects.count(), 1)
+
+    def test_batch_imported_again_creates_no_copies(self):
+        # As after a crash between the commit of the batch and the checkpoint.
+        records = list(read_records(io.StringIO(CSV_DATA), 'csv'))
+        CatalogImporter(batch_size=2).run(records[:2])
+        CatalogImporter(batch_size=2).run(records, start=0)
+
+        self.assertEqual(BookInstance.objects.count(), 3)
+        self.assertEqual(
+            sorted(BookInstance.objects.values_list('imprint', flat=True)),
+            ["HOB1", "LHD1", "LHD2"],
+        )
+
+    def test_same_copy_at_another_position_is_another_copy(self):
+        record = {'isbn': '9780547928227', 'title': "The Hobbit", 'imprint': "HOB"}
+        CatalogImporter().run([record, record])
+
+        self.assertEqual(BookInstance.objects.count(), 2)
+
+    def test_import_catalog_command_resumes_from_checkpoint(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, 'catalog.jsonl')
+            checkpoint = os.path.join(directory, 'checkpoint')
+            with open(path, 'w') as jsonl_file:
+                for index in range(5):
+                    jsonl_file.write(json.dumps({
+                        'isbn': f'978000000000{index}', 'title': f"Book {index}",
+                        'summary': "", 'imprint': f"B{index}", 'genres': ["SF"],
+                    }) + '\n')
+            with open(checkpoint, 'w') as checkpoint_file:
+                checkpoint_file.write('3')
+
+            call_command(
+                'import_catalog', path, '--checkpoint', checkpoint, '--resume',
+                '--batch-size', '1', stdout=io.StringIO(),
+            )
+
+            with open(checkpoint) as checkpoint_file:
+                self.assertEqual(checkpoint_file.read(), '5')
+
+        self.assertEqual(
+            sorted(Book.objects.values_list('title', flat=True)),
+            ["Book 3", "Book 4"],
+        )
+
+
+# The stats are invalidated once each batch is committed.
+class CatalogImporterStatsTest(TransactionTestCase):
+
+    # The test runs in a single process, whose local memory cache is shared.
+    @override_settings(CATALOG_SHARED_CACHE=True)
+    def test_each_batch_invalidates_the_stats(self):
+        cache.clear()
+        stats.get_stats()
+
+        def interrupt(position, totals):
+            raise KeyboardInterrupt
+
+        with self.assertRaises(KeyboardInterrupt):
+            CatalogImporter(batch_size=2).run(
+                read_records(io.StringIO(CSV_DATA), 'csv'), on_batch=interrupt,
+            )
+
+        self.assertEqual(stats.get_stats()['instances_count'], 2)
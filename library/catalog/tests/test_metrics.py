@@ -0,0 +1,184 @@
+import json
+import os
+import re
+import shutil
+import tempfile
+from unittest import mock
+
+from asgiref.sync import async_to_sync
+from django.contrib.auth.models import AnonymousUser, User
+from django.core.cache import cache
+from django.test import RequestFactory, TestCase, TransactionTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.db import connection
+from django.urls import reverse
+
+from catalog import async_views, metrics
+from catalog.models import Book
+
+
+def server_timing(response):
+    return {
+        name: dict(param.split('=', 1) for param in params)
+        for name, *params in (
+            entry.split(';') for entry in response['Server-Timing'].split(', ')
+        )
+    }
+
+
+class HistogramTest(TestCase):
+
+    def test_expose_cumulative_buckets(self):
+        histogram = metrics.Histogram('some_seconds', "Some doc.", (0.1, 1))
+        for value in (0.05, 0.5, 0.5, 3):
+            histogram.observe('books', value)
+
+        self.assertEqual(histogram.expose().splitlines(), [
+            '# HELP some_seconds Some doc.',
+            '# TYPE some_seconds histogram',
+            'some_seconds_bucket{view="books",le="0.1"} 1',
+            'some_seconds_bucket{view="books",le="1"} 3',
+            'some_seconds_bucket{view="books",le="+Inf"} 4',
+            'some_seconds_sum{view="books"} 4.05',
+            'some_seconds_count{view="books"} 4',
+        ])
+
+
+class MetricsMiddlewareTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+        Book.objects.create(title="Some book", summary="A story", isbn="1234567891234")
+
+    def test_server_timing_header(self):
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('books'))
+
+        timing = server_timing(response)
+        self.assertEqual(timing['db']['desc'], f'"{len(queries)} SQL"')
+        self.assertGreater(float(timing['tpl']['dur']), 0)
+        self.assertGreaterEqual(
+            float(timing['total']['dur']),
+            float(timing['db']['dur']) + float(timing['tpl']['dur']),
+        )
+
+    def test_metrics_endpoint(self):
+        self.client.get(reverse('books'))
+        self.client.get(reverse('books'))
+        self.client.get('/catalog/missing/')
+
+        self.client.force_login(User.objects.create_user(
+            username='staff', password='2HJ1vRV0Z&3iD', is_staff=True,
+        ))
+        content = self.client.get(reverse('metrics')).content.decode()
+
+        self.assertIn('catalog_request_duration_seconds_count{view="books"} 2', content)
+        self.assertIn('catalog_sql_queries_count{view="books"} 2', content)
+        self.assertIn('catalog_template_duration_seconds_count{view="books"} 2', content)
+        self.assertIn('catalog_request_duration_seconds_count{view="unresolved"} 1', content)
+
+    def test_metrics_need_staff_without_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        self.client.force_login(User.objects.create_user(
+            username='reader', password='2HJ1vRV0Z&3iD',
+        ))
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+    @override_settings(DEBUG=True)
+    def test_metrics_open_in_debug(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 200)
+
+    @override_settings(CATALOG_METRICS_TOKEN='secret')
+    def test_metrics_token(self):
+        self.assertEqual(self.client.get(reverse('metrics')).status_code, 403)
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer secret')
+        self.assertEqual(response.status_code, 200)
+
+        response = self.client.get(reverse('metrics'), HTTP_AUTHORIZATION='Bearer sécret')
+        self.assertEqual(response.status_code, 403)
+
+
+class SharedMetricsTest(TestCase):
+
+    def setUp(self):
+        for histogram in metrics.HISTOGRAMS:
+            histogram.clear()
+        self.directory = tempfile.mkdtemp()
+        self.addCleanup(shutil.rmtree, self.directory)
+        settings = override_settings(CATALOG_METRICS_DIR=self.directory)
+        settings.enable()
+        self.addCleanup(settings.disable)
+
+    def pool_stats(self, **values):
+        return {**{key: 0 for *_, key in metrics.POOL_METRICS}, **values}
+
+    def write_worker(self, pid, views, pools=None):
+        with open(os.path.join(self.directory, f'{pid}.json'), 'w') as file:
+            json.dump({
+                'histograms': {
+                    'catalog_request_duration_seconds': {
+                        view: [[1] + [0] * len(metrics.DURATION_BUCKETS), 0.001]
+                        for view in views
+                    },
+                },
+                'pools': pools or {},
+            }, file)
+
+    def test_scrape_adds_up_the_workers(self):
+        self.write_worker(1, ['books', 'index'], {'default': self.pool_stats(size=2, checkouts=5)})
+        self.write_worker(2, ['books'], {'default': self.pool_stats(size=1, checkouts=3)})
+        metrics.REQUEST_SECONDS.observe('books', 0.001)
+
+        content = metrics.expose()
+
+        self.assertIn('catalog_request_duration_seconds_count{view="books"} 3', content)
+        self.assertIn('catalog_request_duration_seconds_count{view="index"} 1', content)
+        self.assertIn('catalog_db_pool_connections{alias="default"} 3', content)
+        self.assertIn('catalog_db_pool_checkouts_total{alias="default"} 8', content)
+        self.assertTrue(os.path.exists(os.path.join(self.directory, f'{os.getpid()}.json')))
+
+    def test_snapshots_are_written_at_most_every_interval(self):
+        with mock.patch.object(metrics, '_last_snapshot', 0.0):
+            metrics.save_snapshot()
+            metrics.REQUEST_SECONDS.observe('books', 0.001)
+            metrics.save_snapshot()
+
+        snapshots = metrics.load_snapshots(self.directory)
+        self.assertEqual(snapshots[0]['histograms']['catalog_request_duration_seconds'], {})
+
+    def test_exiting_worker_zeroes_its_gauges(self):
+        pool = mock.Mock()
+        pool.name = 'default'
+        pool.stats.return_value = self.pool_stats(size=2, idle=1, max_size=10, checkouts=4)
+
+        with mock.patch.object(metrics, 'all_pools', return_value=[pool]):
+            metrics.save_snapshot(force=True, exiting=True)
+
+        snapshot, = metrics.load_snapshots(self.directory)
+        self.assertEqual(snapshot['pools']['default'], self.pool_stats(checkouts=4))
+
+
+# The ORM runs in pool threads with their own connections: the data must be
+# committed to be visible, hence TransactionTestCase.
+class AsyncMetricsTest(TransactionTestCase):
+
+    def test_queries_of_the_orm_pool_are_counted(self):
+        cache.clear()
+        book = Book.objects.create(
+            title="Some book", summary="A story", isbn="1234567891234",
+        )
+
+        async def get_response(request):
+            return await async_views.book_detail(request, pk=book.pk)
+
+        request = RequestFactory().get('/')
+        request.user = AnonymousUser()
+        request.resolver_match = None
+        response = async_to_sync(metrics.MetricsMiddleware(get_response))(request)
+
+        queries = int(re.match(r'"(\d+) SQL"', server_timing(response)['db']['desc'])[1])
+        self.assertGreaterEqual(queries, 4)
@@ -0,0 +1,113 @@
+import datetime
+from io import StringIO
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.core import mail
+from django.core.management import CommandError, call_command
+from django.db import connection
+from django.test import TestCase
+
+from catalog import overdue
+from catalog.models import Book, BookInstance, OverdueNotice
+
+
+class OverdueSweepTest(TestCase):
+
+    def setUp(self):
+        self.today = datetime.date(2030, 6, 15)
+        self.book = Book.objects.create(
+            title="Some book", summary="A story", isbn="1234567891234",
+        )
+        self.reader = User.objects.create_user(
+            username='reader', email='reader@example.com',
+        )
+
+    def lend(self, days_late, borrower=None, status='o'):
+        return BookInstance.objects.create(
+            book=self.book, imprint=f"SB{days_late}", status=status,
+            borrower=borrower or self.reader,
+            due_back=self.today - datetime.timedelta(days=days_late),
+        )
+
+    def test_reminds_overdue_loans_only(self):
+        late = self.lend(3)
+        self.lend(0)
+        self.lend(-2)
+        self.lend(5, status='a')
+        self.lend(4, borrower=User.objects.create_user(username='no-email'))
+
+        self.assertEqual(overdue.sweep(self.today), 1)
+
+        self.assertEqual(len(mail.outbox), 1)
+        self.assertEqual(mail.outbox[0].to, ['reader@example.com'])
+        self.assertIn("SB3", mail.outbox[0].body)
+        self.assertTrue(OverdueNotice.objects.filter(
+            bookinstance=late, due_back=late.due_back,
+        ).exists())
+
+    def test_rerun_skips_sent_reminders_until_renewal(self):
+        loan = self.lend(3)
+        overdue.sweep(self.today)
+
+        self.assertEqual(overdue.sweep(self.today), 0)
+
+        loan.due_back = self.today - datetime.timedelta(days=1)
+        loan.save()
+        self.assertEqual(overdue.sweep(self.today), 1)
+        self.assertEqual(len(mail.outbox), 2)
+
+    def test_large_backlog_is_processed_in_chunks(self):
+        for days_late in range(1, 12):
+            self.lend(days_late)
+        chunks = []
+
+        sent = overdue.sweep(self.today, chunk_size=4, on_chunk=chunks.append)
+
+        self.assertEqual(sent, 11)
+        self.assertEqual(chunks, [4, 8, 11])
+        self.assertEqual(len(mail.outbox), 11)
+        self.assertEqual(OverdueNotice.objects.count(), 11)
+
+    def test_mails_are_sent_outside_the_write_transaction(self):
+        self.lend(3)
+        # The test case's own atomic blocks are open around the sweep.
+        test_blocks = list(connection.savepoint_ids)
+        blocks_while_sending = []
+
+        def send_mass_mail(messages, **kwargs):
+            blocks_while_sending.append(list(connection.savepoint_ids))
+            return len(messages)
+
+        with mock.patch.object(overdue, 'send_mass_mail', send_mass_mail):
+            self.assertEqual(overdue.sweep(self.today), 1)
+
+        self.assertEqual(blocks_while_sending, [test_blocks])
+        self.assertEqual(OverdueNotice.objects.count(), 1)
+
+    def test_failed_batch_is_not_recorded(self):
+        self.lend(3)
+
+        with mock.patch.object(overdue, 'send_mass_mail', side_effect=OSError):
+            with self.assertRaises(OSError):
+                overdue.sweep(self.today)
+
+        self.assertFalse(OverdueNotice.objects.exists())
+        self.assertEqual(overdue.sweep(self.today), 1)
+
+    def test_command_dry_run_sends_nothing(self):
+        self.lend(3)
+        out = StringIO()
+
+        call_command(
+            'overdue_sweep', '--dry-run', f'--date={self.today}', stdout=out,
+        )
+
+        self.assertIn("1 relances à envoyer", out.getvalue())
+        self.assertEqual(mail.outbox, [])
+        self.assertFalse(OverdueNotice.objects.exists())
+
+    def test_command_rejects_empty_chunks(self):
+        for chunk_size in ('0', '-1'):
+            with self.assertRaisesMessage(CommandError, "--chunk-size"):
+                call_command('overdue_sweep', f'--chunk-size={chunk_size}', stdout=StringIO())
@@ -0,0 +1,179 @@
+import datetime
+import os
+import runpy
+import shutil
+import tempfile
+from unittest import mock
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.test import TestCase, override_settings
+from django.urls import reverse
+
+import library.settings
+from catalog.models import Author, Book, BookInstance, Genre, Language
+
+
+# The tests run in a single process, whose local memory cache is shared.
+@override_settings(CATALOG_SHARED_CACHE=True)
+class PageCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.author = Author.objects.create(first_name="John", last_name="Doe")
+        self.other_author = Author.objects.create(
+            first_name="Jane", last_name="Roe",
+        )
+        self.book = Book.objects.create(
+            title="Some book of John Doe",
+            summary="A story by John Doe",
+            isbn="1234567891234",
+            author=self.author,
+        )
+        self.other_book = Book.objects.create(
+            title="Some book of Jane Roe",
+            summary="A story by Jane Roe",
+            isbn="1234567891235",
+            author=self.other_author,
+        )
+        self.librarian = User.objects.create_user(
+            username='librarian', password='1X<ISRUkw+tuK',
+        )
+        self.librarian.user_permissions.add(
+            Permission.objects.get(codename='can_mark_returned'),
+        )
+
+    def book_url(self, book):
+        return reverse('book_detail', kwargs={'pk': book.pk})
+
+    def test_second_request_is_served_from_cache(self):
+        first = self.client.get(self.book_url(self.book))
+
+        with self.assertNumQueries(0):
+            second = self.client.get(self.book_url(self.book))
+
+        self.assertEqual(second.status_code, 200)
+        self.assertEqual(second.content, first.content)
+
+    def test_saving_a_book_invalidates_only_its_pages(self):
+        self.client.get(self.book_url(self.book))
+        self.client.get(self.book_url(self.other_book))
+
+        self.book.title = "A new title"
+        self.book.save()
+
+        response = self.client.get(self.book_url(self.book))
+        self.assertContains(response, "A new title")
+        with self.assertNumQueries(0):
+            self.client.get(self.book_url(self.other_book))
+
+    def test_related_changes_invalidate_pages(self):
+        url = reverse('author_detail', kwargs={'pk': self.author.pk})
+        self.client.get(url)
+        self.client.get(self.book_url(self.book))
+
+        BookInstance.objects.create(
+            book=self.book, imprint="SBJD1", status='a',
+            due_back=datetime.date.today(),
+        )
+        self.assertContains(self.client.get(url), "<strong>1</strong> disponible")
+
+        self.book.genre.add(Genre.objects.create(name="Fantasy"))
+        self.assertContains(self.client.get(self.book_url(self.book)), "Fantasy")
+
+        language = Language.objects.create(name="English")
+        self.book.language = language
+        self.book.save()
+        language.name = "Anglais"
+        language.save()
+        self.assertContains(self.client.get(self.book_url(self.book)), "Anglais")
+
+    def test_pages_vary_on_edit_permission(self):
+        self.assertNotContains(self.client.get(reverse('books')), "Modifier")
+
+        self.client.login(username='librarian', password='1X<ISRUkw+tuK')
+        self.assertContains(self.client.get(reverse('books')), "Modifier")
+
+        self.librarian.user_permissions.clear()
+        self.assertNotContains(self.client.get(reverse('books')), "Modifier")
+
+
+class FileBasedPageCacheTest(PageCacheTest):
+
+    @classmethod
+    def setUpClass(cls):
+        cls.cache_dir = tempfile.mkdtemp()
+        cls.cache_settings = override_settings(CATALOG_SHARED_CACHE=True, CACHES={
+            'default': {
+                'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+                'LOCATION': cls.cache_dir,
+            },
+        })
+        cls.cache_settings.enable()
+        super().setUpClass()
+
+    @classmethod
+    def tearDownClass(cls):
+        super().tearDownClass()
+        cls.cache_settings.disable()
+        shutil.rmtree(cls.cache_dir)
+
+
+@override_settings(CATALOG_SHARED_CACHE=False)
+class PerProcessCacheTest(TestCase):
+
+    def setUp(self):
+        cache.clear()
+        author = Author.objects.create(first_name="John", last_name="Doe")
+        self.book = Book.objects.create(
+            title="Some book of John Doe",
+            summary="A story by John Doe",
+            isbn="1234567891234",
+            author=author,
+        )
+
+    def test_pages_and_fragments_are_not_cached(self):
+        urls = [reverse('book_detail', kwargs={'pk': self.book.pk}), reverse('books')]
+        for url in urls:
+            self.client.get(url)
+
+        # As if another process had renamed the book: no version is bumped here.
+        Book.objects.filter(pk=self.book.pk).update(title="A new title")
+
+        for url in urls:
+            self.assertContains(self.client.get(url), "A new title")
+
+
+class SharedCacheSettingTest(TestCase):
+
+    def load_settings(self, **environ):
+        with mock.patch.dict(os.environ, environ):
+            for name in ('CATALOG_SHARED_CACHE', 'DJANGO_CACHE_DIR'):
+                if name not in environ:
+                    os.environ.pop(name, None)
+            return runpy.run_path(library.settings.__file__)
+
+    def test_follows_the_cache_backend_by_default(self):
+        self.assertFalse(self.load_settings()['CATALOG_SHARED_CACHE'])
+        self.assertTrue(
+            self.load_settings(DJANGO_CACHE_DIR=tempfile.gettempdir())['CATALOG_SHARED_CACHE'],
+        )
+
+    def test_single_process_caches_pages_in_local_memory(self):
+        single_process = self.load_settings(CATALOG_SHARED_CACHE='True')
+        self.assertEqual(
+            single_process['CACHES']['default']['BACKEND'],
+            'django.core.cache.backends.locmem.LocMemCache',
+        )
+        book = Book.objects.create(
+            title="Some book", summary="A story", isbn="1234567891234",
+        )
+        url = reverse('book_detail', kwargs={'pk': book.pk})
+        cache.clear()
+
+        with override_settings(CATALOG_SHARED_CACHE=single_process['CATALOG_SHARED_CACHE']):
+            self.client.get(url)
+            with self.assertNumQueries(0):
+                response = self.client.get(url)
+
+        self.assertContains(response, "Some book")
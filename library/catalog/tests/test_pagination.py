@@ -0,0 +1,109 @@
+import datetime
+
+from django.test import TestCase
+from django.urls import reverse
+
+from catalog.models import Author, Book, BookInstance
+from catalog.pagination import InvalidCursor, KeysetPaginator
+
+
+class KeysetPaginatorTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        for author_id in range(7):
+            Author.objects.create(
+                first_name=f'John {author_id % 2}',
+                last_name=f'Doe {author_id // 2}',
+            )
+
+        book = Book.objects.create(
+            title="Some book", summary="A story", isbn="1234567891234",
+        )
+        for book_copy in range(7):
+            due_back = None
+            if book_copy % 3:
+                due_back = datetime.date.today() + datetime.timedelta(days=book_copy % 2)
+            BookInstance.objects.create(
+                book=book, imprint=f"SB{book_copy}", due_back=due_back,
+            )
+
+    def walk(self, queryset, ordering, per_page=2):
+        paginator = KeysetPaginator(queryset, per_page, ordering)
+        page = paginator.page()
+        pages = [page]
+        while page.has_next():
+            page = paginator.page(page.next_cursor)
+            pages.append(page)
+
+        return paginator, pages
+
+    def test_forward_walk_matches_ordering(self):
+        queryset = Author.objects.all()
+        ordering = ('last_name', 'first_name', 'pk')
+
+        _, pages = self.walk(queryset, ordering)
+
+        seen = [author for page in pages for author in page]
+        self.assertEqual(seen, list(queryset.order_by(*ordering)))
+        self.assertEqual(len(pages), 4)
+        self.assertFalse(pages[0].has_previous())
+
+    def test_backward_walk_returns_previous_pages(self):
+        paginator, pages = self.walk(Author.objects.all(), ('last_name', 'first_name', 'pk'))
+
+        previous = paginator.page(pages[2].previous_cursor)
+
+        self.assertEqual(list(previous), list(pages[1]))
+        self.assertTrue(previous.has_next())
+
+    def test_nullable_ordering_column(self):
+        queryset = BookInstance.objects.all()
+        ordering = ('due_back', 'uuid')
+
+        paginator, pages = self.walk(queryset, ordering)
+
+        seen = [copy for page in pages for copy in page]
+        self.assertEqual(seen, list(queryset.order_by(*ordering)))
+        for index in range(1, len(pages)):
+            previous = paginator.page(pages[index].previous_cursor)
+            self.assertEqual(list(previous), list(pages[index - 1]))
+
+    def test_invalid_cursor(self):
+        paginator = KeysetPaginator(Author.objects.all(), 2, ('last_name', 'first_name', 'pk'))
+
+        with self.assertRaises(InvalidCursor):
+            paginator.page('not-a-cursor')
+
+    def test_chunks(self):
+        queryset = BookInstance.objects.all()
+        ordering = ('due_back', 'uuid')
+
+        chunks = list(KeysetPaginator(queryset, 2, ordering).chunks())
+
+        self.assertTrue(all(len(chunk) == 2 for chunk in chunks[:-1]))
+        self.assertEqual(
+            [copy for chunk in chunks for copy in chunk],
+            list(queryset.order_by(*ordering)),
+        )
+
+    def test_chunks_need_at_least_one_row(self):
+        for per_page in (0, -1):
+            paginator = KeysetPaginator(Author.objects.all(), per_page, ('pk',))
+            with self.assertRaises(ValueError):
+                next(paginator.chunks())
+
+    def test_view_uses_cursor_links(self):
+        response = self.client.get(reverse('authors'))
+        next_cursor = response.context['page_obj'].next_cursor
+
+        response = self.client.get(reverse('authors'), {'cursor': next_cursor})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTrue(response.context['page_obj'].has_previous())
+        self.assertContains(response, '?cursor=')
+
+    def test_view_invalid_cursor_is_404(self):
+        response = self.client.get(reverse('authors'), {'cursor': 'garbage'})
+
+        self.assertEqual(response.status_code, 404)
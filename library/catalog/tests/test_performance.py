@@ -0,0 +1,221 @@
+"""Query budgets of the catalog views.
+
+Each view is requested twice, with a handful of rows and then with
+hundreds more, and must run the same number of queries both times, within
+its budget. An N+1 loop added to a view or a template breaks the first
+assertion; any extra query breaks the budget. Caches are cleared before
+each request, so budgets include the session and permission lookups.
+"""
+
+import datetime
+
+from django.contrib.auth.models import Permission, User
+from django.core.cache import cache
+from django.db import connection
+from django.http import HttpResponse
+from django.template import engines
+from django.test import RequestFactory, TestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+
+from catalog.debug import RepeatedQueryMiddleware, normalize
+from catalog.models import Author, Book, BookInstance, Genre, Language
+
+
+class QueryBudgetTest(TestCase):
+
+    def setUp(self):
+        self.librarian = User.objects.create_user(username='librarian')
+        self.librarian.user_permissions.add(
+            Permission.objects.get(codename='can_mark_returned'),
+        )
+        self.client.force_login(self.librarian)
+
+        self.language = Language.objects.create(name="français")
+        self.genres = [Genre.objects.create(name=f"Genre {n}") for n in range(3)]
+        self.author = Author.objects.create(first_name="John", last_name="Doe")
+        self.book = self.create_books(1, author=self.author)[0]
+        self.create_copies(1, book=self.book)
+
+    def create_books(self, nb_of_books, author=None):
+        authors = [author] if author else Author.objects.bulk_create(
+            Author(first_name="Jane", last_name=f"Roe {n}") for n in range(nb_of_books)
+        )
+        books = Book.objects.bulk_create(
+            Book(
+                title=f"Some book {n}", summary="A story", isbn=f"{n:013d}",
+                author=authors[n % len(authors)], language=self.language,
+            )
+            for n in range(nb_of_books)
+        )
+        books = list(Book.objects.order_by('-pk')[:nb_of_books])
+        Book.genre.through.objects.bulk_create(
+            Book.genre.through(book=book, genre=genre)
+            for book in books for genre in self.genres
+        )
+
+        return books
+
+    def create_copies(self, nb_of_copies, book=None, status='o'):
+        BookInstance.objects.bulk_create(
+            BookInstance(
+                book=book or self.book, imprint=f"Imprint {n}", status=status,
+                borrower=self.librarian if status == 'o' else None,
+                due_back=datetime.date.today() + datetime.timedelta(days=n % 20),
+            )
+            for n in range(nb_of_copies)
+        )
+
+    def count_queries(self, url):
+        cache.clear()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+            if response.streaming:
+                b''.join(response.streaming_content)
+
+        self.assertEqual(response.status_code, 200, url)
+
+        return len(queries)
+
+    def assertQueryBudget(self, budget, url, grow):
+        """Check ``url`` runs at most ``budget`` queries, before and after ``grow()``."""
+        small = self.count_queries(url)
+        grow()
+        large = self.count_queries(url)
+
+        self.assertEqual(small, large, f"{url}: {small} queries, then {large}")
+        self.assertLessEqual(large, budget, url)
+
+    def test_index(self):
+        self.assertQueryBudget(
+            6, reverse('index'), lambda: self.create_books(500),
+        )
+
+    def test_book_list(self):
+        self.assertQueryBudget(
+            6, reverse('books'), lambda: self.create_books(500),
+        )
+
+    def test_book_detail(self):
+        self.assertQueryBudget(
+            10, reverse('book_detail', args=[self.book.pk]),
+            lambda: self.create_copies(1000),
+        )
+
+    def test_author_list(self):
+        self.assertQueryBudget(
+            6, reverse('authors'), lambda: self.create_books(500),
+        )
+
+    def test_author_detail(self):
+        def grow():
+            for book in self.create_books(500, author=self.author)[:50]:
+                self.create_copies(20, book=book)
+
+        self.assertQueryBudget(
+            8, reverse('author_detail', args=[self.author.pk]), grow,
+        )
+
+    def test_loans(self):
+        grow = lambda: self.create_copies(1000)
+
+        self.assertQueryBudget(6, reverse('all_borrowed'), grow)
+        self.assertQueryBudget(6, reverse('my_borrowed'), grow)
+
+    def test_search(self):
+        self.assertQueryBudget(
+            6, reverse('search') + '?q=book', lambda: self.create_books(500),
+        )
+
+    def test_api(self):
+        grow = lambda: (self.create_books(500), self.create_copies(1000))
+
+        self.assertQueryBudget(5, reverse('api_list', args=['books']), grow)
+        self.assertQueryBudget(
+            5, reverse('api_detail', args=['books', self.book.pk]), grow,
+        )
+        self.assertQueryBudget(
+            5, reverse('api_book_availability', args=[self.book.pk]), grow,
+        )
+
+    def test_export(self):
+        self.assertQueryBudget(
+            6, reverse('export', args=['books', 'csv']),
+            lambda: self.create_books(500),
+        )
+
+    def test_circulation_forms(self):
+        copy = BookInstance.objects.first()
+        grow = lambda: (self.create_books(500), self.create_copies(1000))
+
+        self.assertQueryBudget(
+            5, reverse('renew_book_librarian', args=[copy.pk]), grow,
+        )
+        self.assertQueryBudget(
+            6, reverse('check_out_book', args=[self.book.pk]), grow,
+        )
+        self.assertQueryBudget(
+            6, reverse('reserve_book', args=[self.book.pk]), grow,
+        )
+        self.assertQueryBudget(6, reverse('bulk_circulation'), grow)
+
+    def test_edit_forms(self):
+        grow = lambda: self.create_books(500)
+
+        self.assertQueryBudget(6, reverse('author_create'), grow)
+        self.assertQueryBudget(
+            6, reverse('author_update', args=[self.author.pk]), grow,
+        )
+        self.assertQueryBudget(
+            6, reverse('author_delete', args=[self.author.pk]), grow,
+        )
+        self.assertQueryBudget(7, reverse('book_create'), grow)
+        self.assertQueryBudget(
+            9, reverse('book_update', args=[self.book.pk]), grow,
+        )
+        self.assertQueryBudget(
+            6, reverse('book_delete', args=[self.book.pk]), grow,
+        )
+
+
+class RepeatedQueryMiddlewareTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        language = Language.objects.create(name="français")
+        for n in range(4):
+            author = Author.objects.create(first_name="Jane", last_name=f"Roe {n}")
+            Book.objects.create(
+                title=f"Book {n}", summary="A story", isbn=f"{n:013d}",
+                author=author, language=language,
+            )
+
+    def render(self, source):
+        template = engines.all()[0].from_string(source)
+
+        def view(request):
+            books = Book.objects.order_by('pk')
+            return HttpResponse(template.render({'books': books}, request))
+
+        return RepeatedQueryMiddleware(view)(RequestFactory().get('/books/'))
+
+    def test_normalize(self):
+        self.assertEqual(
+            normalize('SELECT *\n  FROM book WHERE id IN (%s, %s, %s) LIMIT 21'),
+            'SELECT * FROM book WHERE id IN (...) LIMIT ?',
+        )
+
+    @override_settings(DEBUG=True)
+    def test_warns_with_template_line(self):
+        with self.assertLogs('catalog.debug', 'WARNING') as logs:
+            self.render("{% for book in books %}\n{{ book.author }}\n{% endfor %}")
+
+        self.assertEqual(len(logs.output), 1)
+        self.assertIn("4 requêtes similaires pour /books/", logs.output[0])
+        self.assertIn('FROM "catalog_author"', logs.output[0])
+        self.assertIn("ligne 2 : {{ book.author }}", logs.output[0])
+
+    @override_settings(DEBUG=True)
+    def test_silent_without_repetition(self):
+        with self.assertRaises(AssertionError), self.assertLogs('catalog.debug'):
+            self.render("{% for book in books %}{{ book.title }}{% endfor %}")
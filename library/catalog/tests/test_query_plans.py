@@ -0,0 +1,26 @@
+from io import StringIO
+
+from django.core.management import call_command
+from django.test import TestCase
+
+from catalog import query_plans
+from catalog.management.commands.check_query_plans import sample_request
+from catalog.models import BookInstance
+
+
+class QueryPlansTest(TestCase):
+
+    def test_view_querysets_use_indexes(self):
+        self.assertEqual(query_plans.check_views(sample_request()), {})
+
+    def test_unindexed_query_is_reported(self):
+        queryset = BookInstance.objects.filter(imprint='SBJD1').order_by('imprint')
+
+        self.assertTrue(query_plans.find_problems(queryset))
+
+    def test_check_query_plans_command(self):
+        out = StringIO()
+
+        call_command('check_query_plans', stdout=out)
+
+        self.assertIn("index", out.getvalue())
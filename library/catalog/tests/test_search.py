@@ -0,0 +1,61 @@
+from django.test import TestCase
+from django.urls import reverse
+
+from catalog import search
+from catalog.models import Author, Book
+
+
+class BookSearchTest(TestCase):
+
+    def setUp(self):
+        self.author = Author.objects.create(first_name="Ursula", last_name="Le Guin")
+        self.book = Book.objects.create(
+            title="The Left Hand of Darkness",
+            summary="An envoy visits the planet Gethen.",
+            isbn="9780441478125",
+            author=self.author,
+        )
+        Book.objects.create(
+            title="Darkness Visible",
+            summary="A memoir.",
+            isbn="9780679736394",
+        )
+
+    def test_search_by_title_summary_isbn_and_author(self):
+        for query in ("left hand", "gethen", "9780441478125", "ursula guin"):
+            self.assertEqual(search.search_books(query), [self.book], query)
+
+    def test_search_by_prefix_and_ranking(self):
+        results = search.search_books("dark")
+
+        self.assertEqual(len(results), 2)
+
+    def test_index_follows_updates(self):
+        self.book.title = "Rocannon's World"
+        self.book.save()
+        self.assertEqual(search.search_books("rocannon"), [self.book])
+        self.assertEqual(search.search_books("left hand"), [])
+
+        self.author.last_name = "K. Le Guin"
+        self.author.save()
+        self.assertEqual(search.search_books("le guin"), [self.book])
+
+        self.book.delete()
+        self.assertEqual(search.search_books("rocannon"), [])
+
+    def test_rebuild_index(self):
+        search.rebuild_index()
+
+        self.assertEqual(search.search_books("gethen"), [self.book])
+
+    def test_search_ignores_query_syntax(self):
+        self.assertEqual(search.search_books('"*) OR'), [])
+        self.assertEqual(search.search_books(''), [])
+
+    def test_search_view(self):
+        response = self.client.get(reverse('search'), {'q': 'darkness'})
+
+        self.assertEqual(response.status_code, 200)
+        self.assertTemplateUsed(response, 'catalog/search_results.html')
+        self.assertEqual(len(response.context['book_list']), 2)
+        self.assertFalse(response.context['has_next'])
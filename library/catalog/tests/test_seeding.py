@@ -0,0 +1,103 @@
+import json
+import os
+import tempfile
+from io import StringIO
+
+from django.core.cache import cache
+from django.core.management import CommandError, call_command
+from django.db.models import Count
+from django.test import TestCase
+
+from catalog import counters, search
+from catalog.urls import urlpatterns
+from catalog.models import Author, Book, BookInstance
+from catalog.seeding import CatalogSeeder
+
+
+class SeedCatalogTest(TestCase):
+
+    def test_seed(self):
+        totals = CatalogSeeder(seed=1, batch_size=40).run(
+            authors=20, books=100, copies=500, readers=5,
+        )
+
+        self.assertEqual(
+            (totals['author'], totals['book'], totals['bookinstance']),
+            (20, 100, 500),
+        )
+        self.assertEqual(counters.read_totals()['instances_count'], 500)
+        self.assertTrue(Book.genre.through.objects.exists())
+        self.assertFalse(BookInstance.objects.filter(status='o', borrower=None).exists())
+        book = Book.objects.first()
+        self.assertEqual(search.search_books(book.isbn), [book])
+
+    def test_popularity_is_skewed(self):
+        CatalogSeeder(seed=1).run(authors=100, books=1000, copies=0, readers=0)
+
+        books_per_author = sorted(
+            Author.objects.annotate(books=Count('book')).values_list('books', flat=True),
+            reverse=True,
+        )
+        # The 10 busiest authors (10%) wrote far more than 10% of the books.
+        self.assertGreater(sum(books_per_author[:10]), 400)
+
+    def test_same_seed_same_data(self):
+        def seed():
+            CatalogSeeder(seed=7).run(authors=5, books=20, copies=0, readers=0)
+            data = list(Book.objects.order_by('pk').values_list(
+                'title', 'author__last_name', 'author__first_name',
+            ))
+            Book.objects.all().delete()
+            Author.objects.all().delete()
+
+            return data
+
+        self.assertEqual(seed(), seed())
+
+    def test_same_seed_twice_on_the_same_database(self):
+        for _ in range(2):
+            call_command(
+                'seed_catalog', '--seed', '3', '--authors', '5', '--books', '20',
+                '--copies', '50', '--readers', '3', stdout=StringIO(),
+            )
+
+        self.assertEqual(BookInstance.objects.count(), 100)
+        self.assertEqual(Book.objects.values('isbn').distinct().count(), 40)
+
+
+class BenchCatalogTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        CatalogSeeder(seed=1).run(authors=5, books=20, copies=50, readers=3)
+
+    def setUp(self):
+        cache.clear()
+
+    def bench(self, *args):
+        out = StringIO()
+        call_command('bench_catalog', '--requests', '2', *args, stdout=out, stderr=StringIO())
+
+        return json.loads(out.getvalue())
+
+    def test_report_covers_every_route(self):
+        report = self.bench()
+
+        self.assertEqual(
+            set(report['routes']), {pattern.name for pattern in urlpatterns},
+        )
+        for name, result in report['routes'].items():
+            self.assertEqual(result['status'], 200, name)
+        self.assertEqual(report['catalog']['books_count'], 20)
+
+    def test_baseline_regressions(self):
+        report = self.bench('--route', 'books', '--cold')
+        report['routes']['books']['queries'] -= 1
+
+        with tempfile.TemporaryDirectory() as directory:
+            baseline = os.path.join(directory, 'baseline.json')
+            with open(baseline, 'w') as baseline_file:
+                json.dump(report, baseline_file)
+
+            with self.assertRaisesMessage(CommandError, "books : "):
+                self.bench('--route', 'books', '--cold', '--baseline', baseline)
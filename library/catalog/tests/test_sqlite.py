@@ -0,0 +1,107 @@
+import json
+import os
+import tempfile
+import threading
+from contextlib import contextmanager
+from io import StringIO
+
+from django.core.management import call_command
+from django.db import OperationalError, connections, transaction
+from django.test import SimpleTestCase
+
+from library.db.transaction import immediate_atomic
+
+
+@contextmanager
+def scratch_database(**options):
+    """Alias of an empty SQLite file opened with library.db.sqlite3."""
+    with tempfile.TemporaryDirectory() as directory:
+        connections.databases['scratch'] = {
+            'ENGINE': 'library.db.sqlite3',
+            'NAME': os.path.join(directory, 'scratch.sqlite3'),
+            'OPTIONS': options,
+        }
+        try:
+            yield 'scratch'
+        finally:
+            connections['scratch'].close()
+            del connections['scratch']
+            del connections.databases['scratch']
+
+
+def pragma(alias, name):
+    with connections[alias].cursor() as cursor:
+        cursor.execute(f'PRAGMA {name}')
+        return cursor.fetchone()[0]
+
+
+class SQLiteBackendTest(SimpleTestCase):
+
+    def test_pragmas(self):
+        with scratch_database(pragmas={'busy_timeout': 100}) as alias:
+            self.assertEqual(pragma(alias, 'journal_mode'), 'wal')
+            self.assertEqual(pragma(alias, 'synchronous'), 1)  # NORMAL
+            self.assertEqual(pragma(alias, 'busy_timeout'), 100)
+
+    def concurrent_write(self, alias, block):
+        """Errors of a write from another connection while ``block`` is open."""
+        errors = []
+
+        def other_connection():
+            try:
+                # Readers are not blocked by the writer in WAL mode...
+                pragma(alias, 'user_version')
+                # ...but a second writer waits up to busy_timeout (none here).
+                with immediate_atomic(using=alias):
+                    pass
+            except OperationalError as error:
+                errors.append(str(error))
+            finally:
+                connections[alias].close()
+
+        with block:
+            pragma(alias, 'user_version')
+            thread = threading.Thread(target=other_connection)
+            thread.start()
+            thread.join()
+
+        return errors
+
+    def test_immediate_atomic_takes_the_write_lock(self):
+        with scratch_database(pragmas={'busy_timeout': 0}) as alias:
+            errors = self.concurrent_write(alias, immediate_atomic(using=alias))
+
+        self.assertEqual(errors, ['database is locked'])
+
+    def test_atomic_does_not_take_the_write_lock(self):
+        # Read-only blocks (e.g. the admin's) do not hold writers back.
+        with scratch_database(pragmas={'busy_timeout': 0}) as alias:
+            errors = self.concurrent_write(alias, transaction.atomic(using=alias))
+
+        self.assertEqual(errors, [])
+
+    def test_nested_blocks_start_a_single_transaction(self):
+        with scratch_database() as alias:
+            connection = connections[alias]
+            with transaction.atomic(using=alias):
+                with immediate_atomic(using=alias):
+                    self.assertFalse(connection.begin_immediate)
+            with immediate_atomic(using=alias):
+                with immediate_atomic(using=alias):
+                    self.assertTrue(connection.in_atomic_block)
+            self.assertFalse(connection.begin_immediate)
+
+
+class BenchSQLiteTest(SimpleTestCase):
+
+    def test_report(self):
+        out = StringIO()
+        call_command(
+            'bench_sqlite', '--seconds', '0.2', '--rows', '100', '--json', stdout=out,
+        )
+        report = json.loads(out.getvalue())
+
+        self.assertEqual(set(report), {'stock', 'tuned'})
+        self.assertGreater(report['tuned']['reads_per_second'], 0)
+        self.assertGreater(report['tuned']['writes_per_second'], 0)
+        self.assertEqual(report['tuned']['errors'], 0)
@@ -0,0 +1,111 @@
+from django.core.cache import cache
+from django.test import TestCase, TransactionTestCase, override_settings
+from django.urls import reverse
+
+from catalog import stats
+from catalog.models import Author, Book, BookInstance
+
+
+# The tests run in a single process, whose local memory cache is shared.
+@override_settings(CATALOG_SHARED_CACHE=True)
+class CatalogStatsTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        author = Author.objects.create(first_name="John", last_name="Doe")
+        book = Book.objects.create(
+            title="Some book of John Doe",
+            summary="A story by John Doe",
+            isbn="1234567891234",
+            author=author,
+        )
+        for status in ('a', 'a', 'o', 'm'):
+            BookInstance.objects.create(
+                book=book, imprint="SBJD", status=status,
+            )
+
+    def setUp(self):
+        cache.clear()
+
+    def test_compute_stats_runs_a_single_query(self):
+        with self.assertNumQueries(1):
+            result = stats.compute_stats()
+
+        self.assertEqual(result, {
+            'authors_count': 1,
+            'books_count': 1,
+            'instances_count': 4,
+            'available_instances_count': 2,
+        })
+
+    def test_get_stats_is_cached(self):
+        stats.get_stats()
+
+        with self.assertNumQueries(0):
+            result = stats.get_stats()
+
+        self.assertEqual(result['instances_count'], 4)
+
+    def test_adjust_stats(self):
+        stats.get_stats()
+        stats.adjust_stats(instances_count=2, available_instances_count=-1)
+
+        result = stats.get_stats()
+        self.assertEqual(result['instances_count'], 6)
+        self.assertEqual(result['available_instances_count'], 1)
+
+    def test_adjust_stats_on_cold_cache_does_nothing(self):
+        stats.adjust_stats(authors_count=1)
+
+        self.assertEqual(stats.get_stats()['authors_count'], 1)
+
+    @override_settings(CATALOG_SHARED_CACHE=False)
+    def test_stats_read_from_the_counters_without_shared_cache(self):
+        stats.get_stats()
+        stats.adjust_stats(instances_count=2)
+
+        with self.assertNumQueries(1):
+            result = stats.get_stats()
+
+        self.assertEqual(result['instances_count'], 4)
+        self.assertIsNone(cache.get(
+            stats._cache_key('instances_count'), version=stats.STATS_CACHE_VERSION,
+        ))
+
+    def test_index_view_context(self):
+        response = self.client.get(reverse('index'))
+
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response.context['books_count'], 1)
+        self.assertEqual(response.context['available_instances_count'], 2)
+
+
+@override_settings(CATALOG_SHARED_CACHE=True)
+class CatalogStatsSignalsTest(TransactionTestCase):
+
+    def setUp(self):
+        cache.clear()
+        self.book = Book.objects.create(
+            title="Some book", summary="A story", isbn="1234567891234",
+        )
+        stats.get_stats()
+
+    def test_counters_follow_saves_and_deletes(self):
+        copy = BookInstance.objects.create(
+            book=self.book, imprint="SB1", status='a',
+        )
+        Author.objects.create(first_name="Jane", last_name="Doe")
+
+        with self.assertNumQueries(0):
+            result = stats.get_stats()
+        self.assertEqual(result['authors_count'], 1)
+        self.assertEqual(result['instances_count'], 1)
+        self.assertEqual(result['available_instances_count'], 1)
+
+        copy.status = 'o'
+        copy.save()
+        self.assertEqual(stats.get_stats()['available_instances_count'], 0)
+
+        copy.delete()
+        self.book.delete()
+        self.assertEqual(stats.get_stats(), stats.compute_stats())
@@ -2,6 +2,7 @@ import datetime
 import uuid
 
 from django.contrib.auth.models import User, Permission
+from django.core.cache import cache
 from django.test import TestCase
 from django.urls import reverse
 from django.utils import timezone
@@ -27,6 +28,9 @@ class AuthorListViewTest(TestCase):
                 last_name=f'Doe {author_id}',
             )
 
+    def setUp(self):
+        cache.clear()
+
     def test_view_url_accessible_by_name(self):
         response = self.client.get(reverse('authors'))
         self.assertEqual(response.status_code, 200)
@@ -369,3 +373,127 @@ class RenewBookInstanceViewTest(TestCase):
             response, 'form', 'due_back',
             "Date invalide - date dans plus de 4 semaines",
         )
+
+
+class BookDetailViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        test_author = Author.objects.create(
+            first_name="John",
+            last_name="Doe",
+        )
+        test_language = Language.objects.create(
+            name="English",
+        )
+        cls.test_book = Book.objects.create(
+            title="Some book of John Doe",
+            summary="A story by John Doe",
+            isbn="1234567891234",
+            author=test_author,
+            language=test_language,
+        )
+        cls.test_book.genre.set([Genre.objects.create(name="Fantasy")])
+
+    def setUp(self):
+        cache.clear()
+
+    def create_copies(self, nb_of_copies, status='a'):
+        for book_copy in range(nb_of_copies):
+            BookInstance.objects.create(
+                book=self.test_book,
+                imprint=f"SBJD{book_copy}",
+                due_back=datetime.date.today() + datetime.timedelta(days=book_copy),
+                status=status,
+            )
+
+    def get_detail(self):
+        return self.client.get(reverse(
+            'book_detail', kwargs={'pk': self.test_book.pk},
+        ))
+
+    def test_copies_summary(self):
+        self.create_copies(3, status='a')
+        self.create_copies(2, status='o')
+
+        response = self.get_detail()
+
+        self.assertEqual(response.status_code, 200)
+        summary = response.context['copies_summary']
+        self.assertEqual(summary['total'], 5)
+        self.assertEqual(summary['next_due_back'], datetime.date.today())
+        self.assertIn(('a', "Disponible", 3), summary['by_status'])
+
+    def test_copies_are_paginated(self):
+        self.create_copies(15)
+
+        response = self.get_detail()
+
+        self.assertTrue(response.context['is_paginated'])
+        self.assertEqual(len(response.context['copy_list']), 10)
+
+    def test_query_count_does_not_depend_on_copies(self):
+        self.create_copies(1)
+        with self.assertNumQueries(5):
+            self.get_detail()
+
+        self.create_copies(30)
+        with self.assertNumQueries(5):
+            self.get_detail()
+
+
+class AuthorDetailViewTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.test_author = Author.objects.create(
+            first_name="John",
+            last_name="Doe",
+        )
+
+    def setUp(self):
+        cache.clear()
+
+    def create_books(self, nb_of_books):
+        for book_id in range(nb_of_books):
+            book = Book.objects.create(
+                title=f"Book {book_id:03}",
+                summary="A story by John Doe",
+                isbn="1234567891234",
+                author=self.test_author,
+            )
+            for status in ('a', 'o'):
+                BookInstance.objects.create(
+                    book=book, imprint=f"B{book_id}", status=status,
+                )
+
+    def get_detail(self, **params):
+        return self.client.get(reverse(
+            'author_detail', kwargs={'pk': self.test_author.pk},
+        ), params)
+
+    def test_books_are_annotated_with_copies_count(self):
+        self.create_books(1)
+
+        response = self.get_detail()
+
+        book = response.context['book_list'][0]
+        self.assertEqual(book.copies_count, 2)
+        self.assertEqual(book.available_copies_count, 1)
+
+    def test_books_are_paginated(self):
+        self.create_books(12)
+
+        response = self.get_detail(page=2)
+
+        self.assertTrue(response.context['is_paginated'])
+        self.assertEqual(len(response.context['book_list']), 2)
+
+    def test_query_count_does_not_depend_on_books(self):
+        self.create_books(1)
+        with self.assertNumQueries(3):
+            self.get_detail()
+
+        self.create_books(20)
+        with self.assertNumQueries(3):
+            self.get_detail()
@@ -0,0 +1,101 @@
+import os
+import runpy
+from unittest import mock
+
+from django.contrib.auth.models import User
+from django.contrib.sessions.models import Session
+from django.conf import settings
+from django.db import DatabaseError
+from django.test import TestCase
+from django.urls import reverse
+
+from catalog import visits
+from catalog.models import VisitCount
+
+
+class IndexVisitsTest(TestCase):
+
+    def setUp(self):
+        patcher = mock.patch.object(visits, 'buffer', visits.VisitBuffer())
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_visits_are_counted_without_session(self):
+        for expected in range(3):
+            response = self.client.get(reverse('index'))
+            self.assertEqual(response.context['visits_count'], expected)
+
+        self.assertNotIn('sessionid', response.cookies)
+        self.assertEqual(Session.objects.count(), 0)
+        self.assertFalse(VisitCount.objects.exists())
+
+        self.assertEqual(visits.buffer.flush(), 3)
+        self.assertEqual(VisitCount.objects.get(path=reverse('index'), user=None).count, 3)
+
+    def test_tampered_cookie_restarts_count(self):
+        self.client.cookies[visits.VISITS_COOKIE] = '41'
+
+        response = self.client.get(reverse('index'))
+
+        self.assertEqual(response.context['visits_count'], 0)
+
+
+class VisitBufferTest(TestCase):
+
+    @classmethod
+    def setUpTestData(cls):
+        cls.user = User.objects.create_user(username='reader')
+
+    def test_flush_writes_one_row_per_page_and_user(self):
+        buffer = visits.VisitBuffer(flush_size=1000)
+        for _ in range(100):
+            buffer.add('/', None)
+            buffer.add('/', self.user.pk)
+        buffer.add('/catalog/books/', None)
+
+        with self.assertNumQueries(8):
+            self.assertEqual(buffer.flush(), 201)
+        buffer.add('/', None)
+        buffer.flush()
+
+        counts = {
+            (row.path, row.user_id): row.count for row in VisitCount.objects.all()
+        }
+        self.assertEqual(counts, {
+            ('/', None): 101,
+            ('/', self.user.pk): 100,
+            ('/catalog/books/', None): 1,
+        })
+
+    def test_buffer_flushes_when_full(self):
+        buffer = visits.VisitBuffer(flush_size=10)
+        for _ in range(25):
+            buffer.add('/')
+
+        self.assertEqual(VisitCount.objects.get().count, 20)
+        self.assertEqual(buffer.pending, 5)
+
+    def test_failed_flush_keeps_visits(self):
+        buffer = visits.VisitBuffer()
+        buffer.add('/')
+
+        with mock.patch.object(visits, 'write_counts', side_effect=DatabaseError):
+            with self.assertLogs('catalog.visits', 'ERROR'):
+                self.assertEqual(buffer.flush(), 0)
+
+        self.assertEqual(buffer.flush(), 1)
+        self.assertEqual(VisitCount.objects.get().count, 1)
+
+    def test_gunicorn_workers_flush_on_exit(self):
+        for config in ('gunicorn.conf.py', 'asgi.conf.py'):
+            path = os.path.join(os.path.dirname(settings.BASE_DIR), config)
+            # Already set: the configuration must not create a directory.
+            with mock.patch.dict(os.environ, {'CATALOG_METRICS_DIR': 'unused'}):
+                worker_exit = runpy.run_path(path)['worker_exit']
+            buffer = visits.VisitBuffer()
+            buffer.add('/catalog/')
+
+            with self.subTest(config=config), mock.patch.object(visits, 'buffer', buffer):
+                worker_exit(server=None, worker=None)
+                self.assertEqual(VisitCount.objects.get(path='/catalog/').count, 1)
+            VisitCount.objects.all().delete()
@@ -0,0 +1,58 @@
+import json
+from io import StringIO
+
+from django.conf import settings
+from django.core.management import call_command
+from django.template import engines
+from django.test import SimpleTestCase, override_settings
+from django.urls import clear_url_caches, get_resolver
+
+from catalog import warmup
+
+
+CACHED_TEMPLATES = [{
+    **settings.TEMPLATES[0],
+    'OPTIONS': {
+        **settings.TEMPLATES[0]['OPTIONS'],
+        'loaders': [('django.template.loaders.cached.Loader', settings.TEMPLATE_LOADERS)],
+    },
+}]
+
+
+class WarmUpTest(SimpleTestCase):
+
+    def test_template_names(self):
+        names = warmup.template_names()
+
+        self.assertIn('catalog/book_list.html', names)
+        self.assertIn('registration/login.html', names)
+        self.assertNotIn('admin/base.html', names)
+
+    def test_urls_are_resolved(self):
+        clear_url_caches()
+        self.addCleanup(clear_url_caches)
+
+        resolver = warmup.warm_up_urls()
+
+        self.assertIs(resolver, get_resolver())
+        self.assertTrue(resolver._populated)
+
+    @override_settings(TEMPLATES=CACHED_TEMPLATES)
+    def test_templates_are_cached(self):
+        count = warmup.warm_up_templates()
+
+        loader = engines.all()[0].engine.template_loaders[0]
+        self.assertEqual(count, len(warmup.template_names()))
+        self.assertIn('catalog/book_list.html', loader.get_template_cache)
+
+
+class BenchStartupTest(SimpleTestCase):
+
+    def test_report(self):
+        out = StringIO()
+        call_command('bench_startup', '--runs', '1', '--path', '/accounts/login/', stdout=out)
+        report = json.loads(out.getvalue())
+
+        self.assertGreater(report['warm']['warm_up_ms'], 0)
+        for mode in ('cold', 'warm'):
+            self.assertEqual(set(report[mode]['requests']), {'/accounts/login/'})
@@ -1,15 +1,38 @@
+from django.conf import settings
 from django.urls import path
 
-from . import views
+from . import api, async_views, views
+
+
+if settings.CATALOG_ASYNC_VIEWS:
+    index = async_views.index
+    author_list = async_views.author_list
+    book_list = async_views.book_list
+    author_detail = async_views.author_detail
+    book_detail = async_views.book_detail
+    export_dataset = async_views.export_dataset
+else:
+    index = views.index
+    author_list = views.AuthorListView.as_view()
+    book_list = views.BookListView.as_view()
+    author_detail = views.AuthorDetailView.as_view()
+    book_detail = views.BookDetailView.as_view()
+    export_dataset = views.export_dataset
 
 
 urlpatterns = [
-    path('', views.index, name='index'),
-    path('authors/', views.AuthorListView.as_view(), name='authors'),
-    path('books/', views.BookListView.as_view(), name='books'),
+    path('', index, name='index'),
+    path('authors/', author_list, name='authors'),
+    path('books/', book_list, name='books'),
     path('borrowed/', views.LoanedBooksListView.as_view(), name='all_borrowed'),
+    path('borrowed/bulk/', views.bulk_circulation, name='bulk_circulation'),
+    path('search/', views.search_books, name='search'),
+    path(
+        'export/<slug:dataset>.<slug:format>', export_dataset,
+        name='export',
+    ),
     path(
-        'authors/<int:pk>', views.AuthorDetailView.as_view(), 
+        'authors/<int:pk>', author_detail, 
         name='author_detail',
     ),
     path(
@@ -25,12 +48,20 @@ urlpatterns = [
         name='author_delete',
     ),
     path(
-        'books/<int:pk>', views.BookDetailView.as_view(), 
+        'books/<int:pk>', book_detail, 
         name='book_detail'),
     path(
         'books/<uuid:pk>/renew/', views.renew_book_librarian, 
         name='renew_book_librarian',
     ),
+    path(
+        'books/<int:pk>/check-out/', views.check_out_book,
+        name='check_out_book',
+    ),
+    path(
+        'books/<int:pk>/reserve/', views.reserve_book,
+        name='reserve_book',
+    ),
     path(
         'books/create/', views.BookCreate.as_view(),
         name='book_create',
@@ -43,6 +74,18 @@ urlpatterns = [
         'books/<int:pk>/delete', views.BookDelete.as_view(),
         name='book_delete',
     ),
+    path(
+        'api/books/<int:pk>/availability/', api.book_availability,
+        name='api_book_availability',
+    ),
+    path(
+        'api/<slug:resource_name>/', api.resource_list,
+        name='api_list',
+    ),
+    path(
+        'api/<slug:resource_name>/<str:pk>/', api.resource_detail,
+        name='api_detail',
+    ),
     path(
         'mybooks/', views.LoanedBooksByUserListView.as_view(), 
         name='my_borrowed',
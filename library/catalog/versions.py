@@ -0,0 +1,84 @@
+"""Cache-backed version numbers of catalog data.
+
+A version is a millisecond timestamp stored in the cache and moved forward
+by ``bump()`` whenever the data it covers changes, so it doubles as a
+last-modification date. Versions are used to derive ``ETag`` and
+``Last-Modified`` headers and cache keys without querying the database.
+
+When a version is evicted from the cache it restarts at the current time,
+which can only make clients and caches refetch, never serve stale data.
+That holds only if every process (web workers, management commands) bumps
+and reads the same versions: with a per-process cache
+(``CATALOG_SHARED_CACHE`` is False), a change made in one process would not
+move the versions another one serves from. Versions are then not stored,
+and each read returns the current time, so nothing keyed on them is reused.
+"""
+
+import time
+from datetime import datetime, timezone
+
+from django.conf import settings
+from django.core.cache import cache
+
+
+VERSION_KEY_PREFIX = 'catalog:version:'
+
+
+def _now():
+    return int(time.time() * 1000)
+
+
+def _key(name):
+    return VERSION_KEY_PREFIX + name
+
+
+def for_books(book_ids):
+    """Version names of the given books' pages."""
+    return [f'book:{pk}' for pk in set(book_ids) if pk is not None]
+
+
+def for_authors(author_ids):
+    """Version names of the given authors' pages."""
+    return [f'author:{pk}' for pk in set(author_ids) if pk is not None]
+
+
+def get_versions(*names):
+    """Return ``{name: version}`` for the given version names."""
+    if not settings.CATALOG_SHARED_CACHE:
+        now = _now()
+        return {name: now for name in names}
+
+    keys = {name: _key(name) for name in names}
+    found = cache.get_many(keys.values())
+
+    versions = {}
+    for name, key in keys.items():
+        if key in found:
+            versions[name] = found[key]
+        else:
+            cache.add(key, _now(), timeout=None)
+            versions[name] = cache.get(key, _now())
+
+    return versions
+
+
+def bump(*names):
+    if not settings.CATALOG_SHARED_CACHE:
+        return
+
+    keys = [_key(name) for name in names]
+    current = cache.get_many(keys)
+    now = _now()
+
+    cache.set_many(
+        {key: max(now, current.get(key, 0) + 1) for key in keys},
+        timeout=None,
+    )
+
+
+def last_modified(versions):
+    """Return the most recent modification date covered by ``versions``."""
+    if not versions:
+        return None
+
+    return datetime.fromtimestamp(max(versions.values()) / 1000, tz=timezone.utc)
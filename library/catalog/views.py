@@ -1,50 +1,90 @@
 import datetime
 
-from django.contrib.auth.decorators import permission_required
+from django.contrib.auth.decorators import login_required, permission_required
 from django.contrib.auth.mixins import (
     LoginRequiredMixin, 
     PermissionRequiredMixin, 
 )
-from django.http import HttpResponseRedirect
+from django.core.paginator import Paginator
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+from django.http import Http404, HttpResponseRedirect, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, render
 from django.urls import reverse, reverse_lazy
+from django.utils.functional import SimpleLazyObject
 from django.views import generic
 
-from .forms import RenewBookModelForm
+from . import circulation, exports, search, stats, visits
+from .forms import BulkCirculationForm, CheckOutForm, RenewBookModelForm
 from .models import Author, Book, BookInstance, Genre, Language
+from .page_cache import CachedPageMixin
+from .pagination import KeysetPaginationMixin
 
 
 def index(request):
-    authors_count = Author.objects.all().count()
-    books_count = Book.objects.all().count()
-    instances_count = BookInstance.objects.all().count()
+    visits_count = visits.record(request)
 
-    available_instances_count = BookInstance.objects.filter(status__exact='a').count()
+    context = {
+        **stats.get_stats(),
+        'visits_count': visits_count,
+    }
+
+    response = render(request, 'index.html', context=context)
+    visits.set_cookie(response, visits_count + 1)
+
+    return response
+
+
+def search_books(request):
+    query = request.GET.get('q', '').strip()
+    per_page = 10
+
+    try:
+        page_number = max(int(request.GET.get('page', 1)), 1)
+    except ValueError:
+        page_number = 1
 
-    visits_count = request.session.get('visits_count', 0)
-    request.session['visits_count'] = visits_count + 1
+    books = search.search_books(
+        query, limit=per_page + 1, offset=(page_number - 1) * per_page,
+    )
 
     context = {
-        'authors_count': authors_count,
-        'books_count': books_count,
-        'instances_count': instances_count,
-        'available_instances_count': available_instances_count,
-        'visits_count': visits_count,
+        'query': query,
+        'book_list': books[:per_page],
+        'page_number': page_number,
+        'has_previous': page_number > 1,
+        'has_next': len(books) > per_page,
     }
 
-    return render(request, 'index.html', context=context)
+    return render(request, 'catalog/search_results.html', context)
+
+
+@permission_required('catalog.can_mark_returned')
+def export_dataset(request, dataset, format):
+    if dataset not in exports.DATASETS or format not in exports.CONTENT_TYPES:
+        raise Http404("Export inconnu.")
+
+    response = StreamingHttpResponse(
+        exports.iter_export(dataset, format),
+        content_type=exports.CONTENT_TYPES[format],
+    )
+    response['Content-Disposition'] = f'attachment; filename="{dataset}.{format}"'
+
+    return response
 
 
 @permission_required('catalog.can_mark_returned')
 def renew_book_librarian(request, pk):
-    book_instance = get_object_or_404(BookInstance, pk=pk)
+    book_instance = get_object_or_404(
+        BookInstance.objects.select_related('book', 'borrower'), pk=pk,
+    )
 
     if request.method == 'POST':
         form = RenewBookModelForm(request.POST)
 
         if form.is_valid():
             book_instance.due_back = form.cleaned_data['due_back']
-            book_instance.save()
+            book_instance.save(update_fields=['due_back'])
 
             return HttpResponseRedirect(reverse('all_borrowed'))
 
@@ -64,14 +104,101 @@ def renew_book_librarian(request, pk):
     return render(request, 'catalog/book_renew_librarian.html', context)
 
 
-class BookListView(generic.ListView):
+@permission_required('catalog.can_mark_returned')
+def check_out_book(request, pk):
+    book = get_object_or_404(Book, pk=pk)
+
+    if request.method == 'POST':
+        form = CheckOutForm(request.POST)
+
+        if form.is_valid():
+            copy_id = circulation.check_out_any(
+                book.pk,
+                form.cleaned_data['borrower'],
+                form.cleaned_data['due_back'],
+            )
+            if copy_id is not None:
+                return HttpResponseRedirect(reverse('all_borrowed'))
+
+            form.add_error(None, "Aucun exemplaire de ce livre n'est disponible.")
+
+    else:
+        form = CheckOutForm(
+            initial={'due_back': circulation.default_renewal_date()},
+        )
+
+    context = {
+        'form': form,
+        'book': book,
+    }
+
+    return render(request, 'catalog/book_check_out.html', context)
+
+
+@login_required
+def reserve_book(request, pk):
+    book = get_object_or_404(Book, pk=pk)
+    context = {'book': book}
+
+    if request.method == 'POST':
+        copy_id = circulation.reserve_any(book.pk, request.user)
+        context.update(
+            reserved=copy_id is not None,
+            hold_until=datetime.date.today() + circulation.HOLD_PERIOD,
+        )
+
+    return render(request, 'catalog/book_reserve.html', context)
+
+
+@permission_required('catalog.can_mark_returned')
+def bulk_circulation(request):
+    result = None
+
+    if request.method == 'POST':
+        form = BulkCirculationForm(request.POST)
+
+        if form.is_valid():
+            action = form.cleaned_data['action']
+            copies = form.cleaned_data['copies']
+
+            if action == 'check_in':
+                updated = circulation.check_in(copies)
+            elif action == 'renew':
+                updated = circulation.renew(copies, form.cleaned_data['due_back'])
+            else:
+                updated = circulation.set_status(copies, form.cleaned_data['status'])
+
+            result = {'updated': updated, 'ignored': len(copies) - updated}
+            form = BulkCirculationForm(initial={
+                'action': action,
+                'due_back': circulation.default_renewal_date(),
+            })
+
+    else:
+        form = BulkCirculationForm(
+            initial={'due_back': circulation.default_renewal_date()},
+        )
+
+    context = {
+        'form': form,
+        'result': result,
+    }
+
+    return render(request, 'catalog/bulk_circulation.html', context)
+
+
+class BookListView(CachedPageMixin, KeysetPaginationMixin, generic.ListView):
 
     model = Book
     paginate_by = 3
+    keyset_ordering = ('title', 'pk')
+
+    def get_cache_versions(self):
+        return ['books']
 
     def get_queryset(self):
 
-        return Book.objects.all()[:5]
+        return Book.objects.select_related('author')
 
     def get_context_data(self, **kwargs):
 
@@ -81,48 +208,119 @@ class BookListView(generic.ListView):
         return context
 
 
-class BookDetailView(generic.DetailView):
+class BookDetailView(CachedPageMixin, generic.DetailView):
 
     model = Book
+    queryset = Book.objects.select_related(
+        'author', 'language',
+    ).prefetch_related('genre')
+    copies_paginate_by = 10
 
+    def get_cache_versions(self):
+        return [f"book:{self.kwargs['pk']}"]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        copies = self.object.bookinstance_set.only(
+            'uuid', 'imprint', 'status', 'due_back', 'book_id',
+        ).order_by('due_back', 'uuid')
+        paginator = Paginator(copies, self.copies_paginate_by)
+        page_obj = paginator.get_page(self.request.GET.get('page'))
+
+        context.update({
+            # Only computed when the cached fragment is missing.
+            'copies_summary': SimpleLazyObject(copies.summary),
+            'copy_list': page_obj.object_list,
+            'paginator': paginator,
+            'page_obj': page_obj,
+            'is_paginated': page_obj.has_other_pages(),
+        })
+
+        return context
 
-class AuthorListView(generic.ListView):
+
+class AuthorListView(CachedPageMixin, KeysetPaginationMixin, generic.ListView):
 
     model = Author
     paginate_by = 3
+    keyset_ordering = ('last_name', 'first_name', 'pk')
 
-    def query_set(self):
-        return Author.objects.all()[:5]
+    def get_cache_versions(self):
+        return ['authors']
 
 
-class AuthorDetailView(generic.DetailView):
+class AuthorDetailView(CachedPageMixin, generic.DetailView):
 
     model = Author
+    books_paginate_by = 10
+
+    def get_cache_versions(self):
+        return [f"author:{self.kwargs['pk']}"]
+
+    @staticmethod
+    def annotate_books(books):
+        # Correlated subqueries are only evaluated for the displayed page,
+        # where a GROUP BY over the join would aggregate every book first.
+        copies = BookInstance.objects.filter(
+            book=OuterRef('pk'),
+        ).order_by().values('book').annotate(count=Count('pk')).values('count')
+
+        return books.annotate(
+            copies_count=Coalesce(Subquery(copies), 0),
+            available_copies_count=Coalesce(
+                Subquery(copies.filter(status='a')), 0,
+            ),
+        ).order_by('title', 'pk')
 
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+
+        books = self.annotate_books(self.object.book_set.all())
+        paginator = Paginator(books, self.books_paginate_by)
+        page_obj = paginator.get_page(self.request.GET.get('page'))
 
-class LoanedBooksByUserListView(LoginRequiredMixin, generic.ListView):
+        context.update({
+            'book_list': page_obj.object_list,
+            'paginator': paginator,
+            'page_obj': page_obj,
+            'is_paginated': page_obj.has_other_pages(),
+        })
+
+        return context
+
+
+class LoanedBooksByUserListView(
+    LoginRequiredMixin, KeysetPaginationMixin, generic.ListView,
+):
     """Generic class-based view listing books on loan to current user."""
 
     model = BookInstance
     template_name = 'catalog/bookinstances_list_borrowed_user.html'
     paginate_by = 3
+    keyset_ordering = ('due_back', 'uuid')
 
     def get_queryset(self):
         return BookInstance.objects.filter(
             borrower=self.request.user
-        ).filter(status__exact='o').order_by('due_back')
+        ).filter(status__exact='o').select_related('book').order_by('due_back')
 
 
-class LoanedBooksListView(PermissionRequiredMixin, generic.ListView):
+class LoanedBooksListView(
+    PermissionRequiredMixin, KeysetPaginationMixin, generic.ListView,
+):
     """Generic class-based view listing all books actually on loean (for librarians)."""
 
     permission_required = 'catalog.can_mark_returned'
     model = BookInstance
     template_name = 'catalog/borrowed_list.html'
     paginate_by = 3
+    keyset_ordering = ('due_back', 'uuid')
 
     def get_queryset(self):
-        return BookInstance.objects.filter(status__exact='o').order_by('due_back')
+        return BookInstance.objects.filter(
+            status__exact='o',
+        ).select_related('book', 'borrower').order_by('due_back')
 
 
 class AuthorCreate(PermissionRequiredMixin, generic.edit.CreateView):
@@ -0,0 +1,125 @@
+"""Page visit counting without a database write per hit.
+
+The number of visits shown to a visitor is kept in a signed cookie, so
+counting it never creates or saves a session. Site-wide counts per page and
+user are buffered in process memory and added to the ``VisitCount`` rows in
+a single transaction once the buffer holds ``FLUSH_SIZE`` hits or is older
+than ``FLUSH_INTERVAL`` seconds, and when a gunicorn worker exits (see
+``worker_exit`` in the gunicorn configurations). A worker that is killed,
+or another process that exits, loses at most one buffer of visits.
+"""
+
+import logging
+import threading
+import time
+from collections import Counter
+
+from django.db import DatabaseError, IntegrityError, transaction
+from django.db.models import F
+
+from library.db.transaction import immediate_atomic
+
+from .models import VisitCount
+
+
+logger = logging.getLogger(__name__)
+
+VISITS_COOKIE = 'visits_count'
+VISITS_COOKIE_SALT = 'catalog.visits'
+VISITS_COOKIE_MAX_AGE = 60 * 60 * 24 * 365
+
+FLUSH_SIZE = 500
+FLUSH_INTERVAL = 30
+
+
+def write_counts(counts):
+    """Add ``{(path, user_id): visits}`` to the visit count rows."""
+    with immediate_atomic():
+        missing = {}
+        for (path, user_id), visits in counts.items():
+            rows = VisitCount.objects.filter(path=path, user_id=user_id)
+            if not rows.update(count=F('count') + visits):
+                missing[(path, user_id)] = visits
+
+        if not missing:
+            return
+
+        try:
+            with transaction.atomic():
+                VisitCount.objects.bulk_create(
+                    VisitCount(path=path, user_id=user_id, count=visits)
+                    for (path, user_id), visits in missing.items()
+                )
+        except IntegrityError:
+            # Some rows were created by another process since the update.
+            write_counts(missing)
+
+
+class VisitBuffer:
+
+    def __init__(self, flush_size=FLUSH_SIZE, flush_interval=FLUSH_INTERVAL):
+        self.flush_size = flush_size
+        self.flush_interval = flush_interval
+        self.counts = Counter()
+        self.pending = 0
+        self.last_flush = time.monotonic()
+        self.lock = threading.Lock()
+
+    def add(self, path, user_id=None):
+        with self.lock:
+            self.counts[(path, user_id)] += 1
+            self.pending += 1
+            due = (
+                self.pending >= self.flush_size
+                or time.monotonic() - self.last_flush >= self.flush_interval
+            )
+
+        if due:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered visits, return how many were written."""
+        with self.lock:
+            counts, self.counts = self.counts, Counter()
+            pending, self.pending = self.pending, 0
+            self.last_flush = time.monotonic()
+
+        if not counts:
+            return 0
+
+        try:
+            write_counts(counts)
+        except DatabaseError:
+            # Counting visits must not break the page: retry with the next flush.
+            logger.exception("Impossible d'enregistrer les visites")
+            with self.lock:
+                self.counts.update(counts)
+                self.pending += pending
+            return 0
+
+        return pending
+
+
+buffer = VisitBuffer()
+
+
+def record(request):
+    """Count a visit of ``request.path`` and return the visitor's count."""
+    user = request.user
+    buffer.add(request.path, user.pk if user.is_authenticated else None)
+
+    try:
+        visits_count = int(request.get_signed_cookie(
+            VISITS_COOKIE, default=0, salt=VISITS_COOKIE_SALT,
+        ))
+    except ValueError:
+        visits_count = 0
+
+    return visits_count
+
+
+def set_cookie(response, visits_count):
+    response.set_signed_cookie(
+        VISITS_COOKIE, visits_count, salt=VISITS_COOKIE_SALT,
+        max_age=VISITS_COOKIE_MAX_AGE, httponly=True, samesite='Lax',
+    )
@@ -0,0 +1,66 @@
+"""Work done once per process rather than on its first requests.
+
+``warm_up_urls`` imports the URLconfs, their views, and builds the URL
+resolver. ``warm_up_templates`` compiles the project's templates into the
+cached template loader. Only the servers run them, not every process that
+sets Django up (management commands, tests): with ``preload_app``,
+gunicorn.conf.py calls both in the master process so that every forked
+worker starts with them, and asgi.conf.py builds the URL resolver in each
+worker. ``bench_startup`` measures them.
+"""
+
+import os
+
+from django.conf import settings
+from django.template import engines
+from django.template.utils import get_app_template_dirs
+from django.urls import get_resolver
+from django.utils import formats, translation
+
+
+def warm_up_urls():
+    resolver = get_resolver()
+    # Populating the reverse dictionary imports every URLconf and view.
+    resolver.reverse_dict
+
+    return resolver
+
+
+def template_names():
+    """Names of the templates in the project's (not the packages') directories."""
+    directories = [
+        directory
+        for engine in engines.all()
+        for directory in [*engine.engine.dirs, *get_app_template_dirs('templates')]
+        if os.path.abspath(directory).startswith(settings.BASE_DIR)
+    ]
+
+    names = set()
+    for directory in directories:
+        for root, _, files in os.walk(directory):
+            for filename in files:
+                if filename.endswith('.html'):
+                    path = os.path.relpath(os.path.join(root, filename), directory)
+                    names.add(path.replace(os.sep, '/'))
+
+    return sorted(names)
+
+
+def warm_up_templates():
+    """Compile every project template; return how many were compiled.
+
+    Templates are only compiled, not rendered: rendering needs a context per
+    template and would query the database. What rendering loads on first
+    use, the context processors and the translation catalog and formats of
+    the site's language, is loaded here too.
+    """
+    names = template_names()
+    for engine in engines.all():
+        engine.engine.template_context_processors
+        for name in names:
+            engine.get_template(name)
+
+    with translation.override(settings.LANGUAGE_CODE):
+        formats.get_format('DATE_FORMAT')
+
+    return len(names)
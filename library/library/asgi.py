@@ -9,9 +9,19 @@ https://docs.djangoproject.com/en/3.0/howto/deployment/asgi/
 
 import os
 
-from django.core.asgi import get_asgi_application
+import django
+
+from library.handlers import ASGIHandler
+from library.static import StaticFilesApplication
 
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'library.settings')
+# Route the catalog read views to their asynchronous variants.
+os.environ.setdefault('CATALOG_ASYNC_VIEWS', 'True')
+
+# As django.core.asgi.get_asgi_application, with a handler that streams
+# asynchronous responses (see library.handlers).
+django.setup(set_prefix=False)
 
-application = get_asgi_application()
+# Static files are served in front of Django's (fully asynchronous) middleware.
+application = StaticFilesApplication(ASGIHandler())
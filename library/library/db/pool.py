@@ -0,0 +1,250 @@
+"""In-process pool of database connections, shared by the threads of a worker.
+
+Django opens a connection per thread and, with ``CONN_MAX_AGE``, keeps it
+open even while the thread is idle. With a pool, ``CONN_MAX_AGE`` is 0:
+each request (or each ``catalog.async_views`` call) checks a connection out
+when it first queries and gives it back when Django closes it. The pool
+keeps between ``min_size`` and ``max_size`` connections open, waits up to
+``timeout`` seconds for one to be given back when all are in use, and:
+
+- checks idle connections before handing them out, so a connection broken
+  by a database restart or failover is replaced instead of failing the
+  request;
+- resets connections given back (e.g. rolls back an open transaction) and
+  closes them after ``max_lifetime`` seconds, or after ``max_idle`` seconds
+  unused beyond ``min_size``;
+- forgets, without closing them, connections inherited from a parent
+  process (gunicorn's ``preload_app``): closing them would end the
+  parent's sessions.
+
+The pool does not depend on a database driver: it is given ``connect``,
+``check`` and ``reset`` functions (see ``library.db.postgresql``).
+"""
+
+import os
+import threading
+import time
+from collections import deque
+
+
+class PoolTimeout(Exception):
+    pass
+
+
+class ConnectionPool:
+
+    def __init__(
+        self, name, connect, check, reset, min_size=1, max_size=10, timeout=10,
+        max_idle=300, max_lifetime=3600,
+    ):
+        if not 0 <= min_size <= max_size or max_size < 1:
+            raise ValueError("Il faut 0 <= min_size <= max_size et max_size >= 1.")
+
+        self.name = name
+        self.connect = connect
+        self.check = check
+        self.reset = reset
+        self.min_size = min_size
+        self.max_size = max_size
+        self.timeout = timeout
+        self.max_idle = max_idle
+        self.max_lifetime = max_lifetime
+
+        self.condition = threading.Condition()
+        self.pid = os.getpid()
+        # (connection, opened at, given back at), most recently used last.
+        self.idle = deque()
+        # Opening time of every open connection, idle or not, by id().
+        self.opened_at = {}
+        # Connections open or being opened.
+        self.size = 0
+        self.waiting = 0
+        self.totals = {
+            'checkouts': 0, 'opened': 0, 'closed': 0, 'failed_checks': 0,
+            'timeouts': 0, 'wait_seconds': 0.0,
+        }
+
+    def _forget_after_fork(self):
+        if self.pid != os.getpid():
+            self.pid = os.getpid()
+            self.idle.clear()
+            self.opened_at.clear()
+            self.size = 0
+            self.waiting = 0
+
+    def _reserve(self, deadline):
+        """Return an idle connection, or None when a new one may be opened."""
+        with self.condition:
+            self._forget_after_fork()
+            while True:
+                if self.idle:
+                    return self.idle.pop()
+                if self.size < self.max_size:
+                    self.size += 1
+                    return None
+
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    self.totals['timeouts'] += 1
+                    raise PoolTimeout(
+                        f"Aucune connexion libre dans le pool {self.name} après "
+                        f"{self.timeout} s ({self.max_size} connexions utilisées)."
+                    )
+                self.waiting += 1
+                try:
+                    self.condition.wait(remaining)
+                finally:
+                    self.waiting -= 1
+
+    def _open(self):
+        """Open a connection in a slot reserved by ``_reserve``."""
+        try:
+            connection = self.connect()
+        except BaseException:
+            with self.condition:
+                self.size -= 1
+                self.condition.notify()
+            raise
+
+        with self.condition:
+            self.opened_at[id(connection)] = time.monotonic()
+            self.totals['opened'] += 1
+
+        return connection
+
+    def _discard(self, connection):
+        try:
+            connection.close()
+        except Exception:
+            pass
+
+        with self.condition:
+            if self.opened_at.pop(id(connection), None) is not None:
+                self.size -= 1
+                self.totals['closed'] += 1
+                self.condition.notify()
+
+    def get(self):
+        started = time.monotonic()
+        deadline = started + self.timeout
+
+        while True:
+            entry = self._reserve(deadline)
+            if entry is None:
+                connection = self._open()
+                break
+
+            connection, opened_at, _ = entry
+            if time.monotonic() - opened_at > self.max_lifetime:
+                self._discard(connection)
+                continue
+            try:
+                self.check(connection)
+                break
+            except Exception:
+                with self.condition:
+                    self.totals['failed_checks'] += 1
+                self._discard(connection)
+
+        with self.condition:
+            self.totals['checkouts'] += 1
+            self.totals['wait_seconds'] += time.monotonic() - started
+
+        return connection
+
+    def put(self, connection):
+        with self.condition:
+            self._forget_after_fork()
+            opened_at = self.opened_at.get(id(connection))
+        if opened_at is None:
+            # Not ours (e.g. inherited from the parent process).
+            return
+
+        now = time.monotonic()
+        try:
+            self.reset(connection)
+        except Exception:
+            self._discard(connection)
+            return
+        if now - opened_at > self.max_lifetime:
+            self._discard(connection)
+            return
+
+        expired = []
+        with self.condition:
+            self.idle.append((connection, opened_at, now))
+            # The least recently used connections come first.
+            while (
+                self.idle
+                and self.size - len(expired) > self.min_size
+                and now - self.idle[0][2] > self.max_idle
+            ):
+                expired.append(self.idle.popleft()[0])
+            self.condition.notify()
+
+        for stale in expired:
+            self._discard(stale)
+
+    def fill(self):
+        """Open connections until ``min_size`` are open."""
+        while True:
+            with self.condition:
+                self._forget_after_fork()
+                if self.size >= self.min_size:
+                    return
+                self.size += 1
+            self.put(self._open())
+
+    def close(self):
+        """Close the idle connections (the others are closed when given back)."""
+        with self.condition:
+            idle = [connection for connection, _, _ in self.idle]
+            self.idle.clear()
+        for connection in idle:
+            self._discard(connection)
+
+    def stats(self):
+        with self.condition:
+            return {
+                'size': self.size,
+                'idle': len(self.idle),
+                'in_use': self.size - len(self.idle),
+                'waiting': self.waiting,
+                'min_size': self.min_size,
+                'max_size': self.max_size,
+                **self.totals,
+            }
+
+
+# Pool and connection parameters, by database alias.
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+def get_pool(name, params, create):
+    """Pool of database ``name`` for ``params``, made with ``create()``.
+
+    A pool made with other parameters (e.g. before the test database was
+    created) is closed and replaced.
+    """
+    with _pools_lock:
+        params_of_pool, pool = _pools.get(name, (None, None))
+        if pool is not None and params_of_pool == params:
+            return pool
+        _pools[name] = params, create()
+
+    if pool is not None:
+        pool.close()
+
+    return _pools[name][1]
+
+
+def all_pools():
+    with _pools_lock:
+        return [pool for _, pool in _pools.values()]
+
+
+def close_pools():
+    """Close the idle connections of every pool."""
+    for pool in all_pools():
+        pool.close()
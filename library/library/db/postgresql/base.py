@@ -0,0 +1,75 @@
+"""PostgreSQL backend taking its connections from a ``library.db.pool`` pool.
+
+Set ``CONN_MAX_AGE`` to 0, so that Django gives connections back to the pool
+at the end of each request, and configure the pool with a ``pool`` dict in
+the database ``OPTIONS`` (``min_size``, ``max_size``, ``timeout``,
+``max_idle``, ``max_lifetime``; see ``ConnectionPool``). Idle connections
+are checked with ``SELECT 1`` before being handed out.
+
+Connections used to create and drop the test database are not pooled.
+"""
+
+import psycopg2.extensions
+from django.db.backends.base.base import NO_DB_ALIAS
+from django.db.backends.postgresql import base, creation
+
+from library.db.pool import ConnectionPool, PoolTimeout, close_pools, get_pool
+
+
+def check(connection):
+    with connection.cursor() as cursor:
+        cursor.execute('SELECT 1')
+    if not connection.autocommit:
+        connection.rollback()
+
+
+def reset(connection):
+    # A broken connection is in the UNKNOWN status and fails to roll back.
+    if connection.get_transaction_status() != psycopg2.extensions.TRANSACTION_STATUS_IDLE:
+        connection.rollback()
+
+
+class DatabaseCreation(creation.DatabaseCreation):
+
+    def _destroy_test_db(self, test_database_name, verbosity):
+        # Idle pooled connections to the test database would prevent its
+        # deletion.
+        close_pools()
+        super()._destroy_test_db(test_database_name, verbosity)
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    creation_class = DatabaseCreation
+    pool = None
+
+    def get_new_connection(self, conn_params):
+        pool_options = conn_params.pop('pool', {})
+        if self.alias == NO_DB_ALIAS:
+            return super().get_new_connection(conn_params)
+
+        self.pool = get_pool(
+            self.alias, (conn_params, pool_options),
+            lambda: ConnectionPool(
+                self.alias,
+                lambda: super(DatabaseWrapper, self).get_new_connection(conn_params),
+                check, reset, **pool_options,
+            ),
+        )
+        try:
+            connection = self.pool.get()
+        except PoolTimeout as error:
+            raise base.Database.OperationalError(str(error)) from error
+        self.pool.fill()
+
+        # As set by the parent class when it opened the connection.
+        self.isolation_level = connection.isolation_level
+
+        return connection
+
+    def _close(self):
+        if self.connection is None or self.pool is None:
+            return super()._close()
+
+        with self.wrap_database_errors:
+            self.pool.put(self.connection)
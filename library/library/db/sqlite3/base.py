@@ -0,0 +1,55 @@
+"""SQLite backend for serving concurrent requests from ``db.sqlite3``.
+
+Each new connection is switched to write-ahead logging, so readers no longer
+block the writer nor the other way round, and tuned with ``PRAGMAS`` (values
+can be overridden with a ``pragmas`` dict in the database ``OPTIONS``).
+
+Blocks that write use ``library.db.transaction.immediate_atomic()``, which
+starts them with ``BEGIN IMMEDIATE``: the write lock is taken, or waited for
+up to ``busy_timeout``, when the block starts. With a plain ``BEGIN``, a
+block that reads before writing fails at once with "database is locked"
+when another connection writes meanwhile, since SQLite cannot wait for the
+lock without risking a deadlock. Other ``transaction.atomic()`` blocks
+(read-only ones, Django's own such as the admin's) keep the plain
+``BEGIN``, so they do not queue behind writers; those that read and then
+write can still get that error under concurrent writes.
+"""
+
+from django.db.backends.sqlite3 import base
+
+
+class DatabaseWrapper(base.DatabaseWrapper):
+
+    PRAGMAS = {
+        'journal_mode': 'WAL',
+        # Durable across application crashes; a power loss may lose the
+        # last transactions but never corrupts the database in WAL mode.
+        'synchronous': 'NORMAL',
+        'busy_timeout': 5000,
+        'mmap_size': 256 * 1024 * 1024,
+        # Negative: in KiB (32 MiB) rather than pages, per connection.
+        'cache_size': -32 * 1024,
+    }
+
+    def get_connection_params(self):
+        conn_params = super().get_connection_params()
+        conn_params['pragmas'] = {**self.PRAGMAS, **conn_params.get('pragmas', {})}
+
+        return conn_params
+
+    def get_new_connection(self, conn_params):
+        pragmas = conn_params.pop('pragmas')
+        conn = super().get_new_connection(conn_params)
+        for name, value in pragmas.items():
+            conn.execute(f'PRAGMA {name} = {value}')
+
+        return conn
+
+    # Set by immediate_atomic() for the transaction it starts.
+    begin_immediate = False
+
+    def _start_transaction_under_autocommit(self):
+        if self.begin_immediate:
+            self.cursor().execute('BEGIN IMMEDIATE')
+        else:
+            super()._start_transaction_under_autocommit()
@@ -0,0 +1,26 @@
+"""Transactions that take the write lock when they start.
+
+``immediate_atomic()`` is ``transaction.atomic()`` for blocks that write.
+On ``library.db.sqlite3``, the outermost block starts with
+``BEGIN IMMEDIATE`` instead of ``BEGIN`` (see its module docstring); other
+backends lock rows as usual, and nested blocks are plain savepoints.
+"""
+
+from contextlib import contextmanager
+
+from django.db import transaction
+
+
+@contextmanager
+def immediate_atomic(using=None):
+    connection = transaction.get_connection(using)
+    outermost = not connection.in_atomic_block
+
+    connection.begin_immediate = outermost
+    try:
+        with transaction.atomic(using=using):
+            # Only the transaction being started, not the next ones.
+            connection.begin_immediate = False
+            yield
+    finally:
+        connection.begin_immediate = False
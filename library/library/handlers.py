@@ -0,0 +1,65 @@
+"""ASGI handler able to stream from asynchronous iterators.
+
+Django 3.1 iterates a ``StreamingHttpResponse`` synchronously in the event
+loop, where the ORM refuses to run (``SynchronousOnlyOperation``). The
+content of an ``AsyncStreamingHttpResponse`` is an asynchronous iterator
+instead, which can fetch each part in a thread; ``ASGIHandler`` sends the
+parts as they come. (Django 4.2 supports this natively.)
+"""
+
+from asgiref.sync import sync_to_async
+from django.core.handlers import asgi
+from django.http import StreamingHttpResponse
+
+
+class AsyncStreamingHttpResponse(StreamingHttpResponse):
+
+    def __init__(self, streaming_content, *args, **kwargs):
+        super().__init__((), *args, **kwargs)
+        self.async_streaming_content = streaming_content
+
+    def __iter__(self):
+        raise TypeError(
+            "Une AsyncStreamingHttpResponse ne peut être envoyée que par "
+            "library.handlers.ASGIHandler."
+        )
+
+
+def _encode_headers(response):
+    headers = [
+        (header.encode('ascii'), value.encode('latin1'))
+        for header, value in response.items()
+    ]
+    headers.extend(
+        (b'Set-Cookie', cookie.output(header='').encode('ascii').strip())
+        for cookie in response.cookies.values()
+    )
+
+    return headers
+
+
+class ASGIHandler(asgi.ASGIHandler):
+
+    async def send_response(self, response, send):
+        if not isinstance(response, AsyncStreamingHttpResponse):
+            return await super().send_response(response, send)
+
+        await send({
+            'type': 'http.response.start',
+            'status': response.status_code,
+            'headers': _encode_headers(response),
+        })
+        parts = response.async_streaming_content
+        try:
+            async for part in parts:
+                await send({
+                    'type': 'http.response.body',
+                    'body': response.make_bytes(part),
+                    'more_body': True,
+                })
+            await send({'type': 'http.response.body'})
+        finally:
+            # Also stops the iterator when the client went away mid-stream.
+            if hasattr(parts, 'aclose'):
+                await parts.aclose()
+            await sync_to_async(response.close, thread_sensitive=True)()
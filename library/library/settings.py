@@ -49,6 +49,7 @@ INSTALLED_APPS = [
 MIDDLEWARE = [
     'django.middleware.security.SecurityMiddleware',
     'whitenoise.middleware.WhiteNoiseMiddleware',
+    'catalog.metrics.MetricsMiddleware',
     'django.contrib.sessions.middleware.SessionMiddleware',
     'django.middleware.common.CommonMiddleware',
     'django.middleware.csrf.CsrfViewMiddleware',
@@ -57,16 +58,32 @@ MIDDLEWARE = [
     'django.middleware.clickjacking.XFrameOptionsMiddleware',
 ]
 
+# Logs the N+1 queries of each request while developing (see catalog.debug).
+if DEBUG:
+    MIDDLEWARE.append('catalog.debug.RepeatedQueryMiddleware')
+
+CATALOG_REPEATED_QUERY_THRESHOLD = 3
+
 ROOT_URLCONF = 'library.urls'
 
+TEMPLATE_LOADERS = [
+    'django.template.loaders.filesystem.Loader',
+    'django.template.loaders.app_directories.Loader',
+]
+
 TEMPLATES = [
     {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        # The Django backend, timing renders for catalog.metrics.
+        'BACKEND': 'catalog.metrics.DjangoTemplates',
         'DIRS': [
             os.path.join(BASE_DIR, 'templates'),
         ],
-        'APP_DIRS': True,
         'OPTIONS': {
+            # Compiled templates are kept in memory, except while developing
+            # (catalog.warmup compiles them before a worker starts).
+            'loaders': TEMPLATE_LOADERS if DEBUG else [
+                ('django.template.loaders.cached.Loader', TEMPLATE_LOADERS),
+            ],
             'context_processors': [
                 'django.template.context_processors.debug',
                 'django.template.context_processors.request',
@@ -83,15 +100,110 @@ WSGI_APPLICATION = 'library.wsgi.application'
 # Database
 # https://docs.djangoproject.com/en/3.0/ref/settings/#databases
 
+# Without DATABASE_URL, db.sqlite3 is used in WAL mode (see library.db.sqlite3).
+
 DATABASES = {
     'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
+        'ENGINE': 'library.db.sqlite3',
         'NAME': os.path.join(BASE_DIR, 'db.sqlite3'),
     }
 }
 db_from_env = dj_database_url.config(conn_max_age=500)
 DATABASES['default'].update(db_from_env)
 
+# PostgreSQL connections are pooled in each process (see library.db.pool):
+# the database sees at most workers x DJANGO_DB_POOL_MAX_SIZE connections.
+if DATABASES['default']['ENGINE'] in (
+    'django.db.backends.postgresql', 'django.db.backends.postgresql_psycopg2',
+):
+    DATABASES['default'].update({
+        'ENGINE': 'library.db.postgresql',
+        'CONN_MAX_AGE': 0,
+    })
+    DATABASES['default'].setdefault('OPTIONS', {})['pool'] = {
+        'min_size': int(os.environ.get('DJANGO_DB_POOL_MIN_SIZE', 1)),
+        'max_size': int(os.environ.get('DJANGO_DB_POOL_MAX_SIZE', 10)),
+        'timeout': float(os.environ.get('DJANGO_DB_POOL_TIMEOUT', 10)),
+    }
+
+# Cache
+# https://docs.djangoproject.com/en/3.0/topics/cache/
+# Local memory by default; set DJANGO_CACHE_DIR, on storage that every
+# worker process and management command can reach, to share the cache
+# between them.
+
+CACHES = {
+    'default': {
+        'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+    }
+}
+if os.environ.get('DJANGO_CACHE_DIR'):
+    CACHES['default'] = {
+        'BACKEND': 'django.core.cache.backends.filebased.FileBasedCache',
+        'LOCATION': os.environ['DJANGO_CACHE_DIR'],
+    }
+
+# Whether every process sees the same cache. What is cached across requests
+# (sessions, users and permissions, pages) must be invalidated in all of them,
+# so it is only cached when the cache is shared. Set CATALOG_SHARED_CACHE to
+# True to cache it in local memory when a single process serves the site
+# (e.g. runserver), or to False to turn that caching off.
+CATALOG_SHARED_CACHE = os.environ.get(
+    'CATALOG_SHARED_CACHE',
+    str(CACHES['default']['BACKEND'] != 'django.core.cache.backends.locmem.LocMemCache'),
+) == 'True'
+
+# Where the page fragments go when they must not be cached (see
+# catalog.page_cache).
+CACHES['dummy'] = {
+    'BACKEND': 'django.core.cache.backends.dummy.DummyCache',
+}
+
+# Sessions and authentication
+# With a shared cache, sessions are read from the cache and written through
+# to the database, and users and permissions are cached (see
+# catalog.backends); otherwise a logout or a revoked permission would only
+# take effect in one process, so both stay in the database (catalog.checks
+# refuses the cached variants). DJANGO_SESSION_ENGINE=signed_cookies keeps
+# sessions in the browser.
+
+SESSION_ENGINE = 'django.contrib.sessions.backends.' + os.environ.get(
+    'DJANGO_SESSION_ENGINE', 'cached_db' if CATALOG_SHARED_CACHE else 'db',
+)
+
+AUTHENTICATION_BACKENDS = [
+    'catalog.backends.CachedModelBackend' if CATALOG_SHARED_CACHE
+    else 'django.contrib.auth.backends.ModelBackend',
+]
+
+# Asynchronous read views, enabled by library/asgi.py (see catalog.async_views)
+
+CATALOG_ASYNC_VIEWS = os.environ.get('CATALOG_ASYNC_VIEWS', '') == 'True'
+CATALOG_ASYNC_POOL_SIZE = int(os.environ.get('CATALOG_ASYNC_POOL_SIZE', 16))
+
+# One sync-only middleware makes Django run every request in the single
+# thread of sync_to_async(thread_sensitive=True): under ASGI, library.asgi
+# serves the static files itself (see library.static) and the N+1 logger
+# is left out.
+if CATALOG_ASYNC_VIEWS:
+    MIDDLEWARE = [
+        middleware for middleware in MIDDLEWARE
+        if middleware not in (
+            'whitenoise.middleware.WhiteNoiseMiddleware',
+            'catalog.debug.RepeatedQueryMiddleware',
+        )
+    ]
+
+# Request metrics served on /metrics (see catalog.metrics); set a token to
+# require it from the scraper. Without a token, only staff members (or anyone
+# when DEBUG is on) may read them.
+
+CATALOG_METRICS_TOKEN = os.environ.get('CATALOG_METRICS_TOKEN', '')
+
+# Directory where each worker process writes its metrics, added up on each
+# scrape; without it, /metrics only shows the worker that serves it.
+CATALOG_METRICS_DIR = os.environ.get('CATALOG_METRICS_DIR', '')
+
 # Password validation
 # https://docs.djangoproject.com/en/3.0/ref/settings/#auth-password-validators
 
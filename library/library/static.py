@@ -0,0 +1,80 @@
+"""ASGI application serving the static files in front of Django.
+
+WhiteNoise 5.1 only provides a synchronous middleware, and a single
+synchronous middleware makes Django's ASGI handler run every request in the
+same thread. ``StaticFilesApplication`` looks the files up and builds the
+responses with WhiteNoise (same settings, compression, caching headers) but
+outside Django's middleware chain, reading the files in the event loop's
+default executor; other requests go to the wrapped application.
+"""
+
+import asyncio
+
+from whitenoise.middleware import WhiteNoiseMiddleware
+
+
+CHUNK_SIZE = 64 * 1024
+
+
+def _request_headers(scope):
+    """The request headers as WhiteNoise expects them (WSGI environ keys)."""
+    headers = {}
+    for name, value in scope['headers']:
+        key = 'HTTP_' + name.decode('latin-1').upper().replace('-', '_')
+        headers[key] = value.decode('latin-1')
+
+    return headers
+
+
+class StaticFilesApplication:
+
+    def __init__(self, application):
+        self.application = application
+        self.whitenoise = WhiteNoiseMiddleware()
+
+    async def __call__(self, scope, receive, send):
+        if scope['type'] == 'http':
+            static_file = await self.find_file(scope['path'])
+            if static_file is not None:
+                return await self.serve(static_file, scope, send)
+
+        return await self.application(scope, receive, send)
+
+    async def find_file(self, path):
+        if not self.whitenoise.autorefresh:
+            return self.whitenoise.files.get(path)
+        if not (self.whitenoise.root or path.startswith(self.whitenoise.static_prefix)):
+            return None
+
+        # While developing, files are looked up on each request (disk access).
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, self.whitenoise.find_file, path)
+
+    async def serve(self, static_file, scope, send):
+        loop = asyncio.get_running_loop()
+        response = await loop.run_in_executor(
+            None, static_file.get_response, scope['method'], _request_headers(scope),
+        )
+
+        await send({
+            'type': 'http.response.start',
+            'status': int(response.status),
+            'headers': [
+                (name.lower().encode('latin-1'), str(value).encode('latin-1'))
+                for name, value in response.headers
+            ],
+        })
+        if response.file is None:
+            return await send({'type': 'http.response.body', 'body': b''})
+
+        try:
+            while True:
+                chunk = await loop.run_in_executor(None, response.file.read, CHUNK_SIZE)
+                more_body = len(chunk) == CHUNK_SIZE
+                await send({
+                    'type': 'http.response.body', 'body': chunk, 'more_body': more_body,
+                })
+                if not more_body:
+                    break
+        finally:
+            response.file.close()
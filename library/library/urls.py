@@ -20,6 +20,8 @@ from django.contrib import admin
 from django.urls import path, include
 from django.views.generic import RedirectView
 
+from catalog.metrics import metrics_view
+
 
 APPS_PATTERNS = [
     path('accounts/', include('django.contrib.auth.urls')),
@@ -30,6 +32,7 @@ STATIC_PATTERN = static(settings.STATIC_URL, document_root=settings.STATIC_ROOT)
 urlpatterns = [
     path('', RedirectView.as_view(url='catalog/', permanent=True)),
     path('admin/', admin.site.urls),
+    path('metrics', metrics_view, name='metrics'),
 ]
 urlpatterns += APPS_PATTERNS
 urlpatterns += STATIC_PATTERN
@@ -0,0 +1,17 @@
+"""Gunicorn worker serving ``library.asgi`` with uvicorn.
+
+Unlike ``uvicorn.workers.UvicornWorker``, which requires uvloop and
+httptools, the fastest available event loop and HTTP parser are used, so
+the worker also runs where those extensions cannot be built.
+"""
+
+from uvicorn.workers import UvicornWorker as BaseUvicornWorker
+
+
+class UvicornWorker(BaseUvicornWorker):
+
+    CONFIG_KWARGS = {
+        'loop': 'auto',
+        'http': 'auto',
+        'lifespan': 'off',
+    }